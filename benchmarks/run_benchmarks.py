@@ -0,0 +1,363 @@
+"""
+مجموعة قياس أداء خط معالجة التحليل
+
+بيانات اصطناعية قابلة للتكرار (بذرة ثابتة) من MarketSimulator، وهو نفس مولد
+PocketOptionAPI، وقياس كل مرحلة على عدة أحجام.
+
+    python benchmarks/run_benchmarks.py --profile quick --save benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json --threshold 0.2
+    python benchmarks/run_benchmarks.py --filter indicators --profile full
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# ضمان إمكانية استيراد حزم المشروع عند التشغيل من أي مجلد
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from src.analyzers.candle_patterns import CandlePatternAnalyzer
+from src.analyzers.indicator_calculator import TechnicalIndicatorCalculator
+from src.analyzers.trading_strategy import TradingStrategy
+from src.api.market_simulator import MarketSimulator
+from src.api.pocket_option import timeframe_to_seconds
+from src.models.candle_frame import CandleFrame
+
+# أحجام القياس لكل ملف تشغيل
+PROFILES = {
+    "quick": {"candles": [50, 1000, 10000], "assets": [1, 10, 50]},
+    "full": {"candles": [50, 500, 5000, 20000, 100000], "assets": [1, 10, 100, 500]}
+}
+
+# نماذج استجابات الذكاء الاصطناعي لقياس parse_response (JSON مباشر، JSON مضمن، نص حر)
+SAMPLE_RESPONSES = [
+    '{"approval": true, "confidence": 82, "reasoning": "توافق المؤشرات مع نموذج الابتلاع"}',
+    'بعد المراجعة: {"approval": false, "confidence": 40, "reasoning": "تشبع شرائي"} انتهى.',
+    "نعم أوافق على التوصية بثقة 75% لأن الزخم إيجابي والاتجاه صاعد على الأطر الأكبر"
+]
+
+START_TIMESTAMP = 1_700_000_000 // 3600 * 3600
+
+
+def generate_candles(count: int, seed: int, timeframe: str = "1m") -> CandleFrame:
+    """شموع اصطناعية قابلة للتكرار من MarketSimulator"""
+    return MarketSimulator(seed=seed).generate(count, START_TIMESTAMP, timeframe_to_seconds(timeframe))
+
+
+class BenchmarkSuite:
+    """تسجيل القياسات وتشغيلها مع اختيار عدد التكرارات تلقائيًا"""
+
+    def __init__(self, profile: str = "quick", seed: int = 42, repeats: int = 5, min_time: float = 0.05,
+                 name_filter: Optional[str] = None):
+        self.sizes = PROFILES[profile]
+        self.profile = profile
+        self.seed = seed
+        self.repeats = repeats
+        self.min_time = min_time
+        self.name_filter = name_filter
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._frames: Dict[Tuple[int, int], CandleFrame] = {}
+
+    def frame(self, count: int, index: int = 0) -> CandleFrame:
+        """إطار شموع مخزن لكل (حجم، أصل) حتى لا يُقاس التوليد"""
+        key = (count, index)
+        if key not in self._frames:
+            self._frames[key] = generate_candles(count, self.seed + index)
+        return self._frames[key]
+
+    def wants(self, name: str) -> bool:
+        return self.name_filter is None or self.name_filter in name
+
+    def measure(self, name: str, function: Callable[[], Any], items: int = 1, **params):
+        """قياس دالة: أفضل وسيط زمن للاستدعاء عبر عدة تكرارات"""
+        key = name + "".join(f"[{param}={value}]" for param, value in params.items())
+        if not self.wants(key):
+            return
+
+        function()  # إحماء (ذاكرات مؤقتة، مصفوفات الاضمحلال، الاستيراد الكسول)
+        loops = 1
+        while True:
+            started = time.perf_counter()
+            for _ in range(loops):
+                function()
+            elapsed = time.perf_counter() - started
+            if elapsed >= self.min_time or loops >= 1_000_000:
+                break
+            loops *= 10 if elapsed < self.min_time / 10 else 2
+
+        samples = [elapsed / loops]
+        for _ in range(self.repeats - 1):
+            started = time.perf_counter()
+            for _ in range(loops):
+                function()
+            samples.append((time.perf_counter() - started) / loops)
+
+        median = statistics.median(samples)
+        self.results[key] = {
+            "name": name,
+            "params": params,
+            "median_us": round(median * 1e6, 3),
+            "min_us": round(min(samples) * 1e6, 3),
+            "per_item_us": round(median * 1e6 / items, 3),
+            "loops": loops,
+            "repeats": len(samples)
+        }
+        print(f"{key:<60} {median * 1e6:>14.1f} us")
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        self.bench_market()
+        self.bench_patterns()
+        self.bench_indicators()
+        self.bench_strategy()
+        self.bench_prompts()
+        self.seed_api()
+        self.bench_serialization()
+        self.bench_analyze_route()
+        return self.results
+
+    def seed_api(self):
+        """
+        مولد شموع ببذرة ثابتة لواجهة الخدمة المشتركة
+
+        قياسات المسار الكامل تمر بـ pocket_option_api، ومولده الافتراضي غير مبذور
+        (ما لم يُضبط POCKET_SIM_SEED)؛ فتختلف الشموع والإشارات بين التشغيلات.
+        """
+        from src.api.pocket_option import pocket_option_api
+        pocket_option_api.simulator = MarketSimulator(seed=self.seed, base_price=pocket_option_api.base_price)
+
+    def bench_market(self):
+        simulator = MarketSimulator(seed=self.seed)
+        for count in self.sizes["candles"]:
+            self.measure("market.generate", lambda: simulator.generate(count, START_TIMESTAMP), items=count,
+                         candles=count)
+
+    def bench_patterns(self):
+        analyzer = CandlePatternAnalyzer()
+        for count in self.sizes["candles"]:
+            frame = self.frame(count)
+            self.measure("patterns.analyze_patterns", lambda: analyzer.analyze_patterns(frame), candles=count)
+            self.measure("patterns.scan", lambda: analyzer.scan(frame), items=count, candles=count)
+
+    def bench_indicators(self):
+        calculator = TechnicalIndicatorCalculator()
+        for count in self.sizes["candles"]:
+            frame = self.frame(count)
+            closes, highs, lows = frame.close, frame.high, frame.low
+            single = {
+                "rsi": lambda: calculator._calculate_rsi(closes),
+                "macd": lambda: calculator._calculate_macd(closes),
+                "bollinger_bands": lambda: calculator._calculate_bollinger_bands(closes),
+                "ema_cross": lambda: calculator._calculate_ema_cross(closes),
+                "stochastic": lambda: calculator._calculate_stochastic(highs, lows, closes)
+            }
+            for indicator, function in single.items():
+                self.measure(f"indicators.{indicator}", function, candles=count)
+            self.measure("indicators.calculate_all", lambda: calculator.calculate_all_indicators(frame), candles=count)
+            self.measure("indicators.calculate_series", lambda: calculator.calculate_series(frame),
+                         items=count, candles=count)
+
+    def _timeframe_analyses(self, index: int):
+        """تحليلات الأطر الخمسة لأصل واحد (مدخلات generate_signal و create_prompt)"""
+        analyzer, calculator, strategy = CandlePatternAnalyzer(), TechnicalIndicatorCalculator(), TradingStrategy()
+        base = self.frame(60 * 51, index)
+        analyses = []
+        for timeframe in strategy.timeframe_weights:
+            seconds = timeframe_to_seconds(timeframe)
+            frame = (base if seconds == 60 else base.resample(seconds, 60)).tail(50)
+            analyses.append(strategy.analyze_timeframe(
+                timeframe, analyzer.analyze_patterns(frame), calculator.calculate_all_indicators(frame)
+            ))
+        return analyses
+
+    def bench_strategy(self):
+        strategy = TradingStrategy()
+        analyses = self._timeframe_analyses(0)
+        self.measure(
+            "strategy.analyze_timeframe",
+            lambda: [strategy.analyze_timeframe(analysis.timeframe, analysis.candle_patterns,
+                                                analysis.technical_indicators) for analysis in analyses],
+            items=len(analyses)
+        )
+        for assets in self.sizes["assets"]:
+            if not self.wants(f"strategy.generate_signal[assets={assets}]"):
+                continue
+            analyses = [self._timeframe_analyses(index % 10) for index in range(assets)]
+            self.measure(
+                "strategy.generate_signal",
+                lambda: [strategy.generate_signal(analysis, "EURUSD_OTC") for analysis in analyses],
+                items=assets, assets=assets
+            )
+
+    def bench_prompts(self):
+        from src.ai_layer.deepseek import DeepSeekHandler
+        from src.services.signal_service import build_ai_signal_data
+
+        handler = DeepSeekHandler()
+        for assets in self.sizes["assets"]:
+            if not self.wants(f"ai.create_prompt[assets={assets}]["):
+                continue
+            signals = []
+            for index in range(assets):
+                analyses = self._timeframe_analyses(index % 10)
+                recommendation, confidence, _ = TradingStrategy().generate_signal(analyses, "EURUSD_OTC")
+                signals.append(build_ai_signal_data(f"ASSET{index}_OTC", recommendation, confidence, analyses))
+            for mode in ("compact", "full"):
+                self.measure("ai.create_prompt", lambda: [handler.create_prompt(signal, mode) for signal in signals],
+                             items=assets, assets=assets, mode=mode)
+
+        for index, response in enumerate(SAMPLE_RESPONSES):
+            self.measure("ai.parse_response", lambda: handler.parse_response(response), variant=index)
+
+    def bench_serialization(self):
+        """بناء استجابة الإشارة: jsonify للقواميس اليدوية (المسار السابق) مقابل الترميز المباشر"""
+        from flask import jsonify
+        from main import app
+        from src.services.async_runner import background_loop
+        from src.services.serializer import encode_signal_response, encode_signals_response
+        from src.services.signal_service import signal_service
+
+        def legacy_signal(trading_signal):
+            return {
+                'asset': trading_signal.asset,
+                'recommendation': trading_signal.recommendation,
+                'entry_time': trading_signal.entry_time.isoformat() if trading_signal.entry_time else None,
+                'trade_duration': trading_signal.trade_duration,
+                'target_price': trading_signal.target_price,
+                'technical_confidence': round(trading_signal.technical_confidence, 2),
+                'ai_confidence': round(trading_signal.ai_confidence, 2),
+                'final_confidence': round(trading_signal.final_confidence, 2),
+                'ai_responses': [
+                    {
+                        'provider': response.provider,
+                        'approval': response.approval,
+                        'confidence': response.confidence,
+                        'reasoning': response.reasoning
+                    }
+                    for response in trading_signal.ai_responses
+                ],
+                'created_at': trading_signal.created_at.isoformat()
+            }
+
+        for assets in self.sizes["assets"]:
+            if not self.wants("serialize"):
+                return
+            names = [f"BENCH{index:03d}_OTC" for index in range(assets)]
+
+            async def compute():
+                return await asyncio.gather(*(signal_service.get_signal(name) for name in names))
+            signals = dict(zip(names, background_loop.run(compute(), timeout=600)))
+
+            with app.test_request_context():
+                self.measure(
+                    "serialize.jsonify_legacy",
+                    lambda: [jsonify({'success': True, 'message': 'تم التحليل بنجاح', 'signal': legacy_signal(signal)})
+                             for signal in signals.values()],
+                    items=assets, assets=assets
+                )
+            self.measure("serialize.encode", lambda: [encode_signal_response(signal) for signal in signals.values()],
+                         items=assets, assets=assets)
+            self.measure("serialize.encode_compact",
+                         lambda: [encode_signal_response(signal, compact=True) for signal in signals.values()],
+                         items=assets, assets=assets)
+            self.measure("serialize.encode_list", lambda: encode_signals_response(signals), items=assets, assets=assets)
+
+    def bench_analyze_route(self):
+        from main import app
+        from src.services.async_runner import background_loop
+        from src.services.signal_service import signal_service
+
+        client = app.test_client()
+        for assets in self.sizes["assets"]:
+            if not self.wants(f"api.analyze[assets={assets}]"):
+                continue
+            names = [f"BENCH{index:03d}_OTC" for index in range(assets)]
+
+            # تهيئة ذاكرة الشموع لكل الأصول مرة واحدة (تأخير الشبكة المحاكى ليس موضوع القياس)
+            async def prime():
+                await asyncio.gather(*(signal_service.get_signal(name) for name in names))
+            background_loop.run(prime(), timeout=600)
+
+            def analyze_all():
+                # كل طلب يمر بخط المعالجة كاملًا بدل ذاكرة النتائج قصيرة العمر
+                for name in names:
+                    signal_service.single_flight.clear()
+                    response = client.post("/api/analyze", json={"asset": name})
+                    assert response.status_code == 200, response.get_data(as_text=True)
+
+            self.measure("api.analyze", analyze_all, items=assets, assets=assets)
+
+
+def compare(current: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float) -> List[str]:
+    """مقارنة بخط أساس وطباعة النسب؛ يُرجع مفاتيح القياسات المتراجعة"""
+    regressions = []
+    print(f"\n{'benchmark':<60} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for key, result in current.items():
+        reference = baseline.get(key)
+        if reference is None:
+            print(f"{key:<60} {'-':>12} {result['median_us']:>12.1f} {'new':>8}")
+            continue
+        ratio = result["median_us"] / reference["median_us"] if reference["median_us"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        elif ratio < 1 / (1 + threshold):
+            flag = "  faster"
+        print(f"{key:<60} {reference['median_us']:>12.1f} {result['median_us']:>12.1f} {ratio:>8.2f}{flag}")
+    return regressions
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "created_at": datetime.now().isoformat()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس أداء خط معالجة التحليل")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="أقل زمن لكل تكرار بالثواني")
+    parser.add_argument("--filter", default=None, help="تشغيل القياسات التي يحتوي اسمها هذا النص فقط")
+    parser.add_argument("--save", default=None, help="حفظ النتائج كخط أساس JSON")
+    parser.add_argument("--compare", default=None, help="مقارنة بخط أساس JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="نسبة التراجع المسموحة (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    suite = BenchmarkSuite(args.profile, args.seed, args.repeats, args.min_time, args.filter)
+    results = suite.run()
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as handle:
+            json.dump({
+                "environment": environment(),
+                "profile": args.profile,
+                "seed": args.seed,
+                "results": results
+            }, handle, ensure_ascii=False, indent=2)
+        print(f"\nتم حفظ خط الأساس في {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} قياس تراجع بأكثر من {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
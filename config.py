@@ -15,17 +15,65 @@ class ConfigManager:
         """إرجاع التكوين الافتراضي"""
         return {
             "ai_providers": {
-                "openai": {"api_key": os.environ.get("OPENAI_API_KEY", ""), "enabled": False, "weight": 0.25},
-                "deepseek": {"api_key": os.environ.get("DEEPSEEK_API_KEY", ""), "enabled": False, "weight": 0.20},
-                "groq": {"api_key": os.environ.get("GROQ_API_KEY", ""), "enabled": False, "weight": 0.20},
-                "manus": {"api_key": os.environ.get("MANUS_API_KEY", ""), "enabled": False, "weight": 0.20},
-                "grok": {"api_key": os.environ.get("GROK_API_KEY", ""), "enabled": False, "weight": 0.15}
+                "openai": {"api_key": os.environ.get("OPENAI_API_KEY", ""), "enabled": False, "weight": 0.25, "timeout": 20, "cache_ttl_bars": 1},
+                "deepseek": {"api_key": os.environ.get("DEEPSEEK_API_KEY", ""), "enabled": False, "weight": 0.20, "timeout": 15, "cache_ttl_bars": 1},
+                "groq": {"api_key": os.environ.get("GROQ_API_KEY", ""), "enabled": False, "weight": 0.20, "timeout": 15, "cache_ttl_bars": 1},
+                "manus": {"api_key": os.environ.get("MANUS_API_KEY", ""), "enabled": False, "weight": 0.20, "timeout": 15, "cache_ttl_bars": 1},
+                "grok": {"api_key": os.environ.get("GROK_API_KEY", ""), "enabled": False, "weight": 0.15, "timeout": 15, "cache_ttl_bars": 1}
             },
             "confidence_calculation": {
                 "technical_weight": 0.6,
                 "ai_weight": 0.4,
                 "min_ai_approvals": 2,
                 "min_final_confidence": 70
+            },
+            "ai_cache": {
+                "max_entries": 10000,
+                "max_bytes": 8 * 1024 * 1024,
+                "confidence_bucket": 5.0,
+                "default_ttl_bars": 1
+            },
+            "http_pool": {
+                "max_connections": int(os.environ.get("AI_HTTP_MAX_CONNECTIONS", 100)),
+                "max_keepalive_connections": int(os.environ.get("AI_HTTP_MAX_KEEPALIVE", 20)),
+                "keepalive_expiry": 60.0,
+                "http2": True,
+                "timeout": 15.0
+            },
+            "concurrency": {
+                "max_backend_requests": int(os.environ.get("MAX_BACKEND_REQUESTS", 8)),
+                "max_ai_requests": int(os.environ.get("MAX_AI_REQUESTS", 16))
+            },
+            "watchlist": {
+                "enabled": os.environ.get("WATCHLIST_ENABLED", "false").lower() == "true",
+                "assets": [asset.strip() for asset in os.environ.get("WATCHLIST", "").split(",") if asset.strip()],
+                "timeframes": None,
+                "settle_delay": 0.5,
+                "max_assets": 100
+            },
+            "signal_stream": {
+                "client_queue_size": 32,
+                "heartbeat_interval": 15.0,
+                # نصف خيوط العامل على الأكثر للبث، والباقي لطلبات التحليل
+                "max_clients": int(os.environ.get(
+                    "SIGNAL_STREAM_MAX_CLIENTS", max(1, int(os.environ.get("GUNICORN_THREADS", 32)) // 2)
+                ))
+            },
+            "ai_prompt": {
+                "mode": os.environ.get("AI_PROMPT_MODE", "compact")
+            },
+            "ai_resilience": {
+                "failure_threshold": 5,
+                "reset_timeout": 30.0,
+                "half_open_probes": 1,
+                "latency_window": 200,
+                "ewma_alpha": 0.2,
+                "hedge_min_samples": 20,
+                "hedge_min_delay": 0.05,
+                "backup_providers": [
+                    provider.strip() for provider in os.environ.get("AI_BACKUP_PROVIDERS", "").split(",")
+                    if provider.strip()
+                ]
             }
         }
     
@@ -37,6 +85,34 @@ class ConfigManager:
         """الحصول على تكوين حساب الثقة"""
         return self.config.get("confidence_calculation", {})
     
+    def get_ai_cache_config(self) -> Dict[str, Any]:
+        """الحصول على إعدادات ذاكرة أحكام الذكاء الاصطناعي المؤقتة"""
+        return self.config.get("ai_cache", {})
+    
+    def get_http_pool_config(self) -> Dict[str, Any]:
+        """الحصول على إعدادات مجمع اتصالات HTTP المشترك"""
+        return self.config.get("http_pool", {})
+    
+    def get_concurrency_config(self) -> Dict[str, Any]:
+        """الحصول على حدود التزامن مع خادم البيانات ومزودي الذكاء الاصطناعي"""
+        return self.config.get("concurrency", {})
+    
+    def get_watchlist_config(self) -> Dict[str, Any]:
+        """الحصول على إعدادات قائمة المراقبة والمجدول الخلفي"""
+        return self.config.get("watchlist", {})
+    
+    def get_signal_stream_config(self) -> Dict[str, Any]:
+        """الحصول على إعدادات بث الإشارات (SSE)"""
+        return self.config.get("signal_stream", {})
+    
+    def get_ai_prompt_config(self) -> Dict[str, Any]:
+        """الحصول على إعدادات نص الطلب للذكاء الاصطناعي (compact أو full)"""
+        return self.config.get("ai_prompt", {})
+    
+    def get_ai_resilience_config(self) -> Dict[str, Any]:
+        """الحصول على إعدادات قواطع الدائرة وتتبع الزمن والطلبات الاحتياطية للمزودين"""
+        return self.config.get("ai_resilience", {})
+    
     def is_provider_enabled(self, provider: str) -> bool:
         """فحص ما إذا كان مزود الذكاء الاصطناعي مفعل"""
         provider_config = self.get_ai_config(provider)
@@ -0,0 +1,20 @@
+import os
+
+# كل عامل يشغل حلقة أحداث خلفية واحدة (src/services/async_runner.py) تنفذ عليها
+# كوروتينات التحليل، بينما تنتظر خيوط gthread نتائجها؛ فتتداخل عمليات جلب
+# الشموع واستدعاءات المزودين لعشرات الطلبات داخل العامل الواحد.
+# كل عميل بث مفتوح (/api/signals/stream) يشغل خيطًا حتى يغلق، لذلك يُحد البث بنصف
+# الخيوط لكل عامل (signal_stream.max_clients أو SIGNAL_STREAM_MAX_CLIENTS) ويُرد بـ 503
+# بعده، فتبقى خيوط حرة لطلبات التحليل. لمزيد من لوحات المتابعة ارفع GUNICORN_THREADS.
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+threads = int(os.environ.get("GUNICORN_THREADS", 32))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 90))
+keepalive = 5
+
+
+def worker_exit(server, worker):
+    """إيقاف حلقة الأحداث الخلفية وإغلاق الاتصالات المجمعة عند خروج العامل"""
+    from src.services.async_runner import background_loop
+    background_loop.shutdown()
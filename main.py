@@ -7,6 +7,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from flask import Flask, render_template
 from flask_cors import CORS
 from src.routes.analysis import analysis_bp
+from src.services.watchlist_scheduler import watchlist_scheduler
+from config import config_manager
 
 # إعداد التطبيق
 app = Flask(__name__)
@@ -19,6 +21,10 @@ CORS(app, origins="*")
 # app.register_blueprint(user_bp, url_prefix="/api")
 app.register_blueprint(analysis_bp, url_prefix="/api")
 
+# المجدول الخلفي لقائمة المراقبة (WATCHLIST_ENABLED=true و WATCHLIST=EURUSD_OTC,GBPUSD_OTC)
+if config_manager.get_watchlist_config().get("enabled"):
+    watchlist_scheduler.start()
+
 # مسار الواجهة الأمامية
 @app.route("/")
 def serve_frontend():
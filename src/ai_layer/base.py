@@ -1,21 +1,98 @@
+import logging
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+import httpx
 from src.models.schemas import AIResponse
+from src.ai_layer.http_pool import HTTPClientPool
+from src.ai_layer.verdict_cache import AIVerdictCache
+from src.ai_layer.provider_health import ProviderHealthRegistry
+from src.ai_layer.prompt_builder import build_compact_prompt, estimate_tokens
+from src.services.async_runner import background_loop
+from src.services.metrics import prompt_tokens
+from config import config_manager
+
+logger = logging.getLogger(__name__)
 
 class BaseAIHandler(ABC):
     """الفئة الأساسية لمعالجات الذكاء الاصطناعي"""
     
-    def __init__(self, provider_name: str):
+    # مجمع اتصالات مشترك بين جميع المزودين على مستوى العملية
+    http_pool = HTTPClientPool.from_config(config_manager.get_http_pool_config())
+    
+    # ذاكرة مؤقتة مشتركة لأحكام جميع المزودين
+    verdict_cache = AIVerdictCache.from_config(config_manager.get_ai_cache_config())
+    
+    # قواطع الدائرة وزمن الاستجابة لكل مزود (تُستخدم في توزيع الطلبات)
+    provider_health = ProviderHealthRegistry.from_config(config_manager.get_ai_resilience_config())
+    
+    def __init__(self, provider_name: str, config_key: str = None):
         self.provider_name = provider_name
+        self.config_key = config_key or provider_name
         self.api_key = None
 
+    def get_http_client(self) -> httpx.AsyncClient:
+        """عميل HTTP المشترك (اتصالات دائمة لكل مضيف) لحلقة الأحداث الحالية"""
+        return BaseAIHandler.http_pool.get_client()
+
+    def timeout_response(self, error: Exception) -> AIResponse:
+        """رد موحد عند انتهاء مهلة طلب HTTP لدى المزود"""
+        return AIResponse(
+            provider=self.provider_name,
+            approval=False,
+            confidence=0.0,
+            reasoning=f"انتهت مهلة طلب {self.provider_name}: {str(error) or type(error).__name__}",
+            error=True,
+            timed_out=True
+        )
+
     @abstractmethod
     async def analyze_signal(self, signal_data: Dict[str, Any]) -> AIResponse:
         """تحليل الإشارة باستخدام الذكاء الاصطناعي"""
         pass
 
-    def create_prompt(self, signal_data: Dict[str, Any]) -> str:
-        """إنشاء النص المطلوب للذكاء الاصطناعي"""
+    async def cached_analyze_signal(self, signal_data: Dict[str, Any]) -> AIResponse:
+        """تحليل الإشارة مع المرور أولاً بذاكرة الأحكام المؤقتة (الأخطاء لا تُخزن)"""
+        key, cached = self.lookup_verdict(signal_data)
+        if cached is not None:
+            return cached
+        return await self.analyze_and_store(signal_data, key)
+
+    def lookup_verdict(self, signal_data: Dict[str, Any]) -> Tuple[Tuple[str, str], Optional[AIResponse]]:
+        """مفتاح الإشارة في ذاكرة الأحكام والحكم المخزن إن وجد"""
+        cache = BaseAIHandler.verdict_cache
+        key = cache.key_for(self.provider_name, signal_data)
+        return key, cache.get(key)
+
+    async def analyze_and_store(self, signal_data: Dict[str, Any], key: Tuple[str, str]) -> AIResponse:
+        """طلب حكم جديد من المزود وتخزينه إذا لم يكن خطأ"""
+        cache = BaseAIHandler.verdict_cache
+        response = await self.analyze_signal(signal_data)
+        if not response.error:
+            ttl_bars = config_manager.get_ai_config(self.config_key).get('cache_ttl_bars')
+            cache.put(key, response, cache.ttl_for(signal_data, ttl_bars))
+        return response
+
+    def create_prompt(self, signal_data: Dict[str, Any], mode: str = None) -> str:
+        """
+        إنشاء النص المطلوب للذكاء الاصطناعي مع تسجيل تقدير حجمه بالرموز
+
+        Args:
+            mode: compact (مقدمة ثابتة وجدول مختصر) أو full (النص الكامل)؛ الافتراضي من ai_prompt.mode
+        """
+        mode = mode or config_manager.get_ai_prompt_config().get('mode', 'compact')
+        if mode == 'compact':
+            prompt = build_compact_prompt(signal_data)
+        else:
+            mode = 'full'
+            prompt = self.create_full_prompt(signal_data)
+
+        tokens = estimate_tokens(prompt)
+        prompt_tokens.observe(tokens, self.provider_name, mode)
+        logger.info("prompt for %s: mode=%s chars=%d tokens~%d", self.provider_name, mode, len(prompt), tokens)
+        return prompt
+
+    def create_full_prompt(self, signal_data: Dict[str, Any]) -> str:
+        """النص الكامل الحر (الصيغة الأصلية)"""
         asset = signal_data.get('asset', 'غير محدد')
         recommendation = signal_data.get('recommendation', 'غير محدد')
         technical_confidence = signal_data.get('technical_confidence', 0)
@@ -101,3 +178,6 @@ class BaseAIHandler(ABC):
                 "confidence": 0.0,
                 "reasoning": f"خطأ في تحليل الاستجابة: {str(e)}"
             }
+
+# إغلاق اتصالات المجمع بنظافة عند خروج العملية
+background_loop.add_shutdown_hook(BaseAIHandler.http_pool.aclose)
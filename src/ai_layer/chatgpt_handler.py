@@ -9,7 +9,7 @@ class ChatGPTHandler(BaseAIHandler):
     """معالج ChatGPT"""
 
     def __init__(self, api_key: str = None):
-        super().__init__("chatgpt")
+        super().__init__("chatgpt", "openai")
         self.api_key = api_key
         self.api_url = "https://api.openai.com/v1/chat/completions"
 
@@ -33,8 +33,8 @@ class ChatGPTHandler(BaseAIHandler):
                 "temperature": 0.2
             }
 
-            async with httpx.AsyncClient(timeout=20) as client:
-                response = await client.post(self.api_url, headers=headers, json=payload)
+            client = self.get_http_client()
+            response = await client.post(self.api_url, headers=headers, json=payload, timeout=20)
 
             if response.status_code == 200:
                 data = response.json()
@@ -52,13 +52,18 @@ class ChatGPTHandler(BaseAIHandler):
                     provider="chatgpt",
                     approval=False,
                     confidence=0.0,
-                    reasoning=f"فشل الاتصال بـ OpenAI: {response.status_code} - {response.text}"
+                    reasoning=f"فشل الاتصال بـ OpenAI: {response.status_code} - {response.text}",
+                    error=True
                 )
 
+        except httpx.TimeoutException as e:
+            return self.timeout_response(e)
+
         except Exception as e:
             return AIResponse(
                 provider="chatgpt",
                 approval=False,
                 confidence=0.0,
-                reasoning=f"استثناء أثناء تحليل ChatGPT: {str(e)}"
+                reasoning=f"استثناء أثناء تحليل ChatGPT: {str(e)}",
+                error=True
             )
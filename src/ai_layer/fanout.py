@@ -0,0 +1,178 @@
+import asyncio
+import time
+from typing import Dict, Any, List, Optional, Sequence
+from src.ai_layer.base import BaseAIHandler
+from src.models.schemas import AIResponse
+from src.services.metrics import stage_seconds, provider_errors, provider_hedges, provider_skipped, provider_timeouts
+
+
+def _failure_response(provider: str, reasoning: str, timed_out: bool = False) -> AIResponse:
+    """استجابة رفض موحدة لمزود فشل أو تجاوز مهلته"""
+    return AIResponse(
+        provider=provider,
+        approval=False,
+        confidence=0.0,
+        reasoning=reasoning,
+        error=True,
+        timed_out=timed_out
+    )
+
+
+def _record_timeout(name: str, started: float):
+    """تسجيل تجاوز مهلة المزود: العداد والقاطع ومتتبع الزمن"""
+    health = BaseAIHandler.provider_health.get(name)
+    provider_timeouts.inc(name)
+    health.breaker.record_failure()
+    health.latency.observe(time.perf_counter() - started)
+
+
+async def _call_handler(name: str, handler: BaseAIHandler, signal_data: Dict[str, Any], timeout: float) -> AIResponse:
+    """
+    استدعاء مزود واحد ضمن مهلته الخاصة
+
+    الأحكام المخزنة تُرجع دون المرور بالقاطع، والمزود ذو الدائرة المفتوحة يُتخطى دون طلب.
+    النجاح يُسجل زمنه في متتبع الزمن، والفشل أو تجاوز المهلة يُحسب على القاطع.
+    مهلة HTTP داخل المعالج (timed_out) تُصنف كتجاوز مهلة المزود نفسه: تُعد في
+    provider_timeouts وتُسجل مدتها في متتبع الزمن.
+    الطلبات الملغاة (بعد اكتمال النصاب أو سبق المزود الاحتياطي) لا تُقاس.
+    """
+    key, cached = handler.lookup_verdict(signal_data)
+    if cached is not None:
+        return cached
+
+    health = BaseAIHandler.provider_health.get(name)
+    if not health.breaker.allow():
+        health.skipped += 1
+        provider_skipped.inc(name)
+        return _failure_response(name, f"تم تخطي {name}: الدائرة مفتوحة بعد أخطاء متتالية")
+
+    started = time.perf_counter()
+    try:
+        response = await asyncio.wait_for(handler.analyze_and_store(signal_data, key), timeout)
+        if response.timed_out:
+            _record_timeout(name, started)
+        elif response.error:
+            provider_errors.inc(name)
+            health.breaker.record_failure()
+        else:
+            health.breaker.record_success()
+            health.latency.observe(time.perf_counter() - started)
+    except asyncio.TimeoutError:
+        _record_timeout(name, started)
+        response = _failure_response(name, f"انتهت مهلة {name} ({timeout:.1f} ثانية)", timed_out=True)
+    except asyncio.CancelledError:
+        health.breaker.release()
+        raise
+    except Exception as e:
+        provider_errors.inc(name)
+        health.breaker.record_failure()
+        response = _failure_response(name, f"خطأ في معالج الذكاء الاصطناعي {name}: {str(e)}")
+
+    stage_seconds.observe(time.perf_counter() - started, "ai_provider", "", name)
+    return response
+
+
+async def collect_ai_responses(handlers: Dict[str, BaseAIHandler], signal_data: Dict[str, Any],
+                               min_approvals: int, timeouts: Optional[Dict[str, float]] = None,
+                               default_timeout: float = 15.0, backups: Sequence[str] = ()) -> List[AIResponse]:
+    """
+    استدعاء المزودين الأساسيين بالتوازي مع خروج مبكر عند اكتمال النصاب
+
+    يعود فور تحقق min_approvals موافقة أو عندما يصبح تحققها مستحيلاً،
+    ويلغي الطلبات المتبقية. النصاب لا يتجاوز عدد المزودين الأساسيين.
+
+    المزودون في backups احتياطيون: يُطلق أحدهم بدل مزود أساسي تجاوز زمن p95 الخاص به
+    دون رد، أو فشل، أو دائرته مفتوحة؛ وأول رد ناجح من الاثنين يُحتسب ويُلغى الآخر.
+
+    Args:
+        handlers: المزودون المفعلون {الاسم: المعالج}
+        signal_data: بيانات الإشارة المرسلة لكل مزود
+        min_approvals: عدد الموافقات المطلوب
+        timeouts: مهلة كل مزود بالثواني
+        default_timeout: المهلة الافتراضية لمن لا يملك مهلة خاصة
+        backups: أسماء المزودين الاحتياطيين بترتيب الأفضلية
+    """
+    if not handlers:
+        return []
+
+    timeouts = timeouts or {}
+    registry = BaseAIHandler.provider_health
+    spare = [name for name in backups if name in handlers]
+    primaries = [name for name in handlers if name not in spare]
+    if not primaries:
+        primaries, spare = spare, []
+    quorum = min(max(min_approvals, 0), len(primaries))
+
+    loop = asyncio.get_running_loop()
+    pending = set()
+    slots: Dict[asyncio.Future, str] = {}  # طلب ← المزود الأساسي الذي يجيب عنه
+    hedge_at: Dict[str, float] = {}
+    cancelled = []
+
+    def launch(slot: str, name: str):
+        task = asyncio.ensure_future(
+            _call_handler(name, handlers[name], signal_data, timeouts.get(name, default_timeout))
+        )
+        slots[task] = slot
+        pending.add(task)
+
+    def hedge(slot: str) -> bool:
+        if not spare:
+            return False
+        registry.get(slot).hedged += 1
+        provider_hedges.inc(slot)
+        launch(slot, spare.pop(0))
+        return True
+
+    for name in primaries:
+        launch(name, name)
+        delay = registry.hedge_delay(name)
+        if delay is not None and delay < timeouts.get(name, default_timeout):
+            hedge_at[name] = loop.time() + delay
+
+    responses = []
+    approvals = 0
+    resolved = set()
+
+    try:
+        while pending:
+            wait = max(0.0, min(hedge_at.values()) - loop.time()) if spare and hedge_at else None
+            done, _ = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                pending.discard(task)
+                slot = slots.pop(task)
+                response = task.result()
+                if slot in resolved:
+                    continue
+                # الرد الفاشل لا يُحتسب ما دام هناك طلب آخر (أو احتياطي) يجيب عن المزود نفسه
+                if response.error and (slot in slots.values() or hedge(slot)):
+                    hedge_at.pop(slot, None)
+                    continue
+                resolved.add(slot)
+                hedge_at.pop(slot, None)
+                responses.append(response)
+                if response.approval:
+                    approvals += 1
+                for other in [other for other, other_slot in slots.items() if other_slot == slot]:
+                    del slots[other]
+                    pending.discard(other)
+                    other.cancel()
+                    cancelled.append(other)
+
+            now = loop.time()
+            for slot in [slot for slot, at in hedge_at.items() if at <= now]:
+                del hedge_at[slot]
+                hedge(slot)
+
+            # النصاب تحقق أو لم يعد ممكنًا حتى لو وافق جميع المتبقين
+            unresolved = len(primaries) - len(resolved)
+            if approvals >= quorum or approvals + unresolved < quorum:
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+        cancelled.extend(pending)
+        if cancelled:
+            await asyncio.gather(*cancelled, return_exceptions=True)
+
+    return responses
@@ -0,0 +1,68 @@
+import asyncio
+import importlib.util
+import threading
+import weakref
+from typing import Any, Dict, Optional
+import httpx
+
+
+class HTTPClientPool:
+    """
+    مجمع عملاء HTTP مشترك على مستوى العملية
+
+    يحتفظ بعميل httpx.AsyncClient واحد لكل حلقة أحداث (لأن اتصالات العميل مرتبطة
+    بالحلقة التي أنشأته)، مع اتصالات دائمة لكل مضيف ودعم HTTP/2 عند توفر حزمة h2.
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 60.0, http2: bool = True, timeout: float = 15.0):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        # HTTP/2 يتطلب حزمة h2 (httpx[http2])؛ بدونها نعود إلى HTTP/1.1 مع keep-alive
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self.timeout = timeout
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "HTTPClientPool":
+        """إنشاء المجمع من قسم http_pool في التكوين"""
+        return cls(
+            max_connections=config.get("max_connections", 100),
+            max_keepalive_connections=config.get("max_keepalive_connections", 20),
+            keepalive_expiry=config.get("keepalive_expiry", 60.0),
+            http2=config.get("http2", True),
+            timeout=config.get("timeout", 15.0)
+        )
+
+    def get_client(self) -> httpx.AsyncClient:
+        """العميل المشترك لحلقة الأحداث الحالية (يُنشأ عند أول استخدام)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(limits=self.limits, http2=self.http2, timeout=self.timeout)
+                self._clients[loop] = client
+            return client
+
+    async def aclose(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """إغلاق عميل حلقة محددة (الحالية افتراضيًا)"""
+        loop = loop or asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """إحصائيات المجمع"""
+        with self._lock:
+            open_clients = sum(1 for client in self._clients.values() if not client.is_closed)
+        return {
+            "clients": open_clients,
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections
+        }
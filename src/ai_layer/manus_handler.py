@@ -32,8 +32,8 @@ class ManusHandler(BaseAIHandler):
                 "temperature": 0.3
             }
 
-            async with httpx.AsyncClient(timeout=15) as client:
-                response = await client.post(self.api_url, headers=headers, json=payload)
+            client = self.get_http_client()
+            response = await client.post(self.api_url, headers=headers, json=payload, timeout=15)
 
             if response.status_code == 200:
                 result = response.json()
@@ -51,13 +51,18 @@ class ManusHandler(BaseAIHandler):
                     provider="manus",
                     approval=False,
                     confidence=0.0,
-                    reasoning=f"فشل الاتصال بـ Manus: {response.status_code} - {response.text}"
+                    reasoning=f"فشل الاتصال بـ Manus: {response.status_code} - {response.text}",
+                    error=True
                 )
 
+        except httpx.TimeoutException as e:
+            return self.timeout_response(e)
+
         except Exception as e:
             return AIResponse(
                 provider="manus",
                 approval=False,
                 confidence=0.0,
-                reasoning=f"استثناء أثناء تحليل الإشارة: {str(e)}"
+                reasoning=f"استثناء أثناء تحليل الإشارة: {str(e)}",
+                error=True
             )
@@ -0,0 +1,66 @@
+from collections import defaultdict
+from typing import Any, Dict, List
+
+# رموز الإشارات في الجدول المختصر
+SIGNAL_SYMBOLS = {"bullish": "+", "bearish": "-", "neutral": "0"}
+
+# المقدمة الثابتة تُبنى مرة واحدة عند الاستيراد وتتصدر كل نص مختصر،
+# فتبقى متطابقة بايتًا ببايت بين الطلبات (تستفيد منها ذاكرة البادئات لدى المزودين)
+COMPACT_PROMPT_PREFIX = """قيّم توصية التداول التالية اعتمادًا على جدول التحليل الفني.
+رموز الإشارات: + صاعد، - هابط، 0 محايد، . غير متوفر. كل صف إطار زمني: الاتجاه الكلي والنقاط وإشارة كل مؤشر، ثم النماذج المكتشفة (الاسم:الإشارة:الثقة).
+أجب بـ JSON فقط: {"approval": true/false, "confidence": 0-100, "reasoning": "سبب مختصر"}
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    تقدير تقريبي لعدد الرموز (tokens) بدون محلل المزود
+
+    الحروف اللاتينية والأرقام نحو 4 أحرف للرمز، والحروف العربية نحو حرفين للرمز.
+    عدد الحروف غير اللاتينية يُستنتج من طول ترميز UTF-8 (بايتان للحرف العربي).
+    """
+    non_ascii = len(text.encode("utf-8")) - len(text)
+    return max(1, round((len(text) - non_ascii) / 4 + non_ascii / 2))
+
+
+def build_compact_prompt(signal_data: Dict[str, Any]) -> str:
+    """
+    نص مختصر: المقدمة الثابتة ثم سطر الإشارة وجدول واحد لكل الأطر
+
+    أسماء المؤشرات تُكتب مرة واحدة في رأس الجدول بدل تكرارها لكل إطار،
+    والقيم الرقمية تُحذف لأن الحكم يعتمد على الإشارات.
+    """
+    indicators: Dict[str, Dict[str, str]] = defaultdict(dict)
+    names: List[str] = []
+    for indicator in signal_data.get('technical_indicators', []):
+        if indicator['name'] not in names:
+            names.append(indicator['name'])
+        indicators[indicator.get('timeframe', '')][indicator['name']] = indicator['signal']
+
+    patterns: Dict[str, List[str]] = defaultdict(list)
+    for pattern in signal_data.get('candle_patterns', []):
+        if pattern.get('detected', True):
+            patterns[pattern.get('timeframe', '')].append(
+                f"{pattern['name']}:{SIGNAL_SYMBOLS.get(pattern['signal'], '0')}:{pattern['confidence']:g}"
+            )
+
+    timeframes = [analysis['timeframe'] for analysis in signal_data.get('timeframe_analyses', [])]
+    timeframes += [timeframe for timeframe in list(indicators) + list(patterns) if timeframe not in timeframes]
+    overall = {analysis['timeframe']: analysis for analysis in signal_data.get('timeframe_analyses', [])}
+
+    lines = [
+        f"{signal_data.get('asset', '?')} {signal_data.get('recommendation', '?')} "
+        f"{signal_data.get('technical_confidence', 0):.1f}%",
+        "|".join(["tf", "trend", "score", *names, "patterns"])
+    ]
+    for timeframe in timeframes:
+        analysis = overall.get(timeframe, {})
+        lines.append("|".join([
+            timeframe or "?",
+            SIGNAL_SYMBOLS.get(analysis.get('signal'), "0"),
+            f"{analysis.get('score', 0):g}",
+            *(SIGNAL_SYMBOLS.get(indicators[timeframe].get(name), ".") for name in names),
+            ",".join(patterns[timeframe]) or "."
+        ]))
+
+    return COMPACT_PROMPT_PREFIX + "\n".join(lines)
@@ -0,0 +1,180 @@
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+# حالات قاطع الدائرة
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class LatencyTracker:
+    """زمن استجابة مزود: متوسط أسي (EWMA) ونافذة آخر العينات للمئينات"""
+
+    def __init__(self, window: int = 200, alpha: float = 0.2):
+        self.alpha = alpha
+        self.ewma: Optional[float] = None
+        self._samples = deque(maxlen=window)
+        self._sorted = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self.ewma = seconds if self.ewma is None else self.alpha * seconds + (1 - self.alpha) * self.ewma
+            self._samples.append(seconds)
+            self._sorted = None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """المئين q من النافذة (None بدون عينات)"""
+        with self._lock:
+            if not self._samples:
+                return None
+            if self._sorted is None:
+                self._sorted = sorted(self._samples)
+            values = self._sorted
+        return values[min(len(values) - 1, max(0, math.ceil(q * len(values)) - 1))]
+
+    def p95(self) -> Optional[float]:
+        return self.quantile(0.95)
+
+
+class CircuitBreaker:
+    """
+    قاطع دائرة لمزود واحد
+
+    يُفتح بعد failure_threshold فشل أو تجاوز مهلة متتالية، فيُتخطى المزود دون أي طلب.
+    بعد reset_timeout ثانية ينتقل إلى نصف مفتوح ويسمح بعدد محدود من طلبات الاختبار:
+    نجاحها يغلق الدائرة وفشلها يعيد فتحها.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, half_open_probes: int = 1,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = max(1, half_open_probes)
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """هل يُسمح بطلب الآن (يحجز مكان اختبار في الحالة نصف المفتوحة)"""
+        with self._lock:
+            if self.state == OPEN:
+                if self.clock() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = HALF_OPEN
+                self._probes = 0
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    return False
+                self._probes += 1
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probes = 0
+            self.state = CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                self.state = OPEN
+                self.opened_at = self.clock()
+                self._probes = 0
+
+    def release(self):
+        """تحرير مكان اختبار لطلب أُلغي قبل نتيجته"""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+
+class ProviderHealth:
+    """حالة مزود واحد: القاطع والزمن وعدادات التخطي والطلبات الاحتياطية"""
+
+    def __init__(self, breaker: CircuitBreaker, latency: LatencyTracker):
+        self.breaker = breaker
+        self.latency = latency
+        self.skipped = 0
+        self.hedged = 0
+
+    def hedge_delay(self, min_samples: int, min_delay: float) -> Optional[float]:
+        """مدة الانتظار قبل إطلاق مزود احتياطي (None قبل جمع عينات كافية)"""
+        if len(self.latency) < min_samples:
+            return None
+        return max(min_delay, self.latency.p95())
+
+    def stats(self) -> Dict[str, Any]:
+        p95 = self.latency.p95()
+        return {
+            "state": self.breaker.state,
+            "open": int(self.breaker.state == OPEN),
+            "consecutive_failures": self.breaker.failures,
+            "times_opened": self.breaker.times_opened,
+            "skipped": self.skipped,
+            "hedged": self.hedged,
+            "samples": len(self.latency),
+            "ewma_ms": round(self.latency.ewma * 1000, 1) if self.latency.ewma is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None
+        }
+
+
+class ProviderHealthRegistry:
+    """سجل حالة المزودين على مستوى العملية (يُنشأ سجل المزود عند أول استخدام)"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, half_open_probes: int = 1,
+                 latency_window: int = 200, ewma_alpha: float = 0.2, hedge_min_samples: int = 20,
+                 hedge_min_delay: float = 0.05):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.latency_window = latency_window
+        self.ewma_alpha = ewma_alpha
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self._providers: Dict[str, ProviderHealth] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ProviderHealthRegistry":
+        """إنشاء السجل من قسم ai_resilience في التكوين"""
+        return cls(
+            failure_threshold=config.get('failure_threshold', 5),
+            reset_timeout=config.get('reset_timeout', 30.0),
+            half_open_probes=config.get('half_open_probes', 1),
+            latency_window=config.get('latency_window', 200),
+            ewma_alpha=config.get('ewma_alpha', 0.2),
+            hedge_min_samples=config.get('hedge_min_samples', 20),
+            hedge_min_delay=config.get('hedge_min_delay', 0.05)
+        )
+
+    def get(self, provider: str) -> ProviderHealth:
+        health = self._providers.get(provider)
+        if health is None:
+            with self._lock:
+                health = self._providers.get(provider)
+                if health is None:
+                    health = self._providers[provider] = ProviderHealth(
+                        CircuitBreaker(self.failure_threshold, self.reset_timeout, self.half_open_probes),
+                        LatencyTracker(self.latency_window, self.ewma_alpha)
+                    )
+        return health
+
+    def hedge_delay(self, provider: str) -> Optional[float]:
+        return self.get(provider).hedge_delay(self.hedge_min_samples, self.hedge_min_delay)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {provider: health.stats() for provider, health in list(self._providers.items())}
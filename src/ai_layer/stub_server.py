@@ -0,0 +1,104 @@
+"""
+خادم محلي بديل لمزودي الذكاء الاصطناعي (متوافق مع واجهة chat/completions)
+
+يُستخدم للاختبار دون اتصال ولقياس أثر مجمع الاتصالات المشترك:
+
+    python -m src.ai_layer.stub_server --compare 200
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+import httpx
+
+
+class _CompletionHandler(BaseHTTPRequestHandler):
+    """يرد على أي POST باستجابة chat/completions ثابتة مع keep-alive"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    response_delay = 0.0
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        if self.response_delay:
+            time.sleep(self.response_delay)
+
+        content = json.dumps({"approval": True, "confidence": 75, "reasoning": "استجابة الخادم المحلي"}, ensure_ascii=False)
+        body = json.dumps({"choices": [{"message": {"role": "assistant", "content": content}}]}).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, response_delay: float = 0.0) -> Tuple[ThreadingHTTPServer, str]:
+    """تشغيل الخادم في خيط خلفي وإرجاع (الخادم، عنوان chat/completions)"""
+    handler = type("StubCompletionHandler", (_CompletionHandler,), {"response_delay": response_delay})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1/chat/completions"
+
+
+async def compare_latency(url: str, calls: int) -> dict:
+    """مقارنة متوسط زمن الطلب: عميل جديد لكل طلب مقابل العميل المشترك"""
+    from src.ai_layer.base import BaseAIHandler
+
+    payload = {"model": "stub", "messages": [{"role": "user", "content": "ping"}]}
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        async with httpx.AsyncClient(timeout=15) as client:
+            await client.post(url, json=payload)
+    fresh = (time.perf_counter() - start) / calls
+
+    client = BaseAIHandler.http_pool.get_client()
+    await client.post(url, json=payload)  # تسخين الاتصال الأول
+    start = time.perf_counter()
+    for _ in range(calls):
+        await client.post(url, json=payload)
+    pooled = (time.perf_counter() - start) / calls
+    await BaseAIHandler.http_pool.aclose()
+
+    return {
+        "calls": calls,
+        "fresh_client_ms": round(fresh * 1000, 3),
+        "pooled_client_ms": round(pooled * 1000, 3),
+        "speedup": round(fresh / pooled, 2) if pooled else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="خادم محلي بديل لمزودي الذكاء الاصطناعي")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="تأخير مصطنع لكل استجابة بالثواني")
+    parser.add_argument("--compare", type=int, metavar="CALLS", help="قياس زمن الطلب مع وبدون المجمع ثم الخروج")
+    args = parser.parse_args()
+
+    if args.compare:
+        server, url = start_stub_server(args.host, 0, args.delay)
+        print(json.dumps(asyncio.run(compare_latency(url, args.compare)), indent=2))
+        server.shutdown()
+        return
+
+    server, url = start_stub_server(args.host, args.port, args.delay)
+    print(f"الخادم المحلي يعمل على {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
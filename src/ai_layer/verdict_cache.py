@@ -0,0 +1,151 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from src.models.schemas import AIResponse
+from src.api.pocket_option import timeframe_to_seconds
+
+
+def signal_fingerprint(signal_data: Dict[str, Any], confidence_bucket: float = 5.0) -> str:
+    """
+    بصمة قانونية للإشارة تتجاهل الفروقات التي لا تغير الحكم
+
+    تتكون من الأصل والتوصية والثقة الفنية مقربة إلى دلو، وإشارات النماذج
+    والمؤشرات (بدون القيم الرقمية)، مرتبة لتكون مستقلة عن ترتيب الإدخال.
+    """
+    confidence = float(signal_data.get('technical_confidence', 0) or 0)
+    canonical = {
+        'asset': signal_data.get('asset'),
+        'recommendation': signal_data.get('recommendation'),
+        'confidence_bucket': int(confidence // confidence_bucket) if confidence_bucket else confidence,
+        'patterns': sorted(
+            [pattern.get('timeframe', ''), pattern['name'], pattern['signal']]
+            for pattern in signal_data.get('candle_patterns', [])
+            if pattern.get('detected', True)
+        ),
+        'indicators': sorted(
+            [indicator.get('timeframe', ''), indicator['name'], indicator['signal']]
+            for indicator in signal_data.get('technical_indicators', [])
+        )
+    }
+    encoded = json.dumps(canonical, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+def signal_base_timeframe(signal_data: Dict[str, Any], default: str = '1m') -> str:
+    """أصغر إطار زمني في الإشارة (يحدد مدة صلاحية الحكم المخزن)"""
+    timeframes = [analysis.get('timeframe') for analysis in signal_data.get('timeframe_analyses', [])]
+    timeframes = [timeframe for timeframe in timeframes if timeframe]
+    if not timeframes:
+        return default
+    return min(timeframes, key=timeframe_to_seconds)
+
+
+class AIVerdictCache:
+    """
+    ذاكرة مؤقتة لأحكام مزودي الذكاء الاصطناعي مع انتهاء صلاحية وإخلاء LRU
+
+    المفتاح (المزود، بصمة الإشارة)، ومدة الصلاحية عدد من شموع الإطار الأساسي
+    يحددها كل مزود. عند تجاوز حد الذاكرة التقريبي أو عدد العناصر يُخلى الأقدم استخدامًا.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 8 * 1024 * 1024,
+                 confidence_bucket: float = 5.0, default_ttl_bars: float = 1.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.confidence_bucket = confidence_bucket
+        self.default_ttl_bars = default_ttl_bars
+
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, int, AIResponse]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "AIVerdictCache":
+        """إنشاء الذاكرة من قسم ai_cache في التكوين"""
+        return cls(
+            max_entries=config.get('max_entries', 10000),
+            max_bytes=config.get('max_bytes', 8 * 1024 * 1024),
+            confidence_bucket=config.get('confidence_bucket', 5.0),
+            default_ttl_bars=config.get('default_ttl_bars', 1.0)
+        )
+
+    def key_for(self, provider: str, signal_data: Dict[str, Any]) -> Tuple[str, str]:
+        """مفتاح التخزين لمزود وإشارة"""
+        return provider, signal_fingerprint(signal_data, self.confidence_bucket)
+
+    def ttl_for(self, signal_data: Dict[str, Any], ttl_bars: Optional[float] = None) -> float:
+        """مدة الصلاحية بالثواني: عدد شموع المزود × مدة الإطار الأساسي للإشارة"""
+        bars = self.default_ttl_bars if ttl_bars is None else ttl_bars
+        return bars * timeframe_to_seconds(signal_base_timeframe(signal_data))
+
+    def get(self, key: Tuple[str, str]) -> Optional[AIResponse]:
+        """قراءة حكم مخزن صالح (None عند عدم الوجود أو انتهاء الصلاحية)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, size, response = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, key: Tuple[str, str], response: AIResponse, ttl: float):
+        """تخزين حكم مع إخلاء الأقدم استخدامًا عند تجاوز الحدود"""
+        if ttl <= 0:
+            return
+
+        size = self._estimate_size(key, response)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+
+            self._entries[key] = (time.monotonic() + ttl, size, response)
+            self._bytes += size
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """مسح جميع الأحكام المخزنة"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """عدادات الإصابة والإخفاق وحجم الذاكرة"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'expirations': self.expirations,
+                'evictions': self.evictions
+            }
+
+    @staticmethod
+    def _estimate_size(key: Tuple[str, str], response: AIResponse) -> int:
+        """تقدير تقريبي لحجم العنصر بالبايت"""
+        return 256 + len(key[0]) + len(key[1]) + len(response.provider) + len(response.reasoning.encode('utf-8'))
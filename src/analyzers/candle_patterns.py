@@ -1,5 +1,8 @@
-from typing import List, Optional
-from src.models.schemas import CandleData, CandlePattern
+import numpy as np
+from typing import Dict, List, Optional, Union
+from src.models.schemas import CandleData
+from src.models.results import PatternResult
+from src.models.candle_frame import CandleFrame, CandleRow
 
 class CandlePatternAnalyzer:
     """محلل نماذج الشموع"""
@@ -13,16 +16,17 @@ class CandlePatternAnalyzer:
             "spinning_top": {"weight": 4, "description": "نموذج القمة الدوارة"}
         }
     
-    def analyze_patterns(self, candles: List[CandleData]) -> List[CandlePattern]:
+    def analyze_patterns(self, candles: Union[CandleFrame, List[CandleData]]) -> List[PatternResult]:
         """تحليل نماذج الشموع"""
         if len(candles) < 2:
             return []
             
+        frame = CandleFrame.coerce(candles)
         patterns = []
         
         # تحليل الشمعة الأخيرة والسابقة
-        current = candles[-1]
-        previous = candles[-2] if len(candles) > 1 else None
+        current = frame.row(-1)
+        previous = frame.row(-2)
         
         # فحص نموذج المطرقة
         hammer_pattern = self._detect_hammer(current)
@@ -45,9 +49,65 @@ class CandlePatternAnalyzer:
         if shooting_star_pattern:
             patterns.append(shooting_star_pattern)
             
+        # فحص نموذج القمة الدوارة
+        spinning_top_pattern = self._detect_spinning_top(current)
+        if spinning_top_pattern:
+            patterns.append(spinning_top_pattern)
+            
         return patterns
+
+    def scan(self, candles: Union[CandleFrame, List[CandleData]], as_indices: bool = False) -> Dict[str, np.ndarray]:
+        """
+        مسح التاريخ الكامل لجميع النماذج دفعة واحدة
+
+        Args:
+            candles: إطار الشموع (أو قائمة شموع)
+            as_indices: إرجاع مواقع الشموع المطابقة بدل الأقنعة المنطقية
+
+        Returns:
+            قاموس {اسم النموذج: قناع منطقي بطول الإطار}؛ الابتلاع مقسوم إلى
+            engulfing_bullish و engulfing_bearish حسب الاتجاه
+        """
+        frame = CandleFrame.coerce(candles)
+        opens, highs, lows, closes = frame.open, frame.high, frame.low, frame.close
+
+        body_size = np.abs(closes - opens)
+        total_range = highs - lows
+        lower_shadow = np.minimum(opens, closes) - lows
+        upper_shadow = highs - np.maximum(opens, closes)
+
+        # النسب إلى المدى الكلي (صفر حيث المدى معدوم، والقناع has_range يستبعدها)
+        has_range = total_range > 0
+        safe_range = np.where(has_range, total_range, 1.0)
+        body_ratio = body_size / safe_range
+        lower_ratio = lower_shadow / safe_range
+        upper_ratio = upper_shadow / safe_range
+
+        bullish = closes > opens
+        prev_bullish = np.zeros_like(bullish)
+        prev_bullish[1:] = bullish[:-1]
+        has_prev = np.zeros_like(bullish)
+        has_prev[1:] = True
+        prev_open = np.empty_like(opens)
+        prev_close = np.empty_like(closes)
+        prev_open[1:], prev_close[1:] = opens[:-1], closes[:-1]
+        prev_open[:1] = prev_close[:1] = np.nan
+
+        masks = {
+            "hammer": has_range & (body_ratio < 0.3) & (lower_ratio > 0.6) & (upper_ratio < 0.1),
+            "doji": has_range & (body_ratio < 0.1),
+            "engulfing_bullish": has_prev & ~prev_bullish & bullish & (opens < prev_close) & (closes > prev_open),
+            "engulfing_bearish": has_prev & prev_bullish & ~bullish & (opens > prev_close) & (closes < prev_open),
+            "shooting_star": has_range & (body_ratio < 0.3) & (upper_ratio > 0.6) & (lower_ratio < 0.1),
+            "spinning_top": (has_range & (body_ratio >= 0.1) & (body_ratio < 0.3) &
+                             (upper_ratio > 0.25) & (lower_ratio > 0.25))
+        }
+
+        if as_indices:
+            return {name: np.flatnonzero(mask) for name, mask in masks.items()}
+        return masks
     
-    def _detect_hammer(self, candle: CandleData) -> Optional[CandlePattern]:
+    def _detect_hammer(self, candle: CandleRow) -> Optional[PatternResult]:
         """كشف نموذج المطرقة"""
         body_size = abs(candle.close - candle.open)
         total_range = candle.high - candle.low
@@ -59,7 +119,7 @@ class CandlePatternAnalyzer:
             lower_shadow / total_range > 0.6 and
             upper_shadow / total_range < 0.1):
             
-            return CandlePattern(
+            return PatternResult(
                 name="hammer",
                 detected=True,
                 signal="bullish",
@@ -68,13 +128,13 @@ class CandlePatternAnalyzer:
             )
         return None
     
-    def _detect_doji(self, candle: CandleData) -> Optional[CandlePattern]:
+    def _detect_doji(self, candle: CandleRow) -> Optional[PatternResult]:
         """كشف نموذج الدوجي"""
         body_size = abs(candle.close - candle.open)
         total_range = candle.high - candle.low
         
         if total_range > 0 and body_size / total_range < 0.1:
-            return CandlePattern(
+            return PatternResult(
                 name="doji",
                 detected=True,
                 signal="neutral",
@@ -83,7 +143,7 @@ class CandlePatternAnalyzer:
             )
         return None
     
-    def _detect_engulfing(self, prev_candle: CandleData, current_candle: CandleData) -> Optional[CandlePattern]:
+    def _detect_engulfing(self, prev_candle: CandleRow, current_candle: CandleRow) -> Optional[PatternResult]:
         """كشف نموذج الابتلاع"""
         prev_bullish = prev_candle.close > prev_candle.open
         current_bullish = current_candle.close > current_candle.open
@@ -92,7 +152,7 @@ class CandlePatternAnalyzer:
             current_candle.open < prev_candle.close and
             current_candle.close > prev_candle.open):
             
-            return CandlePattern(
+            return PatternResult(
                 name="engulfing",
                 detected=True,
                 signal="bullish",
@@ -103,7 +163,7 @@ class CandlePatternAnalyzer:
               current_candle.open > prev_candle.close and
               current_candle.close < prev_candle.open):
             
-            return CandlePattern(
+            return PatternResult(
                 name="engulfing",
                 detected=True,
                 signal="bearish",
@@ -112,7 +172,7 @@ class CandlePatternAnalyzer:
             )
         return None
     
-    def _detect_shooting_star(self, candle: CandleData) -> Optional[CandlePattern]:
+    def _detect_shooting_star(self, candle: CandleRow) -> Optional[PatternResult]:
         """كشف نموذج النجم الساقط"""
         body_size = abs(candle.close - candle.open)
         total_range = candle.high - candle.low
@@ -124,7 +184,7 @@ class CandlePatternAnalyzer:
             upper_shadow / total_range > 0.6 and
             lower_shadow / total_range < 0.1):
             
-            return CandlePattern(
+            return PatternResult(
                 name="shooting_star",
                 detected=True,
                 signal="bearish",
@@ -132,3 +192,24 @@ class CandlePatternAnalyzer:
                 confidence=0.8
             )
         return None
+
+    def _detect_spinning_top(self, candle: CandleRow) -> Optional[PatternResult]:
+        """كشف نموذج القمة الدوارة (جسم صغير مع ظلين علوي وسفلي واضحين)"""
+        body_size = abs(candle.close - candle.open)
+        total_range = candle.high - candle.low
+        lower_shadow = min(candle.open, candle.close) - candle.low
+        upper_shadow = candle.high - max(candle.open, candle.close)
+        
+        if (total_range > 0 and 
+            0.1 <= body_size / total_range < 0.3 and
+            upper_shadow / total_range > 0.25 and
+            lower_shadow / total_range > 0.25):
+            
+            return PatternResult(
+                name="spinning_top",
+                detected=True,
+                signal="neutral",
+                weight=self.patterns["spinning_top"]["weight"],
+                confidence=0.6
+            )
+        return None
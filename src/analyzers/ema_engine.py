@@ -0,0 +1,114 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Iterable, Sequence, Tuple
+
+
+class EMAEngine:
+    """محرك المتوسطات المتحركة الأسية المتجهة لعدة فترات دفعة واحدة"""
+
+    def __init__(self, block_size: int = 128, max_cached: int = 16):
+        # حجم الكتلة الزمنية: كل كتلة تُحسب بضرب مصفوفات واحد بدل حلقة بايثون
+        self.block_size = block_size
+        # ذاكرة LRU محدودة لمصفوفات الاضمحلال لكل مجموعة معاملات
+        self.max_cached = max(1, max_cached)
+        self._decay_cache: "OrderedDict[Tuple[float, ...], Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        # المحرك مشترك بين خيوط الطلبات: القفل يحرس عمليات LRU فقط لا الحساب
+        self._cache_lock = threading.Lock()
+
+    @staticmethod
+    def period_alpha(period: int) -> float:
+        """معامل التنعيم القياسي لفترة EMA"""
+        return 2 / (period + 1)
+
+    def compute(self, values: np.ndarray, periods: Sequence[int]) -> np.ndarray:
+        """
+        حساب EMA لجميع الفترات المطلوبة في تمريرة واحدة
+
+        Args:
+            values: سلسلة الأسعار (أحادية البعد)
+            periods: الفترات المطلوبة (مثل 12, 26, 20, 50)
+
+        Returns:
+            مصفوفة (عدد الفترات × الزمن) مطابقة لـ ema[0] = values[0]
+        """
+        alphas = np.array([self.period_alpha(p) for p in periods], dtype=np.float64)
+        return self.smooth(values, alphas)
+
+    def compute_map(self, values: np.ndarray, periods: Iterable[int]) -> Dict[int, np.ndarray]:
+        """حساب EMA لعدة فترات وإرجاعها كقاموس {الفترة: السلسلة}"""
+        periods = sorted(set(periods))
+        emas = self.compute(values, periods)
+        return {period: emas[i] for i, period in enumerate(periods)}
+
+    def smooth(self, values: np.ndarray, alphas: np.ndarray, initial: np.ndarray = None) -> np.ndarray:
+        """
+        تطبيق التنعيم الأسي s[t] = a*x[t] + (1-a)*s[t-1] لعدة معاملات معًا
+
+        Args:
+            values: سلسلة أحادية البعد أو مصفوفة (عدد المعاملات × الزمن)
+            alphas: معاملات التنعيم لكل صف
+            initial: القيمة السابقة للعنصر الأول لكل صف (الافتراضي: العنصر الأول نفسه)
+        """
+        alphas = np.asarray(alphas, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 1:
+            values = np.broadcast_to(values, (len(alphas), values.shape[0]))
+
+        rows, length = values.shape
+        out = np.empty((rows, length), dtype=np.float64)
+        if length == 0:
+            return out
+
+        carry = values[:, 0].copy() if initial is None else np.asarray(initial, dtype=np.float64).copy()
+        weights, carry_decay = self._decay_matrices(alphas)
+
+        for start in range(0, length, self.block_size):
+            stop = min(start + self.block_size, length)
+            size = stop - start
+            # ضرب مصفوفات دفعي (صفوف × كتلة × كتلة) @ (صفوف × كتلة) لكل الفترات معًا
+            # (مصفوفة واحدة تُبث على كل الصفوف عندما تتساوى المعاملات)
+            block = np.matmul(weights[:, :size, :size], values[:, start:stop, None])[:, :, 0]
+            block += carry_decay[:, :size] * carry[:, None]
+            out[:, start:stop] = block
+            carry = block[:, -1]
+
+        return out
+
+    def _decay_matrices(self, alphas: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        مصفوفات الاضمحلال المثلثية لكتلة كاملة (الكتل الأقصر تستخدم الركن العلوي منها)
+
+        المعاملات المتساوية (مثل صفوف مصفوفة الوحدة في نوى الاختبار الرجعي) تشترك
+        في مصفوفة واحدة بدل نسخة لكل صف.
+        """
+        if len(alphas) > 1 and np.all(alphas == alphas[0]):
+            alphas = alphas[:1]
+        key = tuple(alphas.tolist())
+        with self._cache_lock:
+            cached = self._decay_cache.get(key)
+            if cached is not None:
+                self._decay_cache.move_to_end(key)
+                return cached
+
+        decay = 1 - alphas[:, None]
+        steps = np.arange(self.block_size)
+        lags = steps[:, None] - steps[None, :]
+        # weights[r, i, j] = a * (1-a)^(i-j) لكل j <= i
+        weights = np.where(
+            lags[None, :, :] >= 0,
+            alphas[:, None, None] * decay[:, :, None] ** np.maximum(lags, 0)[None, :, :],
+            0.0
+        )
+        carry_decay = decay ** (steps[None, :] + 1)
+
+        with self._cache_lock:
+            self._decay_cache[key] = (weights, carry_decay)
+            self._decay_cache.move_to_end(key)
+            if len(self._decay_cache) > self.max_cached:
+                self._decay_cache.popitem(last=False)
+        return weights, carry_decay
+
+
+# مثيل مشترك للاستخدام من قبل المحللات
+ema_engine = EMAEngine()
@@ -0,0 +1,307 @@
+import math
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple, Union
+from src.models.schemas import CandleData
+from src.models.results import IndicatorResult
+from src.models.candle_frame import CandleFrame, CandleRow
+from src.analyzers.ema_engine import EMAEngine
+from src.analyzers.indicator_calculator import TechnicalIndicatorCalculator
+
+
+class _RollingExtreme:
+    """أعلى/أدنى قيمة في نافذة متحركة عبر طابور رتيب (O(1) مُطفأ لكل تحديث)"""
+
+    def __init__(self, period: int, maximum: bool):
+        self.period = period
+        self.maximum = maximum
+        self._queue = deque()
+
+    def push(self, index: int, value: float):
+        queue = self._queue
+        if self.maximum:
+            while queue and queue[-1][1] <= value:
+                queue.pop()
+        else:
+            while queue and queue[-1][1] >= value:
+                queue.pop()
+        queue.append((index, value))
+        while queue[0][0] <= index - self.period:
+            queue.popleft()
+
+    @property
+    def value(self) -> float:
+        return self._queue[0][1]
+
+
+class IncrementalIndicatorState:
+    """
+    حالة مؤشرات تراكمية لتدفق شموع واحد (أصل + إطار زمني)
+
+    كل استدعاء لـ update يكلف عددًا ثابتًا من العمليات بغض النظر عن طول التاريخ،
+    والنتائج مطابقة لـ TechnicalIndicatorCalculator عند تمرير نفس السلسلة كاملة.
+    """
+
+    def __init__(self, asset: str = None, timeframe: str = None, indicators: Dict[str, Dict[str, Any]] = None,
+                 rsi_period: int = 14, bb_period: int = 20, k_period: int = 14):
+        self.asset = asset
+        self.timeframe = timeframe
+        self.indicators = indicators or TechnicalIndicatorCalculator().indicators
+        self.rsi_period = rsi_period
+        self.bb_period = bb_period
+        self.k_period = k_period
+
+        self.count = 0
+        self.last_close: Optional[float] = None
+        self.last_timestamp = None
+
+        # المتوسطات الأسية الجارية (12, 26 لـ MACD و 20, 50 للتقاطع) وخط الإشارة 9
+        self._ema_alphas = {period: EMAEngine.period_alpha(period) for period in (12, 26, 20, 50)}
+        self._emas: Dict[int, float] = {}
+        self._macd_signal_alpha = EMAEngine.period_alpha(9)
+        self._macd_signal: Optional[float] = None
+        self._prev_ema_diff: Optional[float] = None
+
+        # مجاميع المكاسب والخسائر لآخر rsi_period فروقات
+        self._gains = deque()
+        self._losses = deque()
+        self._gain_sum = 0.0
+        self._loss_sum = 0.0
+        self._nonzero_losses = 0
+
+        # مجاميع متحركة (مُزاحة بقيمة مرجعية لتقليل فقدان الدقة) لنطاقات بولينجر
+        self._window = deque()
+        self._shift: Optional[float] = None
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+        self._highest = _RollingExtreme(k_period, maximum=True)
+        self._lowest = _RollingExtreme(k_period, maximum=False)
+
+    def update(self, candle: Union[CandleData, CandleRow]) -> List[IndicatorResult]:
+        """إضافة شمعة مغلقة جديدة وإرجاع المؤشرات المحدثة"""
+        close = float(candle.close)
+        index = self.count
+
+        self._update_emas(close)
+        self._update_rsi(close)
+        self._update_bollinger(close)
+        self._highest.push(index, float(candle.high))
+        self._lowest.push(index, float(candle.low))
+
+        self.count += 1
+        self.last_close = close
+        self.last_timestamp = candle.timestamp
+
+        indicators = self.current_indicators()
+        # تحديث الفرق السابق بعد حساب الإشارة لأن تقاطع المتوسطات يقارن مع الشمعة السابقة
+        self._prev_ema_diff = self._emas[20] - self._emas[50]
+        return indicators
+
+    def update_frame(self, frame: Union[CandleFrame, List[CandleData]]) -> List[IndicatorResult]:
+        """تغذية عدة شموع دفعة واحدة (مثلاً لتهيئة الحالة من التاريخ)"""
+        indicators = self.current_indicators()
+        rows = frame.rows() if isinstance(frame, CandleFrame) else frame
+        for row in rows:
+            indicators = self.update(row)
+        return indicators
+
+    def current_indicators(self) -> List[IndicatorResult]:
+        """المؤشرات الحالية بنفس ترتيب وشروط TechnicalIndicatorCalculator"""
+        if self.count < 20:
+            return []
+
+        indicators = []
+        for indicator in (self._rsi(), self._macd(), self._bollinger_bands(), self._ema_cross(), self._stochastic()):
+            if indicator:
+                indicators.append(indicator)
+        return indicators
+
+    def _update_emas(self, close: float):
+        if not self._emas:
+            self._emas = {period: close for period in self._ema_alphas}
+            self._macd_signal = 0.0
+            return
+
+        for period, alpha in self._ema_alphas.items():
+            self._emas[period] = alpha * close + (1 - alpha) * self._emas[period]
+
+        macd_value = self._emas[12] - self._emas[26]
+        alpha = self._macd_signal_alpha
+        self._macd_signal = alpha * macd_value + (1 - alpha) * self._macd_signal
+
+    def _update_rsi(self, close: float):
+        if self.last_close is None:
+            return
+
+        delta = close - self.last_close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+
+        self._gains.append(gain)
+        self._losses.append(loss)
+        self._gain_sum += gain
+        self._loss_sum += loss
+        self._nonzero_losses += loss > 0
+
+        if len(self._gains) > self.rsi_period:
+            self._gain_sum -= self._gains.popleft()
+            old_loss = self._losses.popleft()
+            self._loss_sum -= old_loss
+            self._nonzero_losses -= old_loss > 0
+
+    def _update_bollinger(self, close: float):
+        if self._shift is None:
+            self._shift = close
+
+        shifted = close - self._shift
+        self._window.append(shifted)
+        self._sum += shifted
+        self._sum_sq += shifted * shifted
+
+        if len(self._window) > self.bb_period:
+            old = self._window.popleft()
+            self._sum -= old
+            self._sum_sq -= old * old
+
+    def _rsi(self) -> Optional[IndicatorResult]:
+        if self.count < self.rsi_period + 1:
+            return None
+
+        avg_gain = self._gain_sum / self.rsi_period
+        avg_loss = self._loss_sum / self.rsi_period
+
+        rsi = 100 if self._nonzero_losses == 0 else 100 - (100 / (1 + (avg_gain / avg_loss)))
+        signal = "bullish" if rsi < 30 else "bearish" if rsi > 70 else "neutral"
+
+        return IndicatorResult(
+            name="rsi",
+            value=float(round(rsi, 2)),
+            signal=signal,
+            weight=self.indicators["rsi"]["weight"]
+        )
+
+    def _macd(self) -> Optional[IndicatorResult]:
+        if self.count < 26:
+            return None
+
+        macd_line = self._emas[12] - self._emas[26]
+        signal_line = self._macd_signal
+
+        if macd_line > signal_line and macd_line > 0:
+            signal = "bullish"
+        elif macd_line < signal_line and macd_line < 0:
+            signal = "bearish"
+        else:
+            signal = "neutral"
+
+        return IndicatorResult(
+            name="macd",
+            value=float(round(macd_line, 5)),
+            signal=signal,
+            weight=self.indicators["macd"]["weight"]
+        )
+
+    def _bollinger_bands(self) -> Optional[IndicatorResult]:
+        if self.count < self.bb_period:
+            return None
+
+        period = self.bb_period
+        mean_shifted = self._sum / period
+        variance = max(self._sum_sq / period - mean_shifted * mean_shifted, 0.0)
+        sma = mean_shifted + self._shift
+        std = math.sqrt(variance)
+
+        upper_band = sma + 2 * std
+        lower_band = sma - 2 * std
+        current_price = self.last_close
+
+        if current_price > upper_band:
+            signal = "bearish"
+        elif current_price < lower_band:
+            signal = "bullish"
+        else:
+            signal = "neutral"
+
+        band_width = upper_band - lower_band
+        bb_position = (current_price - lower_band) / band_width if band_width else float("nan")
+
+        return IndicatorResult(
+            name="bollinger_bands",
+            value=float(round(bb_position, 3)),
+            signal=signal,
+            weight=self.indicators["bollinger_bands"]["weight"]
+        )
+
+    def _ema_cross(self) -> Optional[IndicatorResult]:
+        if self.count < 50:
+            return None
+
+        current_diff = self._emas[20] - self._emas[50]
+        prev_diff = self._prev_ema_diff
+
+        if current_diff > 0 and prev_diff <= 0:
+            signal = "bullish"
+        elif current_diff < 0 and prev_diff >= 0:
+            signal = "bearish"
+        elif current_diff > 0:
+            signal = "bullish"
+        elif current_diff < 0:
+            signal = "bearish"
+        else:
+            signal = "neutral"
+
+        return IndicatorResult(
+            name="ema_cross",
+            value=float(round(current_diff, 5)),
+            signal=signal,
+            weight=self.indicators["ema_cross"]["weight"]
+        )
+
+    def _stochastic(self) -> Optional[IndicatorResult]:
+        if self.count < self.k_period:
+            return None
+
+        highest_high = self._highest.value
+        lowest_low = self._lowest.value
+        current_close = self.last_close
+
+        k_percent = ((current_close - lowest_low) / (highest_high - lowest_low)) * 100 if highest_high != lowest_low else 50
+        signal = "bullish" if k_percent < 20 else "bearish" if k_percent > 80 else "neutral"
+
+        return IndicatorResult(
+            name="stochastic",
+            value=float(round(k_percent, 2)),
+            signal=signal,
+            weight=self.indicators["stochastic"]["weight"]
+        )
+
+
+class IncrementalIndicatorRegistry:
+    """سجل حالات المؤشرات التراكمية لكل (أصل، إطار زمني)"""
+
+    def __init__(self):
+        self._states: Dict[Tuple[str, str], IncrementalIndicatorState] = {}
+
+    def get(self, asset: str, timeframe: str) -> IncrementalIndicatorState:
+        """الحصول على حالة التدفق (تُنشأ عند أول طلب)"""
+        key = (asset, timeframe)
+        state = self._states.get(key)
+        if state is None:
+            state = IncrementalIndicatorState(asset, timeframe)
+            self._states[key] = state
+        return state
+
+    def update(self, asset: str, timeframe: str, candle: Union[CandleData, CandleRow]) -> List[IndicatorResult]:
+        """تحديث تدفق محدد بشمعة مغلقة جديدة"""
+        return self.get(asset, timeframe).update(candle)
+
+    def remove(self, asset: str, timeframe: str):
+        """حذف حالة تدفق لم يعد متابعًا"""
+        self._states.pop((asset, timeframe), None)
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+
+# سجل عام تُحدثه PocketOptionAPI مع كل شمعة مغلقة مدفوعة في التدفقات المشترك فيها
+incremental_indicators = IncrementalIndicatorRegistry()
@@ -1,6 +1,10 @@
 import numpy as np
-from typing import List
-from src.models.schemas import CandleData, TechnicalIndicator
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, List, Union
+from src.models.schemas import CandleData
+from src.models.results import IndicatorResult
+from src.models.candle_frame import CandleFrame
+from src.analyzers.ema_engine import ema_engine
 
 class TechnicalIndicatorCalculator:
     """حاسبة المؤشرات الفنية"""
@@ -13,22 +17,26 @@ class TechnicalIndicatorCalculator:
             "ema_cross": {"weight": 10, "description": "تقاطع المتوسطات المتحركة"},
             "stochastic": {"weight": 10, "description": "مؤشر ستوكاستيك"}
         }
+        # جميع فترات EMA المطلوبة (MACD + تقاطع المتوسطات) تُحسب معًا في تمريرة واحدة
+        self.ema_periods = (12, 26, 20, 50)
     
-    def calculate_all_indicators(self, candles: List[CandleData]) -> List[TechnicalIndicator]:
+    def calculate_all_indicators(self, candles: Union[CandleFrame, List[CandleData]]) -> List[IndicatorResult]:
         """حساب جميع المؤشرات الفنية"""
         if len(candles) < 20:
             return []
         
         indicators = []
-        prices = [candle.close for candle in candles]
-        highs = [candle.high for candle in candles]
-        lows = [candle.low for candle in candles]
+        frame = CandleFrame.coerce(candles)
+        prices = frame.close
+        highs = frame.high
+        lows = frame.low
+        emas = self._calculate_emas(prices)
         
         rsi_indicator = self._calculate_rsi(prices)
         if rsi_indicator:
             indicators.append(rsi_indicator)
 
-        macd_indicator = self._calculate_macd(prices)
+        macd_indicator = self._calculate_macd(prices, emas)
         if macd_indicator:
             indicators.append(macd_indicator)
 
@@ -36,7 +44,7 @@ class TechnicalIndicatorCalculator:
         if bb_indicator:
             indicators.append(bb_indicator)
 
-        ema_indicator = self._calculate_ema_cross(prices)
+        ema_indicator = self._calculate_ema_cross(prices, emas)
         if ema_indicator:
             indicators.append(ema_indicator)
 
@@ -46,7 +54,110 @@ class TechnicalIndicatorCalculator:
 
         return indicators
 
-    def _calculate_rsi(self, prices: List[float], period: int = 14) -> TechnicalIndicator:
+    def calculate_series(self, candles: Union[CandleFrame, List[CandleData]]) -> Dict[str, np.ndarray]:
+        """
+        حساب السلاسل الكاملة لجميع المؤشرات (للاختبار الرجعي والرسوم البيانية)
+
+        كل سلسلة بطول الإطار، والقيم قبل اكتمال فترة الإحماء تساوي NaN.
+        RSI هنا بتنعيم Wilder، بينما تطابق بقية السلاسل آخر قيمة من الحساب الفوري.
+        """
+        frame = CandleFrame.coerce(candles)
+        closes = frame.close
+        emas = self._calculate_emas(closes)
+
+        macd_line = emas[12] - emas[26]
+        macd_signal = self._calculate_ema(macd_line, 9)
+        macd_histogram = macd_line - macd_signal
+        ema_diff = emas[20] - emas[50]
+        bb_upper, bb_lower, bb_percent_b = self._bollinger_series(closes)
+        stoch_k, stoch_d = self._stochastic_series(frame.high, frame.low, closes)
+
+        # نفس حدود الحساب الفوري: MACD من الشمعة 26 وتقاطع المتوسطات من الشمعة 50
+        for values in (macd_line, macd_signal, macd_histogram):
+            values[:25] = np.nan
+        ema_diff[:49] = np.nan
+
+        return {
+            "rsi": self._rsi_series(closes),
+            "macd": macd_line,
+            "macd_signal": macd_signal,
+            "macd_histogram": macd_histogram,
+            "bollinger_upper": bb_upper,
+            "bollinger_lower": bb_lower,
+            "bollinger_percent_b": bb_percent_b,
+            "ema_diff": ema_diff,
+            "stochastic_k": stoch_k,
+            "stochastic_d": stoch_d
+        }
+
+    def _rsi_series(self, prices: np.ndarray, period: int = 14) -> np.ndarray:
+        """سلسلة RSI بتنعيم Wilder (بذرة = متوسط بسيط لأول period فروقات)"""
+        rsi = np.full(len(prices), np.nan)
+        if len(prices) < period + 1:
+            return rsi
+
+        deltas = np.diff(prices)
+        gains = np.where(deltas > 0, deltas, 0.0)
+        losses = np.where(deltas < 0, -deltas, 0.0)
+
+        # تنعيم Wilder هو EMA بمعامل 1/period يبدأ من المتوسط البسيط الأول
+        seeds = np.array([gains[:period].mean(), losses[:period].mean()])
+        averages = np.empty((2, len(deltas) - period + 1))
+        averages[:, 0] = seeds
+        averages[:, 1:] = ema_engine.smooth(
+            np.vstack([gains[period:], losses[period:]]),
+            np.full(2, 1 / period),
+            initial=seeds
+        )
+
+        avg_gain, avg_loss = averages
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = 100 - (100 / (1 + avg_gain / avg_loss))
+        rsi[period:] = np.where(avg_loss == 0, 100.0, values)
+        return rsi
+
+    def _bollinger_series(self, prices: np.ndarray, period: int = 20):
+        """سلاسل النطاق العلوي والسفلي و%B عبر نوافذ متحركة بدون نسخ"""
+        length = len(prices)
+        upper = np.full(length, np.nan)
+        lower = np.full(length, np.nan)
+        percent_b = np.full(length, np.nan)
+        if length < period:
+            return upper, lower, percent_b
+
+        windows = sliding_window_view(prices, period)
+        sma = windows.mean(axis=1)
+        std = windows.std(axis=1)
+
+        upper[period - 1:] = sma + 2 * std
+        lower[period - 1:] = sma - 2 * std
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percent_b[period - 1:] = (prices[period - 1:] - lower[period - 1:]) / (4 * std)
+        return upper, lower, percent_b
+
+    def _stochastic_series(self, highs: np.ndarray, lows: np.ndarray, closes: np.ndarray,
+                           k_period: int = 14, d_period: int = 3):
+        """سلاسل %K و%D (المتوسط البسيط لـ %K عبر المجاميع التراكمية)"""
+        length = len(closes)
+        k_percent = np.full(length, np.nan)
+        d_percent = np.full(length, np.nan)
+        if length < k_period:
+            return k_percent, d_percent
+
+        highest_high = sliding_window_view(highs, k_period).max(axis=1)
+        lowest_low = sliding_window_view(lows, k_period).min(axis=1)
+        price_range = highest_high - lowest_low
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = (closes[k_period - 1:] - lowest_low) / price_range * 100
+        k_percent[k_period - 1:] = np.where(price_range != 0, values, 50.0)
+
+        valid_k = k_percent[k_period - 1:]
+        if len(valid_k) >= d_period:
+            cumulative = np.concatenate(([0.0], np.cumsum(valid_k)))
+            d_percent[k_period + d_period - 2:] = (cumulative[d_period:] - cumulative[:-d_period]) / d_period
+        return k_percent, d_percent
+
+    def _calculate_rsi(self, prices: np.ndarray, period: int = 14) -> IndicatorResult:
         if len(prices) < period + 1:
             return None
         
@@ -60,20 +171,20 @@ class TechnicalIndicatorCalculator:
         rsi = 100 if avg_loss == 0 else 100 - (100 / (1 + (avg_gain / avg_loss)))
         signal = "bullish" if rsi < 30 else "bearish" if rsi > 70 else "neutral"
 
-        return TechnicalIndicator(
+        return IndicatorResult(
             name="rsi",
-            value=round(rsi, 2),
+            value=float(round(rsi, 2)),
             signal=signal,
             weight=self.indicators["rsi"]["weight"]
         )
 
-    def _calculate_macd(self, prices: List[float]) -> TechnicalIndicator:
+    def _calculate_macd(self, prices: np.ndarray, emas: Dict[int, np.ndarray] = None) -> IndicatorResult:
         if len(prices) < 26:
             return None
 
-        prices_array = np.array(prices)
-        ema_12 = self._calculate_ema(prices_array, 12)
-        ema_26 = self._calculate_ema(prices_array, 26)
+        emas = emas or self._calculate_emas(prices)
+        ema_12 = emas[12]
+        ema_26 = emas[26]
 
         macd_line = ema_12[-1] - ema_26[-1]
         macd_values = ema_12 - ema_26
@@ -86,18 +197,18 @@ class TechnicalIndicatorCalculator:
         else:
             signal = "neutral"
 
-        return TechnicalIndicator(
+        return IndicatorResult(
             name="macd",
-            value=round(macd_line, 5),
+            value=float(round(macd_line, 5)),
             signal=signal,
             weight=self.indicators["macd"]["weight"]
         )
 
-    def _calculate_bollinger_bands(self, prices: List[float], period: int = 20) -> TechnicalIndicator:
+    def _calculate_bollinger_bands(self, prices: np.ndarray, period: int = 20) -> IndicatorResult:
         if len(prices) < period:
             return None
 
-        prices_array = np.array(prices[-period:])
+        prices_array = prices[-period:]
         sma = np.mean(prices_array)
         std = np.std(prices_array)
 
@@ -114,20 +225,20 @@ class TechnicalIndicatorCalculator:
 
         bb_position = (current_price - lower_band) / (upper_band - lower_band)
 
-        return TechnicalIndicator(
+        return IndicatorResult(
             name="bollinger_bands",
-            value=round(bb_position, 3),
+            value=float(round(bb_position, 3)),
             signal=signal,
             weight=self.indicators["bollinger_bands"]["weight"]
         )
 
-    def _calculate_ema_cross(self, prices: List[float]) -> TechnicalIndicator:
+    def _calculate_ema_cross(self, prices: np.ndarray, emas: Dict[int, np.ndarray] = None) -> IndicatorResult:
         if len(prices) < 50:
             return None
 
-        prices_array = np.array(prices)
-        ema_20 = self._calculate_ema(prices_array, 20)
-        ema_50 = self._calculate_ema(prices_array, 50)
+        emas = emas or self._calculate_emas(prices)
+        ema_20 = emas[20]
+        ema_50 = emas[50]
 
         current_diff = ema_20[-1] - ema_50[-1]
         prev_diff = ema_20[-2] - ema_50[-2] if len(ema_20) > 1 else 0
@@ -143,14 +254,14 @@ class TechnicalIndicatorCalculator:
         else:
             signal = "neutral"
 
-        return TechnicalIndicator(
+        return IndicatorResult(
             name="ema_cross",
-            value=round(current_diff, 5),
+            value=float(round(current_diff, 5)),
             signal=signal,
             weight=self.indicators["ema_cross"]["weight"]
         )
 
-    def _calculate_stochastic(self, highs: List[float], lows: List[float], closes: List[float], k_period: int = 14) -> TechnicalIndicator:
+    def _calculate_stochastic(self, highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, k_period: int = 14) -> IndicatorResult:
         if len(closes) < k_period:
             return None
 
@@ -158,23 +269,22 @@ class TechnicalIndicatorCalculator:
         recent_lows = lows[-k_period:]
         current_close = closes[-1]
 
-        highest_high = max(recent_highs)
-        lowest_low = min(recent_lows)
+        highest_high = np.max(recent_highs)
+        lowest_low = np.min(recent_lows)
 
         k_percent = ((current_close - lowest_low) / (highest_high - lowest_low)) * 100 if highest_high != lowest_low else 50
         signal = "bullish" if k_percent < 20 else "bearish" if k_percent > 80 else "neutral"
 
-        return TechnicalIndicator(
+        return IndicatorResult(
             name="stochastic",
-            value=round(k_percent, 2),
+            value=float(round(k_percent, 2)),
             signal=signal,
             weight=self.indicators["stochastic"]["weight"]
         )
 
+    def _calculate_emas(self, prices: np.ndarray) -> Dict[int, np.ndarray]:
+        """حساب جميع فترات EMA المشتركة بين MACD وتقاطع المتوسطات دفعة واحدة"""
+        return ema_engine.compute_map(prices, self.ema_periods)
+
     def _calculate_ema(self, prices: np.ndarray, period: int) -> np.ndarray:
-        alpha = 2 / (period + 1)
-        ema = np.zeros_like(prices)
-        ema[0] = prices[0]
-        for i in range(1, len(prices)):
-            ema[i] = alpha * prices[i] + (1 - alpha) * ema[i - 1]
-        return ema
+        return ema_engine.compute(prices, (period,))[0]
@@ -1,5 +1,5 @@
 from typing import List, Optional, Dict, Any
-from src.models.schemas import CandleData, CandlePattern, TechnicalIndicator, TimeframeAnalysis, TradingSignal
+from src.models.results import IndicatorResult, PatternResult, TimeframeResult
 
 class TradingStrategy:
     """استراتيجية التداول لتوليد الإشارات"""
@@ -13,7 +13,7 @@ class TradingStrategy:
             '1h': 0.2
         }
 
-    def analyze_timeframe(self, timeframe: str, candle_patterns: List[CandlePattern], technical_indicators: List[TechnicalIndicator]) -> TimeframeAnalysis:
+    def analyze_timeframe(self, timeframe: str, candle_patterns: List[PatternResult], technical_indicators: List[IndicatorResult]) -> TimeframeResult:
         """تحليل إطار زمني محدد وتحديد الإشارة الكلية"""
         bullish_score = 0
         bearish_score = 0
@@ -41,7 +41,7 @@ class TradingStrategy:
 
         total_score = bullish_score - bearish_score
 
-        return TimeframeAnalysis(
+        return TimeframeResult(
             timeframe=timeframe,
             candle_patterns=candle_patterns,
             technical_indicators=technical_indicators,
@@ -49,7 +49,7 @@ class TradingStrategy:
             score=total_score
         )
 
-    def generate_signal(self, timeframe_analyses: List[TimeframeAnalysis], asset: str) -> Dict[str, Any]:
+    def generate_signal(self, timeframe_analyses: List[TimeframeResult], asset: str) -> Dict[str, Any]:
         """توليد إشارة تداول بناءً على تحليلات الأطر الزمنية"""
         weighted_bullish_score = 0
         weighted_bearish_score = 0
@@ -0,0 +1,227 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from src.models.candle_frame import CandleFrame
+
+_COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+
+
+class CandleRingBuffer:
+    """مخزن دائري بسعة ثابتة لأعمدة شموع تدفق واحد (أصل + إطار زمني)"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._columns = self._allocate(capacity)
+        self._start = 0
+        self._size = 0
+        self.last_access = time.monotonic()
+
+    @staticmethod
+    def _allocate(capacity: int) -> Dict[str, np.ndarray]:
+        return {
+            name: np.empty(capacity, dtype=np.int64 if name == "timestamp" else np.float64)
+            for name in _COLUMNS
+        }
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """حجم الأعمدة المحجوزة بالبايت"""
+        return sum(column.nbytes for column in self._columns.values())
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        """طابع آخر شمعة مخزنة"""
+        if not self._size:
+            return None
+        return int(self._columns["timestamp"][(self._start + self._size - 1) % self.capacity])
+
+    @property
+    def last_close(self) -> Optional[float]:
+        """سعر إغلاق آخر شمعة مخزنة"""
+        if not self._size:
+            return None
+        return float(self._columns["close"][(self._start + self._size - 1) % self.capacity])
+
+    def grow(self, capacity: int):
+        """توسيع السعة مع الحفاظ على الترتيب"""
+        if capacity <= self.capacity:
+            return
+        current = self.frame(self._size)
+        self.capacity = capacity
+        self._columns = self._allocate(capacity)
+        self._start = 0
+        self._size = 0
+        self.append(current)
+
+    def append(self, frame: CandleFrame):
+        """إلحاق شموع أحدث؛ الأقدم تُستبدل عند امتلاء السعة"""
+        count = len(frame)
+        if count == 0:
+            return
+        if count >= self.capacity:
+            frame = frame.tail(self.capacity)
+            count = self.capacity
+            self._start = 0
+            self._size = 0
+
+        write_at = (self._start + self._size) % self.capacity
+        positions = (write_at + np.arange(count)) % self.capacity
+        for name in _COLUMNS:
+            self._columns[name][positions] = getattr(frame, name)
+
+        overflow = max(0, self._size + count - self.capacity)
+        self._start = (self._start + overflow) % self.capacity
+        self._size = min(self.capacity, self._size + count)
+
+    def frame(self, count: int) -> CandleFrame:
+        """آخر count شمعة كإطار مرتب زمنيًا"""
+        count = min(count, self._size)
+        self.last_access = time.monotonic()
+        positions = (self._start + self._size - count + np.arange(count)) % self.capacity
+        return CandleFrame(*(self._columns[name][positions] for name in _COLUMNS))
+
+
+class CandleStreamCache:
+    """
+    ذاكرة مؤقتة لتدفقات الشموع لكل (أصل، إطار زمني)
+
+    تحتفظ بآخر الشموع في مخزن دائري وتسمح بطلب الشموع الأحدث فقط من الخادم،
+    وتُخلي التدفقات الخاملة بالكامل بعد idle_ttl ثانية. عند تجاوز max_streams تدفقًا
+    أو max_bytes بايت يُخلى الأقدم استخدامًا (LRU).
+
+    التعديل يجري من خيط حلقة الأحداث، بينما تُقرأ stats من خيوط الطلبات؛ لذلك
+    يحرس قفل واحد قاموس التدفقات. on_evict يُستدعى بمفتاح كل تدفق مُخلى.
+    """
+
+    def __init__(self, default_capacity: int = 500, idle_ttl: float = 900.0, max_streams: int = 1000,
+                 max_bytes: int = 64 * 1024 * 1024, on_evict: Callable[[Tuple[str, str]], None] = None):
+        self.default_capacity = default_capacity
+        self.idle_ttl = idle_ttl
+        self.max_streams = max(1, max_streams)
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self._streams: "OrderedDict[Tuple[str, str], CandleRingBuffer]" = OrderedDict()
+        self._bytes = 0
+        self._last_sweep = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.delta_fetches = 0
+        self.full_fetches = 0
+        self.candles_fetched = 0
+        self.candles_served = 0
+        self.evictions = 0
+        self.lru_evictions = 0
+        self.pushed_candles = 0
+
+    def get(self, asset: str, timeframe: str) -> Optional[CandleRingBuffer]:
+        """مخزن التدفق إن وجد (ويصبح الأحدث استخدامًا)"""
+        self.evict_idle()
+        key = (asset, timeframe)
+        with self._lock:
+            buffer = self._streams.get(key)
+            if buffer is not None:
+                self._streams.move_to_end(key)
+        return buffer
+
+    def store(self, asset: str, timeframe: str, frame: CandleFrame, capacity: int) -> CandleRingBuffer:
+        """استبدال تدفق كامل بتاريخ جديد"""
+        key = (asset, timeframe)
+        buffer = CandleRingBuffer(max(capacity, self.default_capacity))
+        buffer.append(frame)
+        with self._lock:
+            previous = self._streams.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._streams[key] = buffer
+            self._bytes += buffer.nbytes
+            evicted = self._enforce_limits()
+        self._notify(evicted)
+        return buffer
+
+    def extend(self, asset: str, timeframe: str, frame: CandleFrame, timeframe_seconds: int) -> bool:
+        """إلحاق شموع مغلقة بتدفق موجود إذا كانت تالية مباشرة لآخر شمعة فيه"""
+        buffer = self.get(asset, timeframe)
+        if buffer is None or not len(buffer) or not len(frame):
+            return False
+        if frame.timestamp[0] != buffer.last_timestamp + timeframe_seconds:
+            return False
+        buffer.append(frame)
+        self.pushed_candles += len(frame)
+        return True
+
+    def grow(self, buffer: CandleRingBuffer, capacity: int):
+        """توسيع مخزن تدفق مع احتساب حجمه الجديد في الميزانية"""
+        with self._lock:
+            before = buffer.nbytes
+            buffer.grow(capacity)
+            evicted = []
+            if any(stream is buffer for stream in self._streams.values()):
+                self._bytes += buffer.nbytes - before
+                evicted = self._enforce_limits()
+        self._notify(evicted)
+
+    def _enforce_limits(self) -> List[Tuple[str, str]]:
+        """إخلاء الأقدم استخدامًا حتى العودة ضمن الحدين (يبقى الأحدث دائمًا؛ يُستدعى تحت القفل)"""
+        evicted = []
+        while len(self._streams) > 1 and (len(self._streams) > self.max_streams or self._bytes > self.max_bytes):
+            key, buffer = self._streams.popitem(last=False)
+            self._bytes -= buffer.nbytes
+            self.lru_evictions += 1
+            evicted.append(key)
+        return evicted
+
+    def evict_idle(self, now: float = None):
+        """إخلاء التدفقات التي لم تُقرأ خلال idle_ttl (فحص دوري رخيص)"""
+        now = now or time.monotonic()
+        if now - self._last_sweep < min(self.idle_ttl, 60.0):
+            return
+        with self._lock:
+            self._last_sweep = now
+            idle = [key for key, buffer in self._streams.items() if now - buffer.last_access > self.idle_ttl]
+            for key in idle:
+                self._bytes -= self._streams.pop(key).nbytes
+            self.evictions += len(idle)
+        self._notify(idle)
+
+    def _notify(self, keys: List[Tuple[str, str]]):
+        if self.on_evict is not None:
+            for key in keys:
+                self.on_evict(key)
+
+    def record(self, fetched: int, served: int, delta: bool = False, full: bool = False):
+        """تحديث العدادات بعد طلب شموع"""
+        self.candles_fetched += fetched
+        self.candles_served += served
+        if full:
+            self.full_fetches += 1
+        elif delta:
+            self.delta_fetches += 1
+        else:
+            self.hits += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """إحصائيات الذاكرة (لقطة تحت القفل؛ آمنة من خيوط الطلبات)"""
+        with self._lock:
+            buffers = list(self._streams.values())
+            current_bytes = self._bytes
+        return {
+            "streams": len(buffers),
+            "max_streams": self.max_streams,
+            "bytes": current_bytes,
+            "max_bytes": self.max_bytes,
+            "cached_candles": sum(len(buffer) for buffer in buffers),
+            "hits": self.hits,
+            "delta_fetches": self.delta_fetches,
+            "full_fetches": self.full_fetches,
+            "candles_fetched": self.candles_fetched,
+            "candles_served": self.candles_served,
+            "evictions": self.evictions,
+            "lru_evictions": self.lru_evictions,
+            "pushed_candles": self.pushed_candles
+        }
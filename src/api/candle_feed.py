@@ -0,0 +1,156 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Set, Tuple
+from urllib.parse import urlparse
+from src.models.candle_frame import CandleRow
+
+
+class CandleUpdate(NamedTuple):
+    """تحديث شمعة مدفوع من التغذية (جارية أو مغلقة)"""
+    asset: str
+    timeframe: str
+    candle: CandleRow
+    closed: bool
+
+
+class CandleFeedClient:
+    """
+    اتصال تغذية واحد دائم ومتعدد الإرسال لجميع الاشتراكات
+
+    كل (أصل، إطار زمني) يُشترك فيه مرة واحدة على الخادم مهما تعدد المستهلكون،
+    وتُوزع الرسائل على طوابير المستهلكين. عند انقطاع الاتصال يُعاد الاتصال
+    وتُجدد الاشتراكات تلقائيًا. الرسالة التالفة تُسجل وتُتجاهل دون إيقاف القارئ.
+    """
+
+    def __init__(self, url: str, queue_size: int = 256, reconnect_delay: float = 1.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 8766
+        self.queue_size = queue_size
+        self.reconnect_delay = reconnect_delay
+
+        self._subscribers: Dict[Tuple[str, str], List[asyncio.Queue]] = {}
+        # الاشتراكات المرسلة على الاتصال الحالي (تُفرغ عند كل اتصال جديد)
+        self._sent: Set[Tuple[str, str]] = set()
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connected = asyncio.Event()
+        self._closing = False
+
+        self.messages_received = 0
+        self.reconnects = 0
+        self.dropped_updates = 0
+        self.malformed_messages = 0
+
+    async def subscribe(self, asset: str, timeframe: str) -> AsyncIterator[CandleUpdate]:
+        """مكرر غير متزامن لتحديثات شموع تدفق واحد"""
+        key = (asset, timeframe)
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subscribers.setdefault(key, []).append(queue)
+
+        try:
+            await self._ensure_connection()
+            await self._subscribe_key(key)
+            while True:
+                yield await queue.get()
+        finally:
+            queues = self._subscribers.get(key, [])
+            if queue in queues:
+                queues.remove(queue)
+            if not queues:
+                self._subscribers.pop(key, None)
+                if key in self._sent and self._writer is not None and not self._closing:
+                    self._sent.discard(key)
+                    try:
+                        await self._send({"op": "unsubscribe", "asset": asset, "timeframe": timeframe})
+                    except ConnectionError:
+                        pass
+
+    async def close(self):
+        """إغلاق الاتصال وإيقاف القارئ"""
+        self._closing = True
+        if self._reader_task:
+            self._reader_task.cancel()
+        if self._writer:
+            self._writer.close()
+        self._writer = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self._connected.is_set(),
+            "subscriptions": len(self._subscribers),
+            "consumers": sum(len(queues) for queues in self._subscribers.values()),
+            "messages_received": self.messages_received,
+            "reconnects": self.reconnects,
+            "dropped_updates": self.dropped_updates,
+            "malformed_messages": self.malformed_messages
+        }
+
+    async def _ensure_connection(self):
+        if self._reader_task is None or self._reader_task.done():
+            self._closing = False
+            self._reader_task = asyncio.ensure_future(self._run())
+        await self._connected.wait()
+
+    async def _subscribe_key(self, key: Tuple[str, str]):
+        """إرسال اشتراك التدفق مرة واحدة لكل اتصال (من المشترك الأول أو عند إعادة الاتصال)"""
+        if key in self._sent or key not in self._subscribers or self._writer is None:
+            return
+        self._sent.add(key)
+        await self._send({"op": "subscribe", "asset": key[0], "timeframe": key[1]})
+
+    async def _send(self, message: Dict):
+        self._writer.write((json.dumps(message) + "\n").encode())
+        await self._writer.drain()
+
+    async def _run(self):
+        """قراءة الرسائل وتوزيعها؛ إعادة الاتصال وتجديد الاشتراكات عند الانقطاع"""
+        try:
+            while not self._closing:
+                try:
+                    reader, self._writer = await asyncio.open_connection(self.host, self.port)
+                    self._sent.clear()
+                    for key in list(self._subscribers):
+                        await self._subscribe_key(key)
+                    self._connected.set()
+
+                    while True:
+                        line = await reader.readline()
+                        if not line:
+                            raise ConnectionError("انقطع اتصال التغذية")
+                        try:
+                            self._dispatch(json.loads(line))
+                        except (ValueError, KeyError, TypeError, AttributeError) as e:
+                            self.malformed_messages += 1
+                            print(f"رسالة تغذية تالفة تم تجاهلها: {str(e)}")
+
+                except (ConnectionError, OSError) as e:
+                    self._connected.clear()
+                    self._writer = None
+                    if self._closing:
+                        break
+                    self.reconnects += 1
+                    print(f"خطأ في اتصال تغذية الشموع: {str(e)}")
+                    await asyncio.sleep(self.reconnect_delay)
+        finally:
+            self._connected.clear()
+            self._writer = None
+
+    def _dispatch(self, message: Dict):
+        if message.get("type") != "candle":
+            return
+        key = (message["asset"], message["timeframe"])
+        update = CandleUpdate(
+            asset=key[0],
+            timeframe=key[1],
+            candle=CandleRow(int(message["t"]), float(message["o"]), float(message["h"]), float(message["l"]),
+                             float(message["c"]), float(message.get("v", 0.0))),
+            closed=bool(message["closed"])
+        )
+        self.messages_received += 1
+        for queue in self._subscribers.get(key, []):
+            if queue.full():
+                # المستهلك البطيء يفقد أقدم تحديث بدل إيقاف التغذية للجميع
+                queue.get_nowait()
+                self.dropped_updates += 1
+            queue.put_nowait(update)
@@ -0,0 +1,253 @@
+"""
+مخزن شموع عمودي على القرص (إلحاق فقط) لكل (أصل، إطار زمني)
+
+كل عمود ملف ثنائي بعرض ثابت (timestamp int64، و open/high/low/close/volume float64)
+يُفتح بـ np.memmap، فالقراءة عروض مباشرة على صفحات الملف دون تحميله إلى الذاكرة.
+عمود الطوابع مرتب تصاعديًا فهو نفسه فهرس البحث بالمدى الزمني (searchsorted)،
+و meta.json يحفظ عدد الصفوف المؤكدة وحدود السلسلة.
+
+    python -m src.api.candle_store import history.csv --asset EURUSD_OTC --timeframe 1m --root data/candles
+    python -m src.api.candle_store info --root data/candles
+"""
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from src.models.candle_frame import CandleFrame
+
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+_DTYPES = {name: np.dtype(np.int64) if name == "timestamp" else np.dtype(np.float64) for name in COLUMNS}
+
+# عدد صفوف CSV المحولة في كل دفعة إلحاق أثناء الاستيراد
+_IMPORT_CHUNK = 100_000
+
+
+class CandleSeries:
+    """سلسلة واحدة على القرص: ملف لكل عمود + meta.json"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.meta = self._read_meta()
+        self._columns: Optional[Dict[str, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return self.meta["count"]
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return self.meta["last"]
+
+    @property
+    def last_close(self) -> Optional[float]:
+        return self.meta["last_close"]
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """الأعمدة كمصفوفات memmap للقراءة فقط (تُفتح مرة حتى الإلحاق التالي)"""
+        if self._columns is None:
+            count = len(self)
+            self._columns = {
+                name: (np.memmap(self._column_path(name), dtype=dtype, mode="r", shape=(count,))
+                       if count else np.empty(0, dtype=dtype))
+                for name, dtype in _DTYPES.items()
+            }
+        return self._columns
+
+    def frame(self, start: Optional[int] = None, end: Optional[int] = None) -> CandleFrame:
+        """الشموع ذات الطوابع start <= t <= end كعروض بدون نسخ"""
+        columns = self.columns()
+        timestamps = columns["timestamp"]
+        first = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        last = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side="right"))
+        return CandleFrame._view(*(columns[name][first:max(first, last)] for name in COLUMNS))
+
+    def tail(self, count: int, end: Optional[int] = None) -> CandleFrame:
+        """آخر count شمعة حتى الطابع end"""
+        return self.frame(end=end).tail(count)
+
+    def append(self, frame: CandleFrame) -> int:
+        """
+        إلحاق الشموع الأحدث من آخر طابع مخزن فقط
+
+        البيانات تُكتب أولًا ثم يُحدَّث عدد الصفوف في meta.json؛ أي بايتات زائدة
+        من كتابة منقطعة تُقتطع قبل الإلحاق التالي.
+        """
+        if self.last_timestamp is not None:
+            frame = frame[int(np.searchsorted(frame.timestamp, self.last_timestamp, side="right")):]
+        if len(frame) == 0:
+            return 0
+        if len(frame) > 1 and np.any(np.diff(frame.timestamp) <= 0):
+            raise ValueError("الطوابع الزمنية يجب أن تكون تصاعدية تمامًا")
+
+        os.makedirs(self.path, exist_ok=True)
+        count = len(self)
+        self._columns = None
+        for name, dtype in _DTYPES.items():
+            with open(self._column_path(name), "ab") as handle:
+                handle.truncate(count * dtype.itemsize)
+                np.ascontiguousarray(getattr(frame, name), dtype=dtype).tofile(handle)
+
+        self.meta = {
+            "count": count + len(frame),
+            "first": self.meta["first"] if count else int(frame.timestamp[0]),
+            "last": int(frame.timestamp[-1]),
+            "last_close": float(frame.close[-1])
+        }
+        self._write_meta()
+        return len(frame)
+
+    def size_bytes(self) -> int:
+        return len(self) * sum(dtype.itemsize for dtype in _DTYPES.values())
+
+    def _column_path(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.bin")
+
+    def _read_meta(self) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.path, "meta.json"), encoding="utf-8") as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return {"count": 0, "first": None, "last": None, "last_close": None}
+
+    def _write_meta(self):
+        path = os.path.join(self.path, "meta.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as handle:
+            json.dump(self.meta, handle)
+        os.replace(path + ".tmp", path)
+
+
+class CandleStore:
+    """
+    مجموعة السلاسل تحت مجلد جذر: <root>/<asset>/<timeframe>/
+
+    القراءة لا تحتاج قفلًا (الصفوف المؤكدة لا تتغير)، والإلحاق مُسلسل بقفل واحد.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._series: Dict[Tuple[str, str], CandleSeries] = {}
+        self._lock = threading.Lock()
+        self.appended = 0
+
+    def series(self, asset: str, timeframe: str) -> CandleSeries:
+        key = (asset, timeframe)
+        series = self._series.get(key)
+        if series is None:
+            for part in key:
+                if not part or os.sep in part or part.startswith("."):
+                    raise ValueError(f"اسم غير صالح للتخزين: {part!r}")
+            series = self._series[key] = CandleSeries(os.path.join(self.root, asset, timeframe))
+        return series
+
+    def frame(self, asset: str, timeframe: str, start: Optional[int] = None, end: Optional[int] = None) -> CandleFrame:
+        return self.series(asset, timeframe).frame(start, end)
+
+    def tail(self, asset: str, timeframe: str, count: int, end: Optional[int] = None) -> CandleFrame:
+        return self.series(asset, timeframe).tail(count, end)
+
+    def append(self, asset: str, timeframe: str, frame: CandleFrame) -> int:
+        with self._lock:
+            added = self.series(asset, timeframe).append(frame)
+            self.appended += added
+            return added
+
+    def assets(self, timeframe: str) -> List[str]:
+        """الأصول التي لها سلسلة مخزنة للإطار الزمني"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            asset for asset in os.listdir(self.root)
+            if os.path.isfile(os.path.join(self.root, asset, timeframe, "meta.json"))
+        )
+
+    def import_csv(self, path: str, asset: str, timeframe: str, delimiter: str = ",") -> int:
+        """
+        استيراد CSV بالأعمدة timestamp,open,high,low,close[,volume]
+
+        timestamp بالثواني منذ epoch أو بصيغة ISO 8601. الصفوف يجب أن تكون مرتبة زمنيًا،
+        وما سبق آخر شمعة مخزنة يُتجاهل.
+        """
+        added = 0
+        for frame in _read_csv_chunks(path, delimiter):
+            added += self.append(asset, timeframe, frame)
+        return added
+
+    def stats(self) -> Dict[str, Any]:
+        series = list(self._series.values())
+        return {
+            "root": self.root,
+            "open_series": len(series),
+            "rows": sum(len(item) for item in series),
+            "bytes": sum(item.size_bytes() for item in series),
+            "appended": self.appended
+        }
+
+
+def _parse_timestamp(value: str) -> int:
+    try:
+        return int(float(value))
+    except ValueError:
+        return int(datetime.fromisoformat(value.strip().replace("Z", "+00:00")).timestamp())
+
+
+def _read_csv_chunks(path: str, delimiter: str = ",") -> Iterator[CandleFrame]:
+    """قراءة CSV على دفعات كإطارات شموع"""
+    with open(path, newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle, delimiter=delimiter)
+        fields = {name.strip().lower(): name for name in reader.fieldnames or []}
+        missing = [name for name in COLUMNS[:5] if name not in fields]
+        if missing:
+            raise ValueError(f"أعمدة ناقصة في CSV: {', '.join(missing)}")
+
+        rows: List[Tuple] = []
+        for record in reader:
+            volume = record.get(fields.get("volume", ""), "")
+            rows.append((
+                _parse_timestamp(record[fields["timestamp"]]),
+                float(record[fields["open"]]),
+                float(record[fields["high"]]),
+                float(record[fields["low"]]),
+                float(record[fields["close"]]),
+                float(volume) if volume not in ("", None) else np.nan
+            ))
+            if len(rows) >= _IMPORT_CHUNK:
+                yield CandleFrame(*zip(*rows))
+                rows = []
+        if rows:
+            yield CandleFrame(*zip(*rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="مخزن الشموع على القرص")
+    parser.add_argument("--root", default=os.environ.get("POCKET_STORE_PATH", "data/candles"))
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="استيراد ملف CSV")
+    importer.add_argument("csv")
+    importer.add_argument("--asset", required=True)
+    importer.add_argument("--timeframe", default="1m")
+    importer.add_argument("--delimiter", default=",")
+
+    info = commands.add_parser("info", help="عرض السلاسل المخزنة")
+    info.add_argument("--timeframe", default="1m")
+    args = parser.parse_args()
+
+    store = CandleStore(args.root)
+    if args.command == "import":
+        started = time.perf_counter()
+        added = store.import_csv(args.csv, args.asset, args.timeframe, args.delimiter)
+        print(f"{added} candles imported in {time.perf_counter() - started:.2f}s")
+    else:
+        for asset in store.assets(args.timeframe):
+            series = store.series(asset, args.timeframe)
+            first, last = series.meta["first"], series.meta["last"]
+            print(f"{asset:<20} {len(series):>10} candles  "
+                  f"{datetime.fromtimestamp(first):%Y-%m-%d %H:%M} -> {datetime.fromtimestamp(last):%Y-%m-%d %H:%M}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+خادم تغذية شموع محلي بديل (للاختبار دون اتصال)
+
+بروتوكول بسيط فوق TCP: كل رسالة سطر JSON واحد.
+العميل يرسل:  {"op": "subscribe" | "unsubscribe", "asset": "...", "timeframe": "1m"}
+الخادم يرسل:  {"type": "candle", "asset", "timeframe", "closed", "t", "o", "h", "l", "c", "v"}
+
+    python -m src.api.feed_server --port 8766 --time-scale 60
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, Optional, Set, Tuple
+import numpy as np
+from src.api.market_simulator import MarketSimulator
+from src.api.pocket_option import timeframe_to_seconds
+
+
+class _SimulatedStream:
+    """
+    شمعة جارية محاكاة لتدفق واحد
+
+    الشموع المغلقة تأتي من MarketSimulator (مولد التاريخ نفسه في الواجهة) على دفعات
+    متتالية، والتحديثات الجارية تسير من الافتتاح عبر القمة والقاع إلى الإغلاق المستهدف
+    مع مرور مدة الشمعة.
+    """
+
+    # عدد الشموع المولدة في كل دفعة (يحفظ استمرار أنظمة السوق بين الشموع)
+    BLOCK = 240
+
+    def __init__(self, timeframe_seconds: int, price: float, clock, simulator: MarketSimulator):
+        self.timeframe_seconds = timeframe_seconds
+        self.clock = clock
+        self.simulator = simulator
+        self.open_time = int(clock() // timeframe_seconds) * timeframe_seconds
+        self._block = None
+        self._index = 0
+        self._last_close = price
+        self._start_candle()
+
+    def _start_candle(self):
+        """بدء الشمعة المستهدفة التالية من الدفعة (دفعة جديدة عند نفادها)"""
+        if self._block is None or self._index >= len(self._block):
+            self._block = self.simulator.generate(self.BLOCK, self.open_time, self.timeframe_seconds, self._last_close)
+            self._index = 0
+        block, index = self._block, self._index
+        self.target = (
+            float(block.open[index]), float(block.high[index]), float(block.low[index]),
+            float(block.close[index]), float(block.volume[index])
+        )
+        self.open = self.high = self.low = self.close = self.target[0]
+        self.volume = 0.0
+
+    def tick(self) -> Dict:
+        """تحديث السعر وإرجاع الشمعة الجارية"""
+        open_, high, low, close, volume = self.target
+        progress = min(1.0, max(0.0, (self.clock() - self.open_time) / self.timeframe_seconds))
+        waypoints = (open_, low, high, close) if close >= open_ else (open_, high, low, close)
+        price = float(np.interp(progress, (0.0, 1 / 3, 2 / 3, 1.0), waypoints))
+        if self.simulator.decimals is not None:
+            price = round(price, self.simulator.decimals)
+        self.close = price
+        self.high = max(self.high, price)
+        self.low = min(self.low, price)
+        self.volume = volume * progress
+        return self.payload(closed=False)
+
+    def roll(self) -> Tuple[Dict, bool]:
+        """إغلاق الشمعة المستهدفة عند انتهاء مدتها وبدء التالية"""
+        now = self.clock()
+        if now < self.open_time + self.timeframe_seconds:
+            return None, False
+        self.open, self.high, self.low, self.close, self.volume = self.target
+        closed = self.payload(closed=True)
+        self._last_close = self.close
+        self.open_time = int(now // self.timeframe_seconds) * self.timeframe_seconds
+        self._index += 1
+        self._start_candle()
+        return closed, True
+
+    def payload(self, closed: bool) -> Dict:
+        return {
+            "t": self.open_time, "o": self.open, "h": self.high, "l": self.low,
+            "c": self.close, "v": round(self.volume, 2), "closed": closed
+        }
+
+
+class CandleFeedServer:
+    """
+    خادم تغذية يدفع الشموع الجارية والمغلقة لكل المشتركين
+
+    time_scale يسرّع الساعة المحاكاة (60 = شمعة دقيقة كل ثانية)،
+    و simulator يولد الشموع (بذرة ثابتة لتغذية قابلة للتكرار).
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, tick_interval: float = 0.25,
+                 time_scale: float = 1.0, base_price: float = 1.1000, simulator: Optional[MarketSimulator] = None):
+        self.host = host
+        self.port = port
+        self.tick_interval = tick_interval
+        self.time_scale = time_scale
+        self.base_price = base_price
+        self.simulator = simulator or MarketSimulator(base_price=base_price)
+        self._started_at = time.time()
+        self._streams: Dict[Tuple[str, str], _SimulatedStream] = {}
+        self._subscribers: Dict[Tuple[str, str], Set[asyncio.StreamWriter]] = {}
+        self._server = None
+        self._ticker = None
+
+    def clock(self) -> float:
+        """الساعة المحاكاة (مسرّعة وفق time_scale)"""
+        now = time.time()
+        return self._started_at + (now - self._started_at) * self.time_scale
+
+    async def start(self) -> "CandleFeedServer":
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ticker = asyncio.ensure_future(self._tick_loop())
+        return self
+
+    @property
+    def url(self) -> str:
+        return f"tcp://{self.host}:{self.port}"
+
+    async def stop(self):
+        if self._ticker:
+            self._ticker.cancel()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        for writers in self._subscribers.values():
+            for writer in writers:
+                writer.close()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    key = (message["asset"], message["timeframe"])
+                except (ValueError, KeyError):
+                    continue
+
+                if message.get("op") == "subscribe":
+                    if key not in self._streams:
+                        self._streams[key] = _SimulatedStream(
+                            timeframe_to_seconds(key[1]), self.base_price, self.clock, self.simulator
+                        )
+                    self._subscribers.setdefault(key, set()).add(writer)
+                elif message.get("op") == "unsubscribe":
+                    self._subscribers.get(key, set()).discard(writer)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            for writers in self._subscribers.values():
+                writers.discard(writer)
+            writer.close()
+
+    async def _tick_loop(self):
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            for key, stream in list(self._streams.items()):
+                writers = self._subscribers.get(key)
+                if not writers:
+                    continue
+                closed, rolled = stream.roll()
+                updates = [closed] if rolled else []
+                updates.append(stream.tick())
+                for update in updates:
+                    line = (json.dumps({"type": "candle", "asset": key[0], "timeframe": key[1], **update}) + "\n").encode()
+                    for writer in list(writers):
+                        try:
+                            writer.write(line)
+                        except ConnectionError:
+                            writers.discard(writer)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="خادم تغذية شموع محلي بديل")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--tick-interval", type=float, default=0.25)
+    parser.add_argument("--time-scale", type=float, default=1.0, help="تسريع الساعة المحاكاة")
+    parser.add_argument("--seed", type=int, default=None, help="بذرة مولد الشموع")
+    args = parser.parse_args()
+
+    async def serve():
+        server = await CandleFeedServer(
+            args.host, args.port, args.tick_interval, args.time_scale, simulator=MarketSimulator(seed=args.seed)
+        ).start()
+        print(f"خادم التغذية يعمل على {server.url}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+مولد سوق اصطناعي متجه وقابل للتكرار
+
+كل الشموع تُولد دفعة واحدة كمصفوفات من Generator ببذرة ثابتة: مسار سعر لوغاريتمي
+تتبدل فيه أنظمة التقلب والاتجاه (سلسلة ماركوف بمصفوفة انتقال وفترات هندسية)، مع تشتت
+في سعر الافتتاح حول الإغلاق السابق وفجوات افتتاح عشوائية نادرة.
+هو المصدر الاصطناعي الوحيد لـ PocketOptionAPI والقياسات والاختبارات الرجعية.
+
+    python -m src.api.market_simulator --bars 1000000 --seed 7
+"""
+import argparse
+import bisect
+import time
+from typing import Dict, NamedTuple, Optional, Sequence
+import numpy as np
+from src.models.candle_frame import CandleFrame
+
+
+class MarketRegime(NamedTuple):
+    """نظام سوق: تقلب وانحراف العائد اللوغاريتمي لكل شمعة دقيقة، ووزن الانتقال إليه"""
+    name: str
+    volatility: float
+    drift: float = 0.0
+    weight: float = 1.0
+
+
+DEFAULT_REGIMES = (
+    MarketRegime("calm", 0.0004, 0.0, 3.0),
+    MarketRegime("normal", 0.0010, 0.0, 4.0),
+    MarketRegime("volatile", 0.0025, 0.0, 1.0),
+    MarketRegime("trend_up", 0.0008, 0.00005, 1.0),
+    MarketRegime("trend_down", 0.0008, -0.00005, 1.0)
+)
+
+
+class MarketSimulator:
+    """
+    مولد شموع OHLCV متجه
+
+    Args:
+        seed: بذرة Generator (None = عشوائي)
+        regimes: أنظمة السوق المتاحة
+        regime_length: متوسط مدة النظام بالشموع
+        transitions: مصفوفة انتقال بين الأنظمة عند انتهاء كل فترة (صف لكل نظام حالي)؛
+            الافتراضي الانتقال إلى نظام آخر بنسبة أوزانها
+        open_dispersion: انحراف الافتتاح عن الإغلاق السابق نسبة إلى تقلب النظام
+        gap_probability: احتمال فجوة عند افتتاح كل شمعة
+        gap_volatility: انحراف حجم الفجوة (عائد لوغاريتمي)
+        wick_ratio: طول الظلال نسبة إلى تقلب النظام
+        volume: متوسط الحجم في نظام بتقلب متوسط
+        decimals: دقة تقريب الأسعار (None = بدون تقريب)
+    """
+
+    def __init__(self, seed: Optional[int] = None, base_price: float = 1.1000,
+                 regimes: Sequence[MarketRegime] = DEFAULT_REGIMES, regime_length: float = 240,
+                 transitions: Optional[Sequence[Sequence[float]]] = None, open_dispersion: float = 0.5,
+                 gap_probability: float = 0.002, gap_volatility: float = 0.002, wick_ratio: float = 0.6,
+                 volume: float = 3000.0, decimals: Optional[int] = 5):
+        if not regimes:
+            raise ValueError("يجب تحديد نظام سوق واحد على الأقل")
+        self.seed = seed
+        self.base_price = base_price
+        self.regimes = tuple(regimes)
+        self.regime_length = max(1.0, float(regime_length))
+        self.open_dispersion = open_dispersion
+        self.gap_probability = gap_probability
+        self.gap_volatility = gap_volatility
+        self.wick_ratio = wick_ratio
+        self.volume = volume
+        self.decimals = decimals
+        self.rng = np.random.default_rng(seed)
+
+        weights = np.array([regime.weight for regime in self.regimes], dtype=np.float64)
+        self._weights = weights / weights.sum()
+        self._volatility = np.array([regime.volatility for regime in self.regimes])
+        self._drift = np.array([regime.drift for regime in self.regimes])
+        self._reference_volatility = float(self._weights @ self._volatility)
+        self._transitions = self._transition_matrix(transitions)
+        self._cumulative = [list(np.cumsum(row)) for row in self._transitions]
+
+    def generate(self, count: int, start: int = 0, timeframe_seconds: int = 60,
+                 start_price: Optional[float] = None, rng: np.random.Generator = None) -> CandleFrame:
+        """
+        توليد count شمعة متتالية
+
+        Args:
+            start: طابع افتتاح الشمعة الأولى
+            start_price: سعر إغلاق الشمعة السابقة (الافتراضي base_price)
+            rng: مولد بديل (الافتراضي مولد المحاكي)
+        """
+        if count <= 0:
+            return CandleFrame.empty()
+        rng = self.rng if rng is None else rng
+        start_price = self.base_price if start_price is None else start_price
+
+        # التقلب يتناسب مع جذر مدة الإطار والانحراف مع المدة نفسها
+        scale = timeframe_seconds / 60
+        regime = self._regime_path(rng, count)
+        volatility = self._volatility[regime] * np.sqrt(scale)
+        returns = self._drift[regime] * scale + volatility * rng.standard_normal(count)
+
+        # الافتتاح يتشتت حول الإغلاق السابق بقدر تقلب النظام، والفجوات النادرة أكبر منه
+        gaps = self.open_dispersion * volatility * rng.standard_normal(count)
+        gap_mask = rng.random(count) < self.gap_probability
+        gaps[gap_mask] += rng.normal(0.0, self.gap_volatility, int(gap_mask.sum()))
+
+        closes = start_price * np.exp(np.cumsum(gaps + returns))
+        opens = closes * np.exp(-returns)
+        wicks = np.abs(rng.standard_normal((2, count))) * (volatility * self.wick_ratio)
+        highs = np.maximum(opens, closes) * np.exp(wicks[0])
+        lows = np.minimum(opens, closes) * np.exp(-wicks[1])
+        volumes = self.volume * rng.lognormal(0.0, 0.35, count) * (volatility / self._reference_volatility)
+
+        if self.decimals is not None:
+            opens, highs, lows, closes = (
+                np.round(values, self.decimals) for values in (opens, highs, lows, closes)
+            )
+
+        timestamps = start + np.arange(count, dtype=np.int64) * timeframe_seconds
+        return CandleFrame(timestamps, opens, highs, lows, closes, volumes)
+
+    def frames(self, assets: int, bars: int, timeframe_seconds: int = 60, start: int = 0,
+               prefix: str = "ASSET") -> Dict[str, CandleFrame]:
+        """تاريخ مستقل لعدة أصول (مولد فرعي لكل أصل من بذرة المحاكي)"""
+        children = np.random.SeedSequence(self.seed).spawn(assets)
+        return {
+            f"{prefix}{index:03d}_OTC": self.generate(
+                bars, start, timeframe_seconds, rng=np.random.default_rng(child)
+            )
+            for index, child in enumerate(children)
+        }
+
+    def _transition_matrix(self, transitions: Optional[Sequence[Sequence[float]]]) -> np.ndarray:
+        """مصفوفة انتقال مطبعة الصفوف (الافتراضي: نظام مختلف بنسبة الأوزان)"""
+        size = len(self.regimes)
+        if transitions is None:
+            matrix = np.tile(self._weights, (size, 1))
+            if size > 1:
+                np.fill_diagonal(matrix, 0.0)
+        else:
+            matrix = np.array(transitions, dtype=np.float64)
+            if matrix.shape != (size, size) or np.any(matrix < 0):
+                raise ValueError("مصفوفة الانتقال يجب أن تكون مربعة بعدد الأنظمة وبقيم غير سالبة")
+        totals = matrix.sum(axis=1, keepdims=True)
+        if np.any(totals <= 0):
+            raise ValueError("كل صف في مصفوفة الانتقال يحتاج احتمالًا موجبًا")
+        return matrix / totals
+
+    def _regime_path(self, rng: np.random.Generator, count: int) -> np.ndarray:
+        """مؤشر النظام لكل شمعة: سلسلة ماركوف على فترات هندسية الطول"""
+        if len(self.regimes) == 1:
+            return np.zeros(count, dtype=np.intp)
+        blocks = int(count / self.regime_length) + 2
+        lengths = rng.geometric(1.0 / self.regime_length, blocks)
+        while lengths.sum() < count:
+            lengths = np.concatenate((lengths, rng.geometric(1.0 / self.regime_length, blocks)))
+
+        # الحالة الأولى من الأوزان ثم انتقال واحد لكل فترة (حلقة على الفترات لا على الشموع)
+        state = int(rng.choice(len(self.regimes), p=self._weights))
+        draws = rng.random(len(lengths))
+        states = np.empty(len(lengths), dtype=np.intp)
+        states[0] = state
+        cumulative = self._cumulative
+        last = len(self.regimes) - 1
+        for index in range(1, len(lengths)):
+            state = min(bisect.bisect_right(cumulative[state], draws[index]), last)
+            states[index] = state
+        return np.repeat(states, lengths)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس سرعة مولد السوق الاصطناعي")
+    parser.add_argument("--bars", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    simulator = MarketSimulator(seed=args.seed)
+    started = time.perf_counter()
+    frame = simulator.generate(args.bars)
+    elapsed = time.perf_counter() - started
+    print(f"{len(frame)} bars in {elapsed:.3f}s ({len(frame) / elapsed / 1e6:.1f}M bars/s)")
+    print(f"close range: {frame.close.min():.5f} - {frame.close.max():.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,42 @@
 import asyncio
+import os
 import random
-import json
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+import time
+import weakref
+from typing import Any, AsyncIterator, List, Dict, Optional, Tuple
+import numpy as np
 from src.models.schemas import CandleData
+from src.models.candle_frame import CandleFrame
+from src.api.candle_cache import CandleStreamCache
+from src.api.candle_feed import CandleFeedClient, CandleUpdate
+from src.api.candle_store import CandleStore
+from src.api.market_simulator import MarketSimulator
+from src.analyzers.incremental_indicators import IncrementalIndicatorRegistry, incremental_indicators
+
+# مدة كل إطار زمني بالدقائق
+TIMEFRAME_MINUTES = {
+    "5s": 0.083,
+    "10s": 0.167,
+    "15s": 0.25,
+    "30s": 0.5,
+    "1m": 1,
+    "2m": 2,
+    "3m": 3,
+    "5m": 5,
+    "10m": 10,
+    "15m": 15,
+    "30m": 30,
+    "1h": 60,
+    "4h": 240,
+    "1d": 1440
+}
+
+# أقصى عدد شموع أساسية يُجلب لاشتقاق الأطر الأكبر؛ ما يتجاوزه يُجلب مباشرة
+MAX_RESAMPLE_CANDLES = 10_000
+
+def timeframe_to_seconds(timeframe: str) -> int:
+    """مدة الإطار الزمني بالثواني (الافتراضي دقيقة واحدة)"""
+    return max(1, round(TIMEFRAME_MINUTES.get(timeframe, 1) * 60))
 
 class PocketOptionAPI:
     """
@@ -11,9 +44,34 @@ class PocketOptionAPI:
     في التطبيق الحقيقي، يجب استبدال هذا بالاتصال الفعلي مع Pocket Option
     """
     
-    def __init__(self):
+    def __init__(self, cache_capacity: int = 500, cache_idle_ttl: float = 900.0, feed_url: str = None,
+                 simulator: MarketSimulator = None, store: CandleStore = None, cache_max_streams: int = None,
+                 cache_max_bytes: int = None, indicators: IncrementalIndicatorRegistry = None):
         self.connected = False
         self.base_price = 1.1000  # سعر أساسي لـ EURUSD
+        # مولد الشموع الاصطناعية (بذرة ثابتة عبر POCKET_SIM_SEED لاختبارات الحمل القابلة للتكرار)
+        seed = os.environ.get("POCKET_SIM_SEED")
+        self.simulator = simulator or MarketSimulator(
+            seed=int(seed) if seed else None, base_price=self.base_price
+        )
+        # مخزن الشموع على القرص (اختياري): التاريخ يُخدم منه والشموع الجديدة تُلحق به
+        store_path = os.environ.get("POCKET_STORE_PATH")
+        self.store = store or (CandleStore(store_path) if store_path else None)
+        # عنوان تغذية الشموع المدفوعة (اتصال واحد دائم لجميع الاشتراكات)
+        self.feed_url = feed_url or os.environ.get("POCKET_FEED_URL", "tcp://127.0.0.1:8766")
+        self.feed: Optional[CandleFeedClient] = None
+        # ذاكرة تدفقات الشموع: تُطلب الشموع الأحدث من آخر طابع مخزن فقط
+        # بحد أقصى لعدد التدفقات وحجمها (POCKET_CACHE_MAX_STREAMS و POCKET_CACHE_MAX_MB)
+        self.candle_cache = CandleStreamCache(
+            cache_capacity, cache_idle_ttl,
+            max_streams=cache_max_streams or int(os.environ.get("POCKET_CACHE_MAX_STREAMS", 1000)),
+            max_bytes=cache_max_bytes or int(float(os.environ.get("POCKET_CACHE_MAX_MB", 64)) * 1024 * 1024),
+            on_evict=self._drop_stream_lock
+        )
+        # حالات المؤشرات التراكمية للتدفقات المشترك فيها (تُحدث مع كل شمعة مغلقة مدفوعة)
+        self.indicators = indicators if indicators is not None else incremental_indicators
+        self._subscribers: Dict[Tuple[str, str], int] = {}
+        self._stream_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str], asyncio.Lock]]" = weakref.WeakKeyDictionary()
         
     async def connect(self):
         """الاتصال بـ Pocket Option"""
@@ -26,31 +84,12 @@ class PocketOptionAPI:
         """قطع الاتصال"""
         self.connected = False
         
-    def _generate_realistic_candle(self, timestamp: datetime, prev_close: float) -> CandleData:
-        """توليد شمعة واقعية للاختبار"""
-        # تغيير عشوائي صغير في السعر
-        change = random.uniform(-0.0020, 0.0020)
-        open_price = prev_close
-        close_price = open_price + change
-        
-        # تحديد أعلى وأقل سعر
-        high_price = max(open_price, close_price) + random.uniform(0, 0.0010)
-        low_price = min(open_price, close_price) - random.uniform(0, 0.0010)
-        
-        volume = random.uniform(1000, 5000)
-        
-        return CandleData(
-            timestamp=timestamp,
-            open=round(open_price, 5),
-            high=round(high_price, 5),
-            low=round(low_price, 5),
-            close=round(close_price, 5),
-            volume=volume
-        )
-        
-    async def get_candles(self, asset: str, timeframe: str, count: int = 100) -> List[CandleData]:
+    async def get_candles(self, asset: str, timeframe: str, count: int = 100) -> CandleFrame:
         """
-        جلب بيانات الشموع
+        جلب بيانات الشموع المغلقة كإطار عمودي
+        
+        يُخدم الطلب من ذاكرة التدفق عند الإمكان، ولا يُطلب من الخادم إلا الشموع
+        التي أُغلقت بعد آخر شمعة مخزنة.
         
         Args:
             asset: اسم الأصل (مثل EURUSD_OTC)
@@ -60,44 +99,232 @@ class PocketOptionAPI:
         if not self.connected:
             raise Exception("غير متصل بـ Pocket Option")
             
+        async with self._stream_lock(asset, timeframe):
+            timeframe_seconds = timeframe_to_seconds(timeframe)
+            last_open = self._last_closed_open_time(timeframe_seconds)
+            buffer = self.candle_cache.get(asset, timeframe)
+            
+            if buffer is not None and len(buffer) >= count:
+                missing = (last_open - buffer.last_timestamp) // timeframe_seconds
+                if missing <= 0:
+                    self.candle_cache.record(fetched=0, served=count)
+                    return buffer.frame(count)
+                
+                if missing < count:
+                    # جلب الشموع الجديدة فقط ومواصلة السلسلة من آخر إغلاق
+                    delta = await self._fetch_candles(
+                        asset, timeframe, missing, since=buffer.last_timestamp, start_price=buffer.last_close
+                    )
+                    self.candle_cache.grow(buffer, count)
+                    buffer.append(delta)
+                    self.candle_cache.record(fetched=len(delta), served=count, delta=True)
+                    return buffer.frame(count)
+            
+            # لا يوجد تاريخ كافٍ مخزن: جلب كامل
+            frame = await self._fetch_candles(asset, timeframe, count)
+            buffer = self.candle_cache.store(asset, timeframe, frame, count)
+            self.candle_cache.record(fetched=len(frame), served=count, full=True)
+            return buffer.frame(count)
+
+    async def get_resampled_candles(self, asset: str, timeframes: List[str], count: int = 100) -> Dict[str, CandleFrame]:
+        """
+        جلب أدق إطار زمني مرة واحدة واشتقاق الأطر الأكبر منه بالتجميع
+
+        الأطر التي ليست مضاعفًا صحيحًا للإطار الأساسي، أو التي يتجاوز اشتقاقها
+        MAX_RESAMPLE_CANDLES شمعة أساسية، تُجلب مباشرة.
+        """
+        seconds = {timeframe: timeframe_to_seconds(timeframe) for timeframe in timeframes}
+        base_timeframe = min(timeframes, key=seconds.get)
+        base_seconds = seconds[base_timeframe]
+        
+        # شمعة إضافية لكل إطار تعوض الدلو الأول المقطوع عند المحاذاة
+        required = {
+            timeframe: (seconds[timeframe] // base_seconds) * (count + 1)
+            for timeframe in timeframes if seconds[timeframe] % base_seconds == 0
+        }
+        derived = {
+            timeframe for timeframe, candles in required.items()
+            if candles <= max(MAX_RESAMPLE_CANDLES, count + 1)
+        }
+        base = await self.get_candles(asset, base_timeframe, max(required[timeframe] for timeframe in derived))
+        
+        frames = {}
+        for timeframe in timeframes:
+            if seconds[timeframe] == base_seconds:
+                frames[timeframe] = base.tail(count)
+            elif timeframe in derived:
+                frames[timeframe] = base.resample(seconds[timeframe], base_seconds).tail(count)
+            else:
+                frames[timeframe] = await self.get_candles(asset, timeframe, count)
+        return frames
+
+    async def _fetch_candles(self, asset: str, timeframe: str, count: int, since: Optional[int] = None,
+                             start_price: Optional[float] = None) -> CandleFrame:
+        """
+        طلب الشموع المغلقة من الخادم (محاكاة)
+        
+        Args:
+            count: الحد الأقصى لعدد الشموع
+            since: طابع آخر شمعة معروفة؛ تُرجع الشموع الأحدث منه فقط
+            start_price: سعر الإغلاق الذي تبدأ منه السلسلة
+        """
+        timeframe_seconds = timeframe_to_seconds(timeframe)
+        last_open = self._last_closed_open_time(timeframe_seconds)
+        first_open = last_open - (count - 1) * timeframe_seconds
+        if since is not None:
+            first_open = max(first_open, since + timeframe_seconds)
+        
+        # الجزء المخزن على القرص يُقرأ مباشرة، ولا يُطلب من الخادم إلا ما قبله وما بعده
+        stored = CandleFrame.empty()
+        backfill = 0
+        if self.store is not None:
+            series = self.store.series(asset, timeframe)
+            stored = series.frame(first_open, last_open)
+            if len(stored):
+                backfill = (int(stored.timestamp[0]) - first_open) // timeframe_seconds
+                first_open = int(stored.timestamp[-1]) + timeframe_seconds
+                start_price = float(stored.close[-1])
+            elif start_price is None and series.last_timestamp is not None and series.last_timestamp < first_open:
+                start_price = series.last_close
+            if first_open > last_open and backfill <= 0:
+                return stored
+        
         # محاكاة تأخير الشبكة
         await asyncio.sleep(0.2)
         
-        # تحويل الإطار الزمني إلى دقائق
-        timeframe_minutes = self._parse_timeframe(timeframe)
+        # الشموع الأقدم من أول شمعة مخزنة تُجلب ولا تُحفظ (المخزن إلحاق فقط)
+        prefix = CandleFrame.empty()
+        if backfill > 0:
+            prefix = self._generate_before(
+                backfill, int(stored.timestamp[0]), timeframe_seconds, float(stored.open[0])
+            )
         
-        # توليد بيانات الشموع
-        candles = []
-        current_time = datetime.now()
-        current_price = self.base_price
+        # توليد بيانات الشموع مباشرة في أعمدة
+        count = max(0, (last_open - first_open) // timeframe_seconds + 1)
+        fresh = self.simulator.generate(count, first_open, timeframe_seconds, start_price)
+        if self.store is None:
+            return fresh
+        self._persist(asset, timeframe, fresh)
+        return CandleFrame.concat((prefix, stored, fresh))
+
+    def _persist(self, asset: str, timeframe: str, frame: CandleFrame):
+        """إلحاق شموع مغلقة جديدة بالمخزن على القرص (إن وُجد)"""
+        if self.store is not None:
+            self.store.append(asset, timeframe, frame)
+
+    def _generate_before(self, count: int, end: int, timeframe_seconds: int, end_price: float) -> CandleFrame:
+        """توليد count شمعة تنتهي قبل الطابع end ويغلق آخرها عند end_price"""
+        frame = self.simulator.generate(count, end - count * timeframe_seconds, timeframe_seconds, end_price)
+        scale = end_price / frame.close[-1]
+        prices = [frame.open * scale, frame.high * scale, frame.low * scale, frame.close * scale]
+        if self.simulator.decimals is not None:
+            prices = [np.round(values, self.simulator.decimals) for values in prices]
+        return CandleFrame(frame.timestamp, *prices, frame.volume)
+
+    @staticmethod
+    def _last_closed_open_time(timeframe_seconds: int, now: float = None) -> int:
+        """طابع افتتاح آخر شمعة مغلقة لإطار زمني"""
+        now = int(time.time() if now is None else now)
+        return (now // timeframe_seconds) * timeframe_seconds - timeframe_seconds
+
+    def _stream_lock(self, asset: str, timeframe: str) -> asyncio.Lock:
+        """قفل لكل تدفق يمنع الجلب المكرر لنفس الشموع في الطلبات المتزامنة"""
+        locks = self._stream_locks.setdefault(asyncio.get_running_loop(), {})
+        lock = locks.get((asset, timeframe))
+        if lock is None:
+            lock = locks[(asset, timeframe)] = asyncio.Lock()
+        return lock
+
+    def _drop_stream_lock(self, key: Tuple[str, str]):
+        """حذف قفل تدفق أُخلي من الذاكرة (ما لم يكن محجوزًا الآن)"""
+        for locks in list(self._stream_locks.values()):
+            lock = locks.get(key)
+            if lock is not None and not lock.locked():
+                del locks[key]
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """إحصائيات ذاكرة تدفقات الشموع"""
+        return self.candle_cache.stats()
         
-        for i in range(count):
-            timestamp = current_time - timedelta(minutes=timeframe_minutes * (count - i))
-            candle = self._generate_realistic_candle(timestamp, current_price)
-            candles.append(candle)
-            current_price = candle.close
-            
-        return candles
+    def store_stats(self) -> Dict[str, Any]:
+        """إحصائيات مخزن الشموع على القرص"""
+        if self.store is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.store.stats()}
+        
+    def feed_stats(self) -> Dict[str, Any]:
+        """إحصائيات اتصال تغذية الشموع المدفوعة"""
+        if self.feed is None:
+            return {"connected": False}
+        return self.feed.stats()
+
+    async def get_candle_models(self, asset: str, timeframe: str, count: int = 100) -> List[CandleData]:
+        """جلب الشموع كنماذج CandleData (للاستخدام عند حدود الواجهة فقط)"""
+        frame = await self.get_candles(asset, timeframe, count)
+        return frame.to_candles()
         
     def _parse_timeframe(self, timeframe: str) -> int:
         """تحويل الإطار الزمني إلى دقائق"""
-        timeframe_map = {
-            "5s": 0.083,
-            "10s": 0.167,
-            "15s": 0.25,
-            "30s": 0.5,
-            "1m": 1,
-            "2m": 2,
-            "3m": 3,
-            "5m": 5,
-            "10m": 10,
-            "15m": 15,
-            "30m": 30,
-            "1h": 60,
-            "4h": 240,
-            "1d": 1440
-        }
-        return timeframe_map.get(timeframe, 1)
+        return TIMEFRAME_MINUTES.get(timeframe, 1)
+        
+    async def subscribe(self, asset: str, timeframe: str) -> AsyncIterator[CandleUpdate]:
+        """
+        الاشتراك في الشموع المدفوعة لأصل وإطار زمني
+        
+        يُرجع مكررًا غير متزامن لتحديثات الشمعة الجارية والمغلقة لحظة حدوثها.
+        الشموع المغلقة تُلحق أيضًا بذاكرة التدفق فتبقى get_candles محدثة دون طلبات إضافية،
+        وتُحدث حالة المؤشرات التراكمية للتدفق في self.indicators ما دام له مشترك.
+        """
+        if self.feed is None:
+            self.feed = CandleFeedClient(self.feed_url)
+        
+        key = (asset, timeframe)
+        self._subscribers[key] = self._subscribers.get(key, 0) + 1
+        try:
+            async for update in self.feed.subscribe(asset, timeframe):
+                if update.closed:
+                    self._append_closed_candle(update)
+                yield update
+        finally:
+            # آخر مستهلك غادر: لا داعي لإبقاء حالة المؤشرات
+            self._subscribers[key] -= 1
+            if not self._subscribers[key]:
+                del self._subscribers[key]
+                self.indicators.remove(asset, timeframe)
+            
+    def _append_closed_candle(self, update: CandleUpdate):
+        """
+        إلحاق شمعة مغلقة من التغذية بنفس مسار الشموع المجلوبة
+
+        تُحفظ في المخزن على القرص، وتُلحق بذاكرة التدفق إذا كانت التالية مباشرة لآخر شمعة فيها،
+        ثم تُحدث بها حالة المؤشرات التراكمية.
+        """
+        frame = CandleFrame(*([value] for value in update.candle))
+        timeframe_seconds = timeframe_to_seconds(update.timeframe)
+        self._persist(update.asset, update.timeframe, frame)
+        self.candle_cache.extend(update.asset, update.timeframe, frame, timeframe_seconds)
+        self._update_indicators(update.asset, update.timeframe, frame, timeframe_seconds)
+
+    def _update_indicators(self, asset: str, timeframe: str, frame: CandleFrame, timeframe_seconds: int):
+        """
+        تحديث حالة المؤشرات بشمعة مغلقة
+
+        الشمعة التالية مباشرة تكلف تحديثًا واحدًا؛ أول شمعة أو شمعة بعد فجوة تعيد
+        بناء الحالة من ذاكرة التدفق (التي تنتهي بهذه الشمعة) أو من الشمعة وحدها.
+        """
+        state = self.indicators.get(asset, timeframe)
+        if state.last_timestamp is not None:
+            if frame.timestamp[0] <= state.last_timestamp:
+                return
+            if frame.timestamp[0] == state.last_timestamp + timeframe_seconds:
+                state.update_frame(frame)
+                return
+
+        self.indicators.remove(asset, timeframe)
+        buffer = self.candle_cache.get(asset, timeframe)
+        if buffer is not None and buffer.last_timestamp == frame.timestamp[-1]:
+            frame = buffer.frame(len(buffer))
+        self.indicators.get(asset, timeframe).update_frame(frame)
         
     async def get_current_price(self, asset: str) -> float:
         """جلب السعر الحالي"""
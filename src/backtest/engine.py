@@ -0,0 +1,476 @@
+"""
+محرك الاختبار الرجعي المتجه لـ TradingStrategy
+
+يحسب نماذج الشموع والمؤشرات ونقاط كل إطار زمني لكل شمعة في التاريخ دفعة واحدة،
+بنفس دلالات خط المعالجة الحي (نافذة آخر window شمعة مغلقة لكل إطار)، ثم يقيّم
+نتيجة كل توصية شراء/بيع بعد مدة الصفقة.
+
+    python -m src.backtest.engine --assets 50 --days 365 --workers 8
+    python -m src.backtest.engine --store data/candles --start 2024-01-01 --workers 8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Any, Dict, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from src.analyzers.candle_patterns import CandlePatternAnalyzer
+from src.analyzers.ema_engine import ema_engine, EMAEngine
+from src.analyzers.indicator_calculator import TechnicalIndicatorCalculator
+from src.analyzers.trading_strategy import TradingStrategy
+from src.api.candle_store import CandleStore
+from src.api.market_simulator import MarketSimulator
+from src.api.pocket_option import timeframe_to_seconds
+from src.models.candle_frame import CandleFrame
+
+# مكونات نقاط الإطار الزمني: الإشارة لكل شمعة (+1 صاعد، -1 هابط، 0 محايد)
+# الدوجي والقمة الدوارة محايدان دائمًا فلا يؤثران في النقاط
+COMPONENTS = ("hammer", "engulfing", "shooting_star", "rsi", "macd", "bollinger_bands", "ema_cross", "stochastic")
+
+# ثقة كل نموذج كما في كواشف CandlePatternAnalyzer
+PATTERN_CONFIDENCE = {"hammer": 0.8, "engulfing": 0.9, "shooting_star": 0.8}
+
+# أقل عدد شموع يحتاجه كل مؤشر في TechnicalIndicatorCalculator
+INDICATOR_MIN_LENGTH = {"rsi": 15, "macd": 26, "bollinger_bands": 20, "ema_cross": 50, "stochastic": 14}
+
+# عدد صفوف النوافذ المضروبة في نواة EMA في كل دفعة (يحد من الذاكرة المؤقتة)
+_CHUNK_ROWS = 16384
+
+
+class SignalArrays(NamedTuple):
+    """مصفوفات الإشارة لكل شمعة في الإطار الأساسي (قابلة لإعادة الاستخدام في المسح)"""
+    timestamps: np.ndarray       # طابع افتتاح شمعة القرار (int64)
+    closes: np.ndarray           # سعر إغلاق شمعة القرار
+    components: np.ndarray       # (الأطر × الشموع × المكونات) int8
+    valid: np.ndarray            # الشموع التي اكتملت فيها نوافذ كل الأطر
+    timeframes: Tuple[str, ...]
+
+
+def default_component_weights(candle_analyzer: CandlePatternAnalyzer = None,
+                              indicator_calculator: TechnicalIndicatorCalculator = None) -> np.ndarray:
+    """أوزان المكونات الافتراضية: وزن النموذج × ثقته، ووزن المؤشر كما هو"""
+    patterns = (candle_analyzer or CandlePatternAnalyzer()).patterns
+    indicators = (indicator_calculator or TechnicalIndicatorCalculator()).indicators
+    return np.array([
+        patterns[name]["weight"] * PATTERN_CONFIDENCE[name] if name in PATTERN_CONFIDENCE
+        else indicators[name]["weight"]
+        for name in COMPONENTS
+    ], dtype=np.float64)
+
+
+def window_ema_kernels(window: int) -> np.ndarray:
+    """
+    نوى خطية (window × 4) تعطي قيم EMA عند آخر شمعة في نافذة تبدأ من بدايتها
+
+    EMA خطي في الأسعار، فقيمة EMA12 و EMA26 وخط إشارة MACD و EMA20 و EMA50 عند نهاية
+    النافذة (مع البذرة ema[0] = أول سعر في النافذة كما في الحساب الحي) هي حاصل ضرب
+    النافذة في متجه أوزان ثابت. الأعمدة: macd, macd_signal, ema_20, ema_50.
+    """
+    basis = np.eye(window)
+    matrices = {
+        period: ema_engine.smooth(basis, np.full(window, EMAEngine.period_alpha(period))).T
+        for period in (12, 26, 20, 50, 9)
+    }
+    macd = matrices[12] - matrices[26]
+    return np.column_stack([
+        macd[-1],
+        macd.T @ matrices[9][-1],
+        matrices[20][-1],
+        matrices[50][-1]
+    ])
+
+
+def timeframe_components(frame: CandleFrame, window: int, candle_analyzer: CandlePatternAnalyzer,
+                         kernels: np.ndarray) -> np.ndarray:
+    """
+    إشارات المكونات لكل شمعة في إطار زمني واحد (نافذة آخر window شمعة حتى الشمعة نفسها)
+
+    Returns:
+        مصفوفة (الشموع × المكونات) int8؛ الصفوف قبل اكتمال النافذة أصفار
+    """
+    count = len(frame)
+    components = np.zeros((count, len(COMPONENTS)), dtype=np.int8)
+    if count < window or window < 2:
+        return components
+
+    closes, highs, lows = frame.close, frame.high, frame.low
+    start = window - 1
+    column = {name: i for i, name in enumerate(COMPONENTS)}
+
+    masks = candle_analyzer.scan(frame)
+    components[start:, column["hammer"]] = masks["hammer"][start:]
+    components[start:, column["engulfing"]] = (
+        masks["engulfing_bullish"][start:].astype(np.int8) - masks["engulfing_bearish"][start:]
+    )
+    components[start:, column["shooting_star"]] = -masks["shooting_star"][start:].astype(np.int8)
+
+    # calculate_all_indicators لا يُرجع شيئًا لنافذة أقصر من 20 شمعة
+    if window < 20:
+        return components
+
+    def enabled(name: str) -> bool:
+        return window >= INDICATOR_MIN_LENGTH[name]
+
+    if enabled("rsi"):
+        period = 14
+        deltas = np.diff(closes)
+        gains = sliding_window_view(np.where(deltas > 0, deltas, 0.0), period).mean(axis=1)
+        losses = sliding_window_view(np.where(deltas < 0, -deltas, 0.0), period).mean(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(losses == 0, 100.0, 100 - (100 / (1 + gains / losses)))
+        rsi = rsi[start - period:]
+        components[start:, column["rsi"]] = (rsi < 30).astype(np.int8) - (rsi > 70)
+
+    if enabled("macd") or enabled("ema_cross"):
+        windows = sliding_window_view(closes, window)
+        features = np.empty((len(windows), kernels.shape[1]))
+        for offset in range(0, len(windows), _CHUNK_ROWS):
+            features[offset:offset + _CHUNK_ROWS] = windows[offset:offset + _CHUNK_ROWS] @ kernels
+        macd, macd_signal, ema_20, ema_50 = features.T
+
+        if enabled("macd"):
+            components[start:, column["macd"]] = (
+                ((macd > macd_signal) & (macd > 0)).astype(np.int8) - ((macd < macd_signal) & (macd < 0))
+            )
+        if enabled("ema_cross"):
+            # منطق التقاطع الحي يختزل إلى إشارة الفرق الحالي بين EMA20 و EMA50
+            components[start:, column["ema_cross"]] = np.sign(ema_20 - ema_50).astype(np.int8)
+
+    if enabled("bollinger_bands"):
+        period = 20
+        windows = sliding_window_view(closes, period)
+        sma = windows.mean(axis=1)
+        std = windows.std(axis=1)
+        current = closes[period - 1:]
+        signal = (current < sma - 2 * std).astype(np.int8) - (current > sma + 2 * std)
+        components[start:, column["bollinger_bands"]] = signal[start - period + 1:]
+
+    if enabled("stochastic"):
+        period = 14
+        highest = sliding_window_view(highs, period).max(axis=1)
+        lowest = sliding_window_view(lows, period).min(axis=1)
+        price_range = highest - lowest
+        with np.errstate(divide="ignore", invalid="ignore"):
+            k_percent = np.where(price_range != 0, (closes[period - 1:] - lowest) / price_range * 100, 50.0)
+        signal = (k_percent < 20).astype(np.int8) - (k_percent > 80)
+        components[start:, column["stochastic"]] = signal[start - period + 1:]
+
+    return components
+
+
+def score_signals(arrays: SignalArrays, component_weights: np.ndarray,
+                  timeframe_weights: np.ndarray) -> np.ndarray:
+    """
+    النقاط النهائية لكل شمعة بنفس دلالات analyze_timeframe و generate_signal
+
+    نقاط الإطار = مجموع أوزان المكونات الصاعدة - الهابطة، ثم تُجمع الأطر الصاعدة
+    والهابطة بأوزانها وتُقسم على مجموع الأوزان كما في generate_signal حرفيًا.
+    الأوزان إما متجهات (مجموعة معاملات واحدة) أو مصفوفات بعمود لكل مجموعة
+    معاملات، فتُرجع (الشموع) أو (الشموع × المجموعات).
+    """
+    timeframe_scores = np.tensordot(arrays.components, component_weights, axes=([2], [0]))
+    weights = np.expand_dims(timeframe_weights, 1)
+    bullish = np.where(timeframe_scores > 0, timeframe_scores * weights, 0.0).sum(axis=0)
+    bearish = np.where(timeframe_scores < 0, timeframe_scores * weights, 0.0).sum(axis=0)
+    total_weight = np.asarray(timeframe_weights.sum(axis=0), dtype=np.float64)
+    return np.divide(bullish - bearish, total_weight, out=np.zeros_like(bullish), where=total_weight > 0)
+
+
+def evaluate_trades(final_scores: np.ndarray, closes: np.ndarray, valid: np.ndarray, horizon: int,
+                    threshold: float = 0.1, payout: float = 0.8) -> Dict[str, Any]:
+    """
+    تقييم التوصيات بعد horizon شمعة (خيار ثنائي: ربح payout أو خسارة الرهان)
+
+    الدخول بسعر إغلاق شمعة القرار والخروج بإغلاق الشمعة بعد horizon،
+    والتعادل يُرد فيه الرهان.
+    """
+    count = len(closes)
+    direction = np.where(final_scores > threshold, 1, np.where(final_scores < -threshold, -1, 0)).astype(np.int8)
+    tradable = valid.copy()
+    tradable[max(0, count - horizon):] = False
+    tradable &= direction != 0
+
+    entries = np.flatnonzero(tradable)
+    moves = (closes[entries + horizon] - closes[entries]) * direction[entries]
+    outcome = np.sign(moves)
+    pnl = np.where(outcome > 0, payout, np.where(outcome < 0, -1.0, 0.0))
+
+    equity = np.cumsum(pnl)
+    peaks = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:]
+    trades = len(entries)
+    wins = int((outcome > 0).sum())
+    losses = int((outcome < 0).sum())
+    decided = wins + losses
+
+    return {
+        "trades": trades,
+        "buys": int((direction[entries] > 0).sum()),
+        "sells": int((direction[entries] < 0).sum()),
+        "wins": wins,
+        "losses": losses,
+        "pushes": trades - decided,
+        "hit_rate": round(wins / decided, 4) if decided else 0.0,
+        "expectancy": round(float(pnl.mean()), 4) if trades else 0.0,
+        "avg_return": round(float((moves / closes[entries]).mean()), 6) if trades else 0.0,
+        "total_pnl": round(float(equity[-1]), 2) if trades else 0.0,
+        "max_drawdown": round(float((peaks - equity).max()), 2) if trades else 0.0
+    }
+
+
+class BacktestEngine:
+    """
+    اختبار رجعي متجه لاستراتيجية التداول على تاريخ كامل لعدة أصول
+
+    الإطار الأساسي (أدق إطار) هو بيانات الإدخال، والأطر الأكبر تُشتق منه بالتجميع.
+    عند كل شمعة أساسية تُستخدم فقط شموع الأطر الأكبر التي أُغلقت قبل نهايتها (بدون نظر للمستقبل).
+    """
+
+    def __init__(self, timeframes: Sequence[str] = None, window: int = 50, threshold: float = 0.1,
+                 payout: float = 0.8, trade_duration: str = None, workers: int = None):
+        self.candle_analyzer = CandlePatternAnalyzer()
+        self.indicator_calculator = TechnicalIndicatorCalculator()
+        self.trading_strategy = TradingStrategy()
+
+        self.timeframes = tuple(sorted(timeframes or self.trading_strategy.timeframe_weights, key=timeframe_to_seconds))
+        self.base_timeframe = self.timeframes[0]
+        self.window = window
+        self.threshold = threshold
+        self.payout = payout
+        # مدة الصفقة الافتراضية هي نفسها التي تعيدها الاستراتيجية مع كل إشارة
+        self.trade_duration = trade_duration or self.trading_strategy.generate_signal([], "")[2]["duration"]
+        self.workers = workers or os.cpu_count() or 1
+
+        self.component_weights = default_component_weights(self.candle_analyzer, self.indicator_calculator)
+        self.timeframe_weights = np.array(
+            [self.trading_strategy.timeframe_weights.get(timeframe, 0) for timeframe in self.timeframes],
+            dtype=np.float64
+        )
+        self._kernels = window_ema_kernels(window)
+
+    @property
+    def horizon(self) -> int:
+        """مدة الصفقة بعدد شموع الإطار الأساسي"""
+        return max(1, timeframe_to_seconds(self.trade_duration) // timeframe_to_seconds(self.base_timeframe))
+
+    @property
+    def warm_up_bars(self) -> int:
+        """أقل عدد شموع أساسية قبل أول صفقة ممكنة (نافذة أكبر إطار ثم مدة الصفقة)"""
+        base_seconds = timeframe_to_seconds(self.base_timeframe)
+        largest = max(timeframe_to_seconds(timeframe) for timeframe in self.timeframes)
+        return self.window * largest // base_seconds + self.horizon
+
+    def build_signals(self, frame: CandleFrame) -> SignalArrays:
+        """حساب مكونات كل الأطر لكل شمعة أساسية مع المحاذاة الزمنية"""
+        base_seconds = timeframe_to_seconds(self.base_timeframe)
+        decision_times = frame.timestamp + base_seconds
+        components = np.zeros((len(self.timeframes), len(frame), len(COMPONENTS)), dtype=np.int8)
+        valid = np.ones(len(frame), dtype=bool)
+
+        for position, timeframe in enumerate(self.timeframes):
+            seconds = timeframe_to_seconds(timeframe)
+            timeframe_frame = frame if seconds == base_seconds else frame.resample(seconds, base_seconds)
+            timeframe_components_ = timeframe_components(
+                timeframe_frame, self.window, self.candle_analyzer, self._kernels
+            )
+            # آخر شمعة مغلقة من هذا الإطار عند نهاية كل شمعة أساسية
+            closed = np.searchsorted(timeframe_frame.timestamp + seconds, decision_times, side="right") - 1
+            available = closed >= self.window - 1
+            components[position, available] = timeframe_components_[closed[available]]
+            valid &= available
+
+        return SignalArrays(frame.timestamp, frame.close, components, valid, self.timeframes)
+
+    def run_asset(self, frame: CandleFrame) -> Dict[str, Any]:
+        """اختبار أصل واحد"""
+        arrays = self.build_signals(frame)
+        final_scores = score_signals(arrays, self.component_weights, self.timeframe_weights)
+        report = evaluate_trades(final_scores, arrays.closes, arrays.valid, self.horizon, self.threshold, self.payout)
+        report["candles"] = len(frame)
+        return report
+
+    def run(self, frames: Dict[str, CandleFrame]) -> Dict[str, Any]:
+        """
+        اختبار عدة أصول موزعة على عمليات متعددة
+
+        الأعمدة تُنسخ مرة واحدة إلى ذاكرة مشتركة تقرؤها العمليات دون تسلسل (pickle).
+        """
+        started = time.perf_counter()
+        if self.workers <= 1 or len(frames) <= 1:
+            assets = {asset: self.run_asset(frame) for asset, frame in frames.items()}
+        else:
+            assets = run_shared(frames, _backtest_task, self, self.workers)
+
+        return {
+            "assets": assets,
+            "summary": summarize(assets),
+            "elapsed": round(time.perf_counter() - started, 3)
+        }
+
+    def run_store(self, root: str, assets: Sequence[str] = None, start: Optional[int] = None,
+                  end: Optional[int] = None) -> Dict[str, Any]:
+        """
+        اختبار أصول من مخزن الشموع على القرص
+
+        كل عملية تفتح ملفات الأصل بنفسها عبر memmap، فلا يُنسخ التاريخ ولا يُحمَّل
+        إلا ما يقرؤه الحساب من الصفحات.
+        """
+        started = time.perf_counter()
+        store = CandleStore(root)
+        assets = list(assets or store.assets(self.base_timeframe))
+        if self.workers <= 1 or len(assets) <= 1:
+            reports = {
+                asset: self.run_asset(store.frame(asset, self.base_timeframe, start, end)) for asset in assets
+            }
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = [
+                    executor.submit(_stored_backtest_task, (root, asset, start, end), self) for asset in assets
+                ]
+                reports = {asset: future.result() for asset, future in zip(assets, futures)}
+
+        return {
+            "assets": reports,
+            "summary": summarize(reports),
+            "elapsed": round(time.perf_counter() - started, 3)
+        }
+
+
+def summarize(reports: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """تجميع نتائج الأصول"""
+    trades = sum(report["trades"] for report in reports.values())
+    wins = sum(report["wins"] for report in reports.values())
+    losses = sum(report["losses"] for report in reports.values())
+    total_pnl = sum(report["total_pnl"] for report in reports.values())
+    return {
+        "assets": len(reports),
+        "candles": sum(report["candles"] for report in reports.values()),
+        "trades": trades,
+        "hit_rate": round(wins / (wins + losses), 4) if wins + losses else 0.0,
+        "expectancy": round(total_pnl / trades, 4) if trades else 0.0,
+        "total_pnl": round(total_pnl, 2),
+        "worst_drawdown": max((report["max_drawdown"] for report in reports.values()), default=0.0)
+    }
+
+
+# ---------------------------------------------------------------------------
+# توزيع الأصول على العمليات عبر الذاكرة المشتركة
+# ---------------------------------------------------------------------------
+
+_SHARED_COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+
+
+class SharedFrames:
+    """أعمدة شموع عدة أصول متتالية في كتل ذاكرة مشتركة (كتلة لكل عمود)"""
+
+    def __init__(self, frames: Dict[str, CandleFrame]):
+        self.assets = list(frames)
+        lengths = [len(frames[asset]) for asset in self.assets]
+        self.offsets = np.concatenate(([0], np.cumsum(lengths))).tolist()
+        total = max(1, self.offsets[-1])
+
+        self.blocks: Dict[str, shared_memory.SharedMemory] = {}
+        for name in _SHARED_COLUMNS:
+            dtype = np.int64 if name == "timestamp" else np.float64
+            block = shared_memory.SharedMemory(create=True, size=total * np.dtype(dtype).itemsize)
+            self.blocks[name] = block
+            column = np.ndarray((total,), dtype=dtype, buffer=block.buf)
+            for asset, start in zip(self.assets, self.offsets):
+                values = getattr(frames[asset], name)
+                column[start:start + len(values)] = values
+            del column
+
+    def task(self, index: int) -> Dict[str, Any]:
+        """وصف مهمة أصل واحد (أسماء الكتل ومجال الصفوف فقط)"""
+        return {
+            "asset": self.assets[index],
+            "blocks": {name: block.name for name, block in self.blocks.items()},
+            "start": self.offsets[index],
+            "stop": self.offsets[index + 1]
+        }
+
+    def close(self):
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+
+
+def attach_frame(task: Dict[str, Any]):
+    """
+    إرفاق إطار أصل من الذاكرة المشتركة داخل عملية عاملة
+
+    Returns:
+        (الإطار كعروض على الذاكرة المشتركة، الكتل المفتوحة لإغلاقها بعد الانتهاء)
+    """
+    blocks = {name: shared_memory.SharedMemory(name=block_name) for name, block_name in task["blocks"].items()}
+    start, stop = task["start"], task["stop"]
+    columns = []
+    for name in _SHARED_COLUMNS:
+        dtype = np.int64 if name == "timestamp" else np.float64
+        columns.append(np.ndarray((stop,), dtype=dtype, buffer=blocks[name].buf)[start:stop])
+    return CandleFrame._view(*columns), blocks
+
+
+def run_shared(frames: Dict[str, CandleFrame], worker, context: Any, workers: int) -> Dict[str, Any]:
+    """تشغيل worker(task, context) لكل أصل على مجمع عمليات فوق ذاكرة مشتركة"""
+    shared = SharedFrames(frames)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(worker, shared.task(index), context) for index in range(len(shared.assets))]
+            return {asset: future.result() for asset, future in zip(shared.assets, futures)}
+    finally:
+        shared.close()
+
+
+def _backtest_task(task: Dict[str, Any], engine: BacktestEngine) -> Dict[str, Any]:
+    frame, blocks = attach_frame(task)
+    try:
+        return engine.run_asset(frame)
+    finally:
+        # العروض يجب أن تُحرر قبل إغلاق الكتل
+        del frame
+        for block in blocks.values():
+            block.close()
+
+
+def _stored_backtest_task(task: Tuple[str, str, Optional[int], Optional[int]], engine: BacktestEngine) -> Dict[str, Any]:
+    root, asset, start, end = task
+    return engine.run_asset(CandleStore(root).frame(asset, engine.base_timeframe, start, end))
+
+
+def synthetic_frames(assets: int, bars: int, timeframe: str = "1m", seed: int = 0,
+                     start: int = 1_700_000_040) -> Dict[str, CandleFrame]:
+    """تاريخ اصطناعي لتجربة المحرك (مولد MarketSimulator نفسه المستخدم في الواجهة)"""
+    return MarketSimulator(seed=seed).frames(assets, bars, timeframe_to_seconds(timeframe), (start // 3600) * 3600)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="اختبار رجعي متجه لاستراتيجية التداول")
+    parser.add_argument("--assets", type=int, default=10)
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--window", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--store", default=None, help="مجلد مخزن الشموع بدلًا من البيانات الاصطناعية")
+    parser.add_argument("--start", default=None, help="بداية المدى (ISO) عند استخدام المخزن")
+    parser.add_argument("--end", default=None, help="نهاية المدى (ISO) عند استخدام المخزن")
+    args = parser.parse_args()
+
+    engine = BacktestEngine(window=args.window, workers=args.workers)
+    if args.store:
+        start = int(datetime.fromisoformat(args.start).timestamp()) if args.start else None
+        end = int(datetime.fromisoformat(args.end).timestamp()) if args.end else None
+        result = engine.run_store(args.store, start=start, end=end)
+    else:
+        frames = synthetic_frames(args.assets, int(args.days * 1440), seed=args.seed)
+        result = engine.run(frames)
+
+    for key, value in result["summary"].items():
+        print(f"{key}: {value}")
+    print(f"elapsed: {result['elapsed']}s")
+
+
+if __name__ == "__main__":
+    main()
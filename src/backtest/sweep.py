@@ -0,0 +1,269 @@
+"""
+مسح معاملات الاستراتيجية (أوزان الأطر والمؤشرات والنماذج وعتبة النقاط)
+
+مصفوفات الإشارة تُحسب مرة واحدة لكل أصل، ثم تُقيَّم كل مجموعات المعاملات
+معًا بضرب مصفوفات (عمود لكل مجموعة)، والأصول موزعة على العمليات.
+
+    python -m src.backtest.sweep --assets 8 --days 30 --samples 200 --top 20 --output sweep.csv
+"""
+import argparse
+import csv
+import itertools
+import time
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from src.backtest.engine import (
+    BacktestEngine,
+    COMPONENTS,
+    PATTERN_CONFIDENCE,
+    attach_frame,
+    run_shared,
+    score_signals,
+    synthetic_frames
+)
+from src.models.candle_frame import CandleFrame
+
+# عدد الشموع المقيّمة في كل دفعة (الشموع × المجموعات × الأطر في الذاكرة المؤقتة)
+_CHUNK_BARS = 8192
+
+RANK_METRICS = ("expectancy", "total_pnl", "hit_rate")
+
+
+class ParameterSpace:
+    """
+    فضاء المعاملات: قائمة قيم مرشحة لكل معامل
+
+    أسماء المعاملات: threshold، و tf_<الإطار> لأوزان الأطر، وأسماء المكونات
+    (rsi, macd, ..., hammer, engulfing, shooting_star) لأوزان المؤشرات والنماذج.
+    أوزان النماذج هي أوزان CandlePatternAnalyzer قبل ضربها في ثقة النموذج.
+    المعاملات غير المذكورة تبقى على قيمها الحالية في الاستراتيجية.
+    """
+
+    def __init__(self, engine: BacktestEngine, candidates: Dict[str, Sequence[float]] = None):
+        self.engine = engine
+        self.defaults = self.default_parameters(engine)
+        unknown = set(candidates or {}) - set(self.defaults)
+        if unknown:
+            raise ValueError(f"معاملات غير معروفة: {', '.join(sorted(unknown))}")
+        self.candidates = {name: list(values) for name, values in (candidates or {}).items()}
+
+    @staticmethod
+    def default_parameters(engine: BacktestEngine) -> Dict[str, float]:
+        """المعاملات الحالية في الكود (أوزان النماذج مقربة لإزالة بقايا القسمة على الثقة)"""
+        parameters = {"threshold": engine.threshold}
+        for timeframe, weight in zip(engine.timeframes, engine.timeframe_weights):
+            parameters[f"tf_{timeframe}"] = float(weight)
+        for name, weight in zip(COMPONENTS, engine.component_weights):
+            parameters[name] = round(float(weight / PATTERN_CONFIDENCE.get(name, 1.0)), 6)
+        return parameters
+
+    def grid(self) -> List[Dict[str, float]]:
+        """الضرب الديكارتي لكل القيم المرشحة"""
+        names = list(self.candidates)
+        return [
+            {**self.defaults, **dict(zip(names, values))}
+            for values in itertools.product(*(self.candidates[name] for name in names))
+        ]
+
+    def sample(self, count: int, seed: int = 0) -> List[Dict[str, float]]:
+        """عينات عشوائية مستقلة من القيم المرشحة (المجموعة الحالية أولًا للمقارنة)"""
+        rng = np.random.default_rng(seed)
+        samples = [dict(self.defaults)]
+        for _ in range(count - 1):
+            samples.append({
+                **self.defaults,
+                **{name: float(rng.choice(values)) for name, values in self.candidates.items()}
+            })
+        return samples
+
+    def matrices(self, parameter_sets: List[Dict[str, float]]):
+        """تحويل المجموعات إلى مصفوفات الأوزان (عمود لكل مجموعة) والعتبات"""
+        component_weights = np.array([
+            [parameters[name] * PATTERN_CONFIDENCE.get(name, 1.0) for parameters in parameter_sets]
+            for name in COMPONENTS
+        ])
+        timeframe_weights = np.array([
+            [parameters[f"tf_{timeframe}"] for parameters in parameter_sets]
+            for timeframe in self.engine.timeframes
+        ])
+        thresholds = np.array([parameters["threshold"] for parameters in parameter_sets])
+        return component_weights, timeframe_weights, thresholds
+
+
+def evaluate_parameter_sets(engine: BacktestEngine, frame: CandleFrame, component_weights: np.ndarray,
+                            timeframe_weights: np.ndarray, thresholds: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    تقييم كل مجموعات المعاملات على أصل واحد
+
+    المكونات تُحسب مرة واحدة، ونتيجة كل شمعة (صعود/هبوط بعد مدة الصفقة) مستقلة
+    عن المعاملات؛ فلا يتغير بين المجموعات إلا ضرب المصفوفات والمقارنة بالعتبة.
+    الرصيد التراكمي وأقصى تراجع يُحملان بين الدفعات.
+    """
+    arrays = engine.build_signals(frame)
+    horizon = engine.horizon
+    closes = arrays.closes
+    count = len(closes)
+    sets = len(thresholds)
+
+    rows = np.flatnonzero(arrays.valid[:max(0, count - horizon)])
+    outcome = np.sign(closes[rows + horizon] - closes[rows])
+
+    trades = np.zeros(sets, dtype=np.int64)
+    wins = np.zeros(sets, dtype=np.int64)
+    losses = np.zeros(sets, dtype=np.int64)
+    equity = np.zeros(sets)
+    peak = np.zeros(sets)
+    max_drawdown = np.zeros(sets)
+
+    for offset in range(0, len(rows), _CHUNK_BARS):
+        chunk = rows[offset:offset + _CHUNK_BARS]
+        scores = score_signals(
+            arrays._replace(components=arrays.components[:, chunk]), component_weights, timeframe_weights
+        )
+        direction = np.where(scores > thresholds, 1, np.where(scores < -thresholds, -1, 0))
+        result = direction * outcome[offset:offset + _CHUNK_BARS, None]
+        pnl = np.where(result > 0, engine.payout, np.where(result < 0, -1.0, 0.0))
+
+        trades += (direction != 0).sum(axis=0)
+        wins += (result > 0).sum(axis=0)
+        losses += (result < 0).sum(axis=0)
+
+        curve = equity + np.cumsum(pnl, axis=0)
+        peaks = np.maximum(peak, np.maximum.accumulate(curve, axis=0))
+        max_drawdown = np.maximum(max_drawdown, (peaks - curve).max(axis=0))
+        equity, peak = curve[-1], peaks[-1]
+
+    return {
+        "trades": trades,
+        "wins": wins,
+        "losses": losses,
+        "total_pnl": equity,
+        "max_drawdown": max_drawdown
+    }
+
+
+def _sweep_task(task: Dict[str, Any], context) -> Dict[str, np.ndarray]:
+    engine, component_weights, timeframe_weights, thresholds = context
+    frame, blocks = attach_frame(task)
+    try:
+        return evaluate_parameter_sets(engine, frame, component_weights, timeframe_weights, thresholds)
+    finally:
+        del frame
+        for block in blocks.values():
+            block.close()
+
+
+def run_sweep(frames: Dict[str, CandleFrame], space: ParameterSpace, parameter_sets: List[Dict[str, float]],
+              rank_by: str = "expectancy", min_trades: int = 1) -> List[Dict[str, Any]]:
+    """
+    تقييم المجموعات على كل الأصول وإرجاع جدول مرتب تنازليًا حسب rank_by
+
+    المجموعات التي لم تبلغ min_trades صفقة تُوضع في ذيل الجدول.
+    الأصول الأقصر من فترة الإحماء يُحذر منها، وإن كانت كلها كذلك يُرفع ValueError.
+    """
+    if rank_by not in RANK_METRICS:
+        raise ValueError(f"معيار ترتيب غير مدعوم: {rank_by}")
+
+    engine = space.engine
+    short = {asset: len(frame) for asset, frame in frames.items() if len(frame) < engine.warm_up_bars}
+    if len(short) == len(frames):
+        raise ValueError(
+            f"التاريخ أقصر من فترة الإحماء ({engine.warm_up_bars} شمعة {engine.base_timeframe}): لا صفقات ممكنة"
+        )
+    for asset, bars in short.items():
+        print(f"تحذير: {asset} ({bars} شمعة) أقصر من فترة الإحماء ({engine.warm_up_bars}) ولن ينتج صفقات")
+
+    context = (engine, *space.matrices(parameter_sets))
+    if engine.workers <= 1 or len(frames) <= 1:
+        results = {asset: evaluate_parameter_sets(engine, frame, *context[1:]) for asset, frame in frames.items()}
+    else:
+        results = run_shared(frames, _sweep_task, context, engine.workers)
+
+    totals = {
+        key: np.sum([result[key] for result in results.values()], axis=0)
+        for key in ("trades", "wins", "losses", "total_pnl")
+    }
+    worst_drawdown = np.max([result["max_drawdown"] for result in results.values()], axis=0)
+
+    table = []
+    for index, parameters in enumerate(parameter_sets):
+        trades = int(totals["trades"][index])
+        decided = int(totals["wins"][index] + totals["losses"][index])
+        table.append({
+            **parameters,
+            "trades": trades,
+            "hit_rate": round(int(totals["wins"][index]) / decided, 4) if decided else 0.0,
+            "expectancy": round(float(totals["total_pnl"][index]) / trades, 4) if trades else 0.0,
+            "total_pnl": round(float(totals["total_pnl"][index]), 2),
+            "max_drawdown": round(float(worst_drawdown[index]), 2)
+        })
+
+    table.sort(key=lambda row: (row["trades"] >= min_trades, row[rank_by], -row["max_drawdown"]), reverse=True)
+    for rank, row in enumerate(table, start=1):
+        row["rank"] = rank
+    return table
+
+
+def write_table(table: List[Dict[str, Any]], path: str):
+    """حفظ الجدول المرتب بصيغة CSV"""
+    if not table:
+        return
+    columns = ["rank"] + [column for column in table[0] if column != "rank"]
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(table)
+
+
+def format_table(table: List[Dict[str, Any]], columns: Optional[Sequence[str]] = None) -> str:
+    """جدول نصي لأفضل النتائج"""
+    if not table:
+        return ""
+    columns = list(columns or (["rank"] + [column for column in table[0] if column != "rank"]))
+    widths = {column: max(len(column), *(len(str(row[column])) for row in table)) for column in columns}
+    lines = ["  ".join(column.rjust(widths[column]) for column in columns)]
+    lines.extend("  ".join(str(row[column]).rjust(widths[column]) for column in columns) for row in table)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="مسح معاملات استراتيجية التداول")
+    parser.add_argument("--assets", type=int, default=4)
+    parser.add_argument("--days", type=float, default=14)
+    parser.add_argument("--samples", type=int, default=100, help="عدد العينات العشوائية (0 = شبكة كاملة)")
+    parser.add_argument("--rank-by", default="expectancy", choices=RANK_METRICS)
+    parser.add_argument("--min-trades", type=int, default=100)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="مسار CSV للجدول الكامل")
+    args = parser.parse_args()
+
+    engine = BacktestEngine(workers=args.workers)
+    if int(args.days * 1440) < engine.warm_up_bars:
+        parser.error(f"--days قصيرة جدًا: فترة الإحماء {engine.warm_up_bars} شمعة دقيقة "
+                     f"({engine.warm_up_bars / 1440:.2f} يوم)")
+    indicator_weights = [0, 5, 10, 15, 20, 25]
+    candidates = {
+        "threshold": [0.1, 5, 10, 15, 20, 30],
+        **{f"tf_{timeframe}": [0.0, 0.1, 0.2, 0.3] for timeframe in engine.timeframes},
+        **{name: indicator_weights for name in COMPONENTS}
+    }
+    if args.samples == 0:
+        candidates = {"threshold": candidates["threshold"], "rsi": indicator_weights, "macd": indicator_weights}
+    space = ParameterSpace(engine, candidates)
+    parameter_sets = space.grid() if args.samples == 0 else space.sample(args.samples, args.seed)
+
+    frames = synthetic_frames(args.assets, int(args.days * 1440), seed=args.seed)
+    started = time.perf_counter()
+    table = run_sweep(frames, space, parameter_sets, rank_by=args.rank_by, min_trades=args.min_trades)
+    elapsed = time.perf_counter() - started
+
+    print(format_table(table[:args.top]))
+    print(f"{len(parameter_sets)} parameter sets x {len(frames)} assets in {elapsed:.2f}s")
+    if args.output:
+        write_table(table, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import numpy as np
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Sequence, Union
+from src.models.schemas import CandleData
+
+
+class CandleRow(NamedTuple):
+    """شمعة واحدة خفيفة (بدون تحقق pydantic) مقروءة من إطار الشموع"""
+    timestamp: int
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+
+class CandleFrame:
+    """
+    إطار شموع عمودي (struct-of-arrays)
+
+    يحتفظ بمصفوفات float64 متجاورة لـ open/high/low/close/volume
+    ومصفوفة int64 للطوابع الزمنية (ثوانٍ منذ epoch).
+    التحويل إلى نماذج pydantic يتم فقط عند حدود الواجهة.
+    """
+
+    __slots__ = ("timestamp", "open", "high", "low", "close", "volume")
+
+    def __init__(self, timestamp: Sequence[int], open: Sequence[float], high: Sequence[float],
+                 low: Sequence[float], close: Sequence[float], volume: Optional[Sequence[float]] = None):
+        self.timestamp = np.ascontiguousarray(timestamp, dtype=np.int64)
+        self.open = np.ascontiguousarray(open, dtype=np.float64)
+        self.high = np.ascontiguousarray(high, dtype=np.float64)
+        self.low = np.ascontiguousarray(low, dtype=np.float64)
+        self.close = np.ascontiguousarray(close, dtype=np.float64)
+        if volume is None:
+            volume = np.full(len(self.close), np.nan)
+        self.volume = np.ascontiguousarray(volume, dtype=np.float64)
+
+    @classmethod
+    def empty(cls) -> "CandleFrame":
+        """إطار فارغ"""
+        return cls([], [], [], [], [], [])
+
+    @classmethod
+    def from_candles(cls, candles: List[CandleData]) -> "CandleFrame":
+        """تحويل قائمة نماذج CandleData إلى إطار عمودي"""
+        return cls(
+            timestamp=[int(candle.timestamp.timestamp()) for candle in candles],
+            open=[candle.open for candle in candles],
+            high=[candle.high for candle in candles],
+            low=[candle.low for candle in candles],
+            close=[candle.close for candle in candles],
+            volume=[np.nan if candle.volume is None else candle.volume for candle in candles]
+        )
+
+    @classmethod
+    def concat(cls, frames: Sequence["CandleFrame"]) -> "CandleFrame":
+        """دمج إطارات متتالية في إطار واحد (نسخ)"""
+        frames = [frame for frame in frames if len(frame)]
+        if not frames:
+            return cls.empty()
+        return cls(*(np.concatenate([getattr(frame, name) for frame in frames]) for name in cls.__slots__))
+
+    @classmethod
+    def coerce(cls, candles: Union["CandleFrame", List[CandleData]]) -> "CandleFrame":
+        """قبول إطار جاهز أو قائمة شموع وإرجاع إطار"""
+        if isinstance(candles, cls):
+            return candles
+        return cls.from_candles(candles)
+
+    def to_candles(self) -> List[CandleData]:
+        """تحويل الإطار إلى نماذج CandleData (للاستخدام عند حدود الواجهة فقط)"""
+        return [
+            CandleData(
+                timestamp=datetime.fromtimestamp(row.timestamp),
+                open=row.open,
+                high=row.high,
+                low=row.low,
+                close=row.close,
+                volume=None if np.isnan(row.volume) else row.volume
+            )
+            for row in self.rows()
+        ]
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[CandleRow, "CandleFrame"]:
+        """فهرسة رقمية تُرجع CandleRow، والتقطيع يُرجع إطارًا (عروض بدون نسخ)"""
+        if isinstance(index, slice):
+            return CandleFrame._view(
+                self.timestamp[index], self.open[index], self.high[index],
+                self.low[index], self.close[index], self.volume[index]
+            )
+        return self.row(index)
+
+    def row(self, index: int) -> CandleRow:
+        """قراءة شمعة واحدة"""
+        return CandleRow(
+            int(self.timestamp[index]),
+            float(self.open[index]),
+            float(self.high[index]),
+            float(self.low[index]),
+            float(self.close[index]),
+            float(self.volume[index])
+        )
+
+    def rows(self):
+        """التكرار على الشموع كـ CandleRow"""
+        for values in zip(self.timestamp.tolist(), self.open.tolist(), self.high.tolist(),
+                          self.low.tolist(), self.close.tolist(), self.volume.tolist()):
+            yield CandleRow(*values)
+
+    def tail(self, count: int) -> "CandleFrame":
+        """آخر count شمعة"""
+        return self[-count:] if count > 0 else self[0:0]
+
+    def resample(self, bucket_seconds: int, base_seconds: int, include_partial: bool = False) -> "CandleFrame":
+        """
+        تجميع الإطار إلى إطار زمني أكبر عبر اختزالات NumPy على حدود الدلاء
+
+        open=الأول، high=الأعلى، low=الأدنى، close=الأخير، volume=المجموع.
+        الدلو الأول يُستبعد إذا بدأ التاريخ في منتصفه، والدلو الأخير غير المكتمل
+        (الشمعة الجارية) يُستبعد ما لم يُطلب include_partial.
+
+        Args:
+            bucket_seconds: مدة الإطار الهدف بالثواني
+            base_seconds: مدة شموع هذا الإطار بالثواني
+            include_partial: إبقاء الدلو الأخير غير المكتمل
+        """
+        if len(self) == 0:
+            return CandleFrame.empty()
+
+        buckets = (self.timestamp // bucket_seconds) * bucket_seconds
+        starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+        ends = np.concatenate((starts[1:], [len(self)]))
+
+        frame = CandleFrame._view(
+            buckets[starts],
+            self.open[starts],
+            np.maximum.reduceat(self.high, starts),
+            np.minimum.reduceat(self.low, starts),
+            self.close[ends - 1],
+            np.add.reduceat(self.volume, starts)
+        )
+
+        first = 1 if self.timestamp[0] > buckets[0] else 0
+        last = len(frame)
+        if not include_partial and self.timestamp[-1] + base_seconds < buckets[-1] + bucket_seconds:
+            last -= 1
+        return frame[first:max(first, last)]
+
+    @classmethod
+    def _view(cls, timestamp, open, high, low, close, volume) -> "CandleFrame":
+        """إنشاء إطار من مصفوفات جاهزة دون نسخ"""
+        frame = cls.__new__(cls)
+        frame.timestamp = timestamp
+        frame.open = open
+        frame.high = high
+        frame.low = low
+        frame.close = close
+        frame.volume = volume
+        return frame
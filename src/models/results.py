@@ -0,0 +1,117 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from src.models.schemas import AIResponse, CandlePattern, TechnicalIndicator, TimeframeAnalysis, TradingSignal
+
+
+class _SlottedResult:
+    """
+    أساس نتائج التحليل الداخلية
+
+    كائنات خفيفة بـ __slots__ بدون تحقق pydantic: تُنشأ آلاف المرات عند فحص أصول كثيرة،
+    ولا تُحوَّل إلى نماذج pydantic (schemas) إلا عند الحاجة عبر to_model().
+    """
+    __slots__ = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+
+class PatternResult(_SlottedResult):
+    """نموذج شموع مكتشف (مقابل CandlePattern)"""
+    __slots__ = ("name", "detected", "signal", "weight", "confidence")
+
+    def __init__(self, name: str, detected: bool, signal: str, weight: int, confidence: float):
+        self.name = name
+        self.detected = detected
+        self.signal = signal
+        self.weight = weight
+        self.confidence = confidence
+
+    def to_model(self) -> CandlePattern:
+        return CandlePattern(**self.to_dict())
+
+
+class IndicatorResult(_SlottedResult):
+    """قراءة مؤشر فني (مقابل TechnicalIndicator)"""
+    __slots__ = ("name", "value", "signal", "weight")
+
+    def __init__(self, name: str, value: float, signal: str, weight: int):
+        self.name = name
+        self.value = value
+        self.signal = signal
+        self.weight = weight
+
+    def to_model(self) -> TechnicalIndicator:
+        return TechnicalIndicator(**self.to_dict())
+
+
+class TimeframeResult(_SlottedResult):
+    """تحليل إطار زمني واحد (مقابل TimeframeAnalysis)"""
+    __slots__ = ("timeframe", "candle_patterns", "technical_indicators", "overall_signal", "score")
+
+    def __init__(self, timeframe: str, candle_patterns: List[PatternResult],
+                 technical_indicators: List[IndicatorResult], overall_signal: str, score: float):
+        self.timeframe = timeframe
+        self.candle_patterns = candle_patterns
+        self.technical_indicators = technical_indicators
+        self.overall_signal = overall_signal
+        self.score = score
+
+    def to_model(self) -> TimeframeAnalysis:
+        return TimeframeAnalysis(
+            timeframe=self.timeframe,
+            candle_patterns=[pattern.to_model() for pattern in self.candle_patterns],
+            technical_indicators=[indicator.to_model() for indicator in self.technical_indicators],
+            overall_signal=self.overall_signal,
+            score=self.score
+        )
+
+
+class SignalResult(_SlottedResult):
+    """
+    الإشارة النهائية (مقابل TradingSignal)
+
+    استجابات المزودين تبقى AIResponse لأنها تُبنى من ردود خارجية تستحق التحقق.
+    """
+    __slots__ = (
+        "asset", "recommendation", "entry_time", "trade_duration", "target_price",
+        "technical_confidence", "ai_confidence", "final_confidence",
+        "timeframe_analyses", "ai_responses", "created_at"
+    )
+
+    def __init__(self, asset: str, recommendation: str, entry_time: Optional[datetime], trade_duration: str,
+                 target_price: Optional[float], technical_confidence: float, ai_confidence: float,
+                 final_confidence: float, timeframe_analyses: List[TimeframeResult],
+                 ai_responses: List[AIResponse], created_at: datetime):
+        self.asset = asset
+        self.recommendation = recommendation
+        self.entry_time = entry_time
+        self.trade_duration = trade_duration
+        self.target_price = target_price
+        self.technical_confidence = technical_confidence
+        self.ai_confidence = ai_confidence
+        self.final_confidence = final_confidence
+        self.timeframe_analyses = timeframe_analyses
+        self.ai_responses = ai_responses
+        self.created_at = created_at
+
+    def to_model(self) -> TradingSignal:
+        values = self.to_dict()
+        values["timeframe_analyses"] = [analysis.to_model() for analysis in self.timeframe_analyses]
+        return TradingSignal(**values)
@@ -35,11 +35,14 @@ class AIResponse(BaseModel):
     approval: bool
     confidence: float
     reasoning: str
+    error: bool = False
+    # انتهاء مهلة الطلب لدى المزود (يُصنف كتجاوز مهلة لا كخطأ)
+    timed_out: bool = False
 
 class TradingSignal(BaseModel):
     asset: str
     recommendation: str
-    entry_time: datetime
+    entry_time: Optional[datetime]
     trade_duration: str
     target_price: Optional[float]
     technical_confidence: float
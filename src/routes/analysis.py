@@ -1,34 +1,66 @@
 import time
 from datetime import datetime
-from typing import List, Dict, Any
-from flask import Blueprint, request, jsonify
-from src.api.pocket_option import pocket_option_api
-from src.analyzers.candle_patterns import CandlePatternAnalyzer
-from src.analyzers.indicator_calculator import TechnicalIndicatorCalculator
-from src.analyzers.trading_strategy import TradingStrategy
-from src.ai_layer.chatgpt_handler import ChatGPTHandler
-from src.ai_layer.deepseek import DeepSeekHandler
-from src.ai_layer.groq_handler import GroqHandler
-from src.ai_layer.manus_handler import ManusHandler
-from src.ai_layer.grok_handler import GrokHandler
-from src.models.schemas import TradingSignal, AIResponse
+from flask import Blueprint, Response, g, request, jsonify, stream_with_context
+from src.ai_layer.base import BaseAIHandler
+from src.services.async_runner import background_loop
+from src.services.signal_service import (
+    signal_service,
+    InsufficientDataError
+)
+from src.services.watchlist_scheduler import watchlist_scheduler
+from src.services.signal_hub import signal_hub
+from src.services.metrics import metrics, stage_seconds, analyze_requests
+from src.services.serializer import (
+    InvalidFieldsError,
+    encode_signal_response,
+    encode_signals_response,
+    parse_fields,
+    parse_flag
+)
 
 # إنشاء Blueprint للتحليل
 analysis_bp = Blueprint('analysis', __name__)
 
-# إنشاء مثيلات المحللات
-candle_analyzer = CandlePatternAnalyzer()
-indicator_calculator = TechnicalIndicatorCalculator()
-trading_strategy = TradingStrategy()
+# معالجات الذكاء الاصطناعي المشتركة مع خدمة الإشارات
+ai_handlers = signal_service.ai_handlers
 
-# إنشاء مثيلات معالجات الذكاء الاصطناعي
-ai_handlers = {
-    'chatgpt': ChatGPTHandler(),
-    'deepseek': DeepSeekHandler(),
-    'groq': GroqHandler(),
-    'manus': ManusHandler(),
-    'grok': GrokHandler()
-}
+# المهلة القصوى لانتظار خط المعالجة من خيط الطلب
+ANALYSIS_TIMEOUT = 60
+
+# إحصائيات المكونات تُصدَّر أيضًا في /api/metrics
+metrics.register_stats('ai_cache', BaseAIHandler.verdict_cache.stats)
+metrics.register_stats('http_pool', BaseAIHandler.http_pool.stats)
+metrics.register_stats('candle_cache', signal_service.api.cache_stats)
+metrics.register_stats('candle_feed', signal_service.api.feed_stats)
+metrics.register_stats('candle_store', signal_service.api.store_stats)
+metrics.register_stats('single_flight', signal_service.single_flight.stats)
+metrics.register_stats('watchlist', watchlist_scheduler.stats)
+metrics.register_stats('signal_stream', signal_hub.stats)
+for provider_name in ai_handlers:
+    metrics.register_stats(
+        f'ai_provider_{provider_name}',
+        lambda provider_name=provider_name: BaseAIHandler.provider_health.get(provider_name).stats()
+    )
+
+def json_response(body: bytes, status: int = 200) -> Response:
+    """استجابة JSON من bytes مرمزة مسبقًا (بدون jsonify)"""
+    return Response(body, status=status, mimetype='application/json')
+
+def response_options():
+    """خيارات الاستجابة من الاستعلام: ?fields=asset,recommendation&compact=1"""
+    return parse_fields(request.args.get('fields')), parse_flag(request.args.get('compact'))
+
+@analysis_bp.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@analysis_bp.after_request
+def record_request_metrics(response):
+    """زمن طلب التحليل الكامل وعدد الطلبات حسب الحالة"""
+    if request.endpoint == 'analysis.analyze_signal':
+        analyze_requests.inc(str(response.status_code))
+        stage_seconds.observe(time.perf_counter() - g.request_started, 'request', '', '')
+    return response
 
 @analysis_bp.route('/analyze', methods=['POST'])
 def analyze_signal():
@@ -37,182 +69,44 @@ def analyze_signal():
         # الحصول على البيانات من الطلب
         data = request.get_json() or {}
         asset = data.get('asset', 'EURUSD_OTC')
+        timeframes = data.get('timeframes')
+        supported = signal_service.trading_strategy.timeframe_weights
+        if timeframes is not None and (
+            not isinstance(timeframes, list) or not timeframes or
+            not all(isinstance(timeframe, str) and timeframe in supported for timeframe in timeframes)
+        ):
+            return jsonify({
+                'success': False,
+                'message': 'معامل timeframes غير صالح',
+                'error': f"يجب أن يكون قائمة من: {', '.join(supported)}"
+            }), 400
+        try:
+            fields, compact = response_options()
+        except InvalidFieldsError as e:
+            return jsonify({
+                'success': False,
+                'message': 'معامل fields غير صالح',
+                'error': str(e)
+            }), 400
         
-        # محاكاة الاتصال بـ Pocket Option
-        time.sleep(0.1)  # محاكاة تأخير الاتصال
-        
-        # تحليل عينة من الأطر الزمنية (للاختبار)
-        test_timeframes = ['1m', '5m', '15m', '30m', '1h']
-        timeframe_analyses = []
-        
-        for timeframe in test_timeframes:
-            try:
-                # محاكاة جلب بيانات الشموع
-                from src.models.schemas import CandleData
-                import random
-                from datetime import timedelta
-                
-                # توليد بيانات تجريبية
-                candles = []
-                base_price = 1.1000
-                current_time = datetime.now()
-                
-                for i in range(50):
-                    timestamp = current_time - timedelta(minutes=i)
-                    price_change = random.uniform(-0.002, 0.002)
-                    open_price = base_price + price_change
-                    close_price = open_price + random.uniform(-0.001, 0.001)
-                    high_price = max(open_price, close_price) + random.uniform(0, 0.0005)
-                    low_price = min(open_price, close_price) - random.uniform(0, 0.0005)
-                    
-                    candle = CandleData(
-                        timestamp=timestamp,
-                        open=round(open_price, 5),
-                        high=round(high_price, 5),
-                        low=round(low_price, 5),
-                        close=round(close_price, 5),
-                        volume=random.uniform(1000, 5000)
-                    )
-                    candles.append(candle)
-                
-                # تحليل نماذج الشموع
-                candle_patterns = candle_analyzer.analyze_patterns(candles)
-                
-                # حساب المؤشرات الفنية
-                technical_indicators = indicator_calculator.calculate_all_indicators(candles)
-                
-                # تحليل الإطار الزمني
-                timeframe_analysis = trading_strategy.analyze_timeframe(
-                    timeframe, candle_patterns, technical_indicators
-                )
-                
-                timeframe_analyses.append(timeframe_analysis)
-                
-            except Exception as e:
-                print(f"خطأ في تحليل الإطار الزمني {timeframe}: {str(e)}")
-                continue
-        
-        if not timeframe_analyses:
+        # تشغيل خط المعالجة على حلقة الأحداث المشتركة؛ خيط الطلب ينتظر فقط
+        # بينما تتداخل عمليات جلب الشموع واستدعاءات المزودين مع الطلبات الأخرى
+        try:
+            trading_signal = background_loop.run(
+                signal_service.get_signal(asset, timeframes),
+                timeout=ANALYSIS_TIMEOUT
+            )
+        except InsufficientDataError as e:
             return jsonify({
                 'success': False,
                 'message': 'فشل في جلب البيانات أو التحليل',
-                'error': 'لا توجد بيانات كافية للتحليل'
+                'error': str(e)
             }), 400
         
-        # توليد الإشارة الفنية
-        recommendation, technical_confidence, trade_details = trading_strategy.generate_signal(
-            timeframe_analyses, asset
-        )
-        
-        # إعداد بيانات للذكاء الاصطناعي
-        ai_signal_data = {
-            'asset': asset,
-            'recommendation': recommendation,
-            'technical_confidence': technical_confidence,
-            'candle_patterns': [
-                {
-                    'name': pattern.name,
-                    'detected': pattern.detected,
-                    'signal': pattern.signal,
-                    'confidence': pattern.confidence
-                }
-                for analysis in timeframe_analyses
-                for pattern in analysis.candle_patterns
-                if pattern.detected
-            ],
-            'technical_indicators': [
-                {
-                    'name': indicator.name,
-                    'signal': indicator.signal,
-                    'value': indicator.value
-                }
-                for analysis in timeframe_analyses
-                for indicator in analysis.technical_indicators
-            ],
-            'timeframe_analyses': [
-                {
-                    'timeframe': analysis.timeframe,
-                    'signal': analysis.overall_signal,
-                    'score': analysis.score
-                }
-                for analysis in timeframe_analyses
-            ]
-        }
-        
-        # محاكاة التحقق عبر الذكاء الاصطناعي (متزامن)
-        ai_responses = []
-        
-        for handler_name, handler in ai_handlers.items():
-            try:
-                # محاكاة استجابة الذكاء الاصطناعي
-                time.sleep(0.1)  # محاكاة تأخير
-                
-                if recommendation == 'hold':
-                    approval = False
-                    confidence = 20.0
-                elif technical_confidence >= 85:
-                    approval = True
-                    confidence = min(90.0, technical_confidence)
-                else:
-                    approval = False
-                    confidence = 40.0
-                
-                ai_response = AIResponse(
-                    provider=handler_name,
-                    approval=approval,
-                    confidence=confidence,
-                    reasoning=f"تحليل محاكي من {handler_name}"
-                )
-                ai_responses.append(ai_response)
-                
-            except Exception as e:
-                print(f"خطأ في معالج الذكاء الاصطناعي {handler_name}: {str(e)}")
-                continue
-        
-        # حساب نسبة الثقة النهائية
-        ai_confidence = calculate_ai_confidence(ai_responses)
-        final_confidence = calculate_final_confidence(technical_confidence, ai_confidence)
-        
-        # إنشاء الإشارة النهائية
-        trading_signal = TradingSignal(
-            asset=asset,
-            recommendation=recommendation,
-            entry_time=trade_details.get('entry_time'),
-            trade_duration=trade_details.get('duration'),
-            target_price=trade_details.get('target_price'),
-            technical_confidence=technical_confidence,
-            ai_confidence=ai_confidence,
-            final_confidence=final_confidence,
-            timeframe_analyses=timeframe_analyses,
-            ai_responses=ai_responses,
-            created_at=datetime.now()
-        )
-        
         # إرجاع النتيجة
-        return jsonify({
-            'success': True,
-            'message': 'تم التحليل بنجاح',
-            'signal': {
-                'asset': trading_signal.asset,
-                'recommendation': trading_signal.recommendation,
-                'entry_time': trading_signal.entry_time.isoformat() if trading_signal.entry_time else None,
-                'trade_duration': trading_signal.trade_duration,
-                'target_price': trading_signal.target_price,
-                'technical_confidence': round(trading_signal.technical_confidence, 2),
-                'ai_confidence': round(trading_signal.ai_confidence, 2),
-                'final_confidence': round(trading_signal.final_confidence, 2),
-                'ai_responses': [
-                    {
-                        'provider': response.provider,
-                        'approval': response.approval,
-                        'confidence': response.confidence,
-                        'reasoning': response.reasoning
-                    }
-                    for response in trading_signal.ai_responses
-                ],
-                'created_at': trading_signal.created_at.isoformat()
-            }
-        })
+        with stage_seconds.time('serialize', '', ''):
+            body = encode_signal_response(trading_signal, fields, compact)
+        return json_response(body)
         
     except Exception as e:
         return jsonify({
@@ -221,41 +115,105 @@ def analyze_signal():
             'error': str(e)
         }), 500
 
-@analysis_bp.route('/health', methods=['GET'])
-def health_check():
-    """فحص حالة النظام"""
-    return jsonify({
-        'status': 'healthy',
-        'message': 'النظام يعمل بشكل طبيعي',
-        'timestamp': datetime.now().isoformat(),
-        'ai_providers': list(ai_handlers.keys())
-    })
+@analysis_bp.route('/signals', methods=['GET'])
+def list_signals():
+    """آخر الإشارات المحسوبة مسبقًا لقائمة المراقبة"""
+    try:
+        fields, compact = response_options()
+    except InvalidFieldsError as e:
+        return jsonify({'success': False, 'message': 'معامل fields غير صالح', 'error': str(e)}), 400
+    return json_response(encode_signals_response(dict(watchlist_scheduler.latest), fields, compact))
 
-def calculate_ai_confidence(ai_responses: List[AIResponse]) -> float:
-    """حساب متوسط ثقة الذكاء الاصطناعي"""
-    if not ai_responses:
-        return 0.0
+@analysis_bp.route('/signals/stream', methods=['GET'])
+def stream_signals():
+    """
+    بث الإشارات عبر Server-Sent Events
     
-    # حساب متوسط الثقة للاستجابات المؤيدة فقط
-    approving_responses = [r for r in ai_responses if r.approval]
+    ?assets=EURUSD_OTC,GBPUSD_OTC يحدد الأصول (تُراقب ما دام الاتصال مفتوحًا إن لم تكن
+    في قائمة المراقبة)؛ بدونها تُبث كل أصول قائمة المراقبة. الحساب يتم مرة واحدة لكل
+    شمعة مهما كان عدد العملاء. عند بلوغ الحد الأقصى للبث المفتوح تُرجع 503.
+    """
+    assets = [asset.strip() for asset in request.args.get('assets', '').split(',') if asset.strip()]
+    subscription = signal_hub.subscribe(assets or None)
+    if subscription is None:
+        response = jsonify({
+            'success': False,
+            'message': 'تم بلوغ الحد الأقصى لعملاء البث، أعد المحاولة لاحقًا'
+        })
+        response.headers['Retry-After'] = str(int(signal_hub.heartbeat_interval))
+        return response, 503
+    if assets and not watchlist_scheduler.watch(assets):
+        signal_hub.unsubscribe(subscription)
+        return jsonify({
+            'success': False,
+            'message': 'تم تجاوز الحد الأقصى لأصول قائمة المراقبة'
+        }), 400
     
-    if not approving_responses:
-        return 0.0
+    closed = []
     
-    total_confidence = sum(r.confidence for r in approving_responses)
-    return total_confidence / len(approving_responses)
-
-def calculate_final_confidence(technical_confidence: float, ai_confidence: float) -> float:
-    """حساب نسبة الثقة النهائية"""
-    # وزن التحليل الفني: 60%
-    # وزن الذكاء الاصطناعي: 40%
-    technical_weight = 0.6
-    ai_weight = 0.4
+    def close_stream():
+        # يُستدعى من نهاية المولد ومن إغلاق الاستجابة؛ التحرير مرة واحدة فقط
+        if not closed:
+            closed.append(True)
+            signal_hub.unsubscribe(subscription)
+            watchlist_scheduler.unwatch(assets)
+    
+    def events():
+        try:
+            yield 'retry: 3000\n\n'
+            while not subscription.dropped:
+                message = subscription.get(timeout=signal_hub.heartbeat_interval)
+                # تعليق SSE كنبضة حياة يبقي الاتصال مفتوحًا عبر الوسطاء
+                yield message if message is not None else ': heartbeat\n\n'
+        finally:
+            close_stream()
     
-    final_confidence = (
-        (technical_confidence * technical_weight) + 
-        (ai_confidence * ai_weight)
+    response = Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
     )
+    # المولد الذي لم يبدأ لا ينفذ finally عند إغلاقه
+    response.call_on_close(close_stream)
+    return response
+
+@analysis_bp.route('/signals/<asset>', methods=['GET'])
+def get_latest_signal(asset):
+    """آخر إشارة محسوبة مسبقًا لأصل من قائمة المراقبة (من الذاكرة)"""
+    try:
+        fields, compact = response_options()
+    except InvalidFieldsError as e:
+        return jsonify({'success': False, 'message': 'معامل fields غير صالح', 'error': str(e)}), 400
+    
+    trading_signal = watchlist_scheduler.get_latest(asset)
+    if trading_signal is None:
+        return jsonify({
+            'success': False,
+            'message': 'لا توجد إشارة محسوبة لهذا الأصل بعد'
+        }), 404
     
-    return round(final_confidence, 2)
+    return json_response(encode_signal_response(trading_signal, fields, compact, message='آخر إشارة محسوبة'))
 
+@analysis_bp.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """المقاييس بصيغة Prometheus النصية"""
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@analysis_bp.route('/health', methods=['GET'])
+def health_check():
+    """فحص حالة النظام"""
+    return jsonify({
+        'status': 'healthy',
+        'message': 'النظام يعمل بشكل طبيعي',
+        'timestamp': datetime.now().isoformat(),
+        'ai_providers': list(ai_handlers.keys()),
+        'ai_cache': BaseAIHandler.verdict_cache.stats(),
+        'ai_provider_health': BaseAIHandler.provider_health.stats(),
+        'http_pool': BaseAIHandler.http_pool.stats(),
+        'candle_cache': signal_service.api.cache_stats(),
+        'candle_feed': signal_service.api.feed_stats(),
+        'candle_store': signal_service.api.store_stats(),
+        'single_flight': signal_service.single_flight.stats(),
+        'watchlist': watchlist_scheduler.stats(),
+        'signal_stream': signal_hub.stats()
+    })
@@ -0,0 +1,90 @@
+import asyncio
+import atexit
+import os
+import threading
+from typing import Any, Awaitable, Callable, List, Optional
+
+
+class BackgroundEventLoop:
+    """
+    حلقة أحداث دائمة تعمل في خيط خلفي داخل كل عملية (worker)
+
+    تسمح لمسارات Flask المتزامنة بتنفيذ الكوروتينات على حلقة واحدة مشتركة،
+    فتبقى الاتصالات المجمعة (HTTP keep-alive) صالحة بين الطلبات.
+    تُنشأ الحلقة عند أول استخدام وبعد كل fork، وتُغلق بنظافة عند الخروج.
+    """
+
+    def __init__(self, name: str = "signals-event-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._shutdown_hooks: List[Callable[[], Awaitable[Any]]] = []
+        atexit.register(self.shutdown)
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """الحلقة الخلفية (تبدأ عند الحاجة)"""
+        self._ensure_started()
+        return self._loop
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=self._run_forever, args=(loop,), name=self.name, daemon=True)
+            self._loop, self._thread, self._pid = loop, thread, os.getpid()
+            thread.start()
+
+    @staticmethod
+    def _run_forever(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """تنفيذ كوروتين على الحلقة الخلفية وانتظار نتيجته من خيط متزامن"""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def submit(self, coro: Awaitable[Any]):
+        """جدولة كوروتين على الحلقة الخلفية دون انتظار (يُرجع concurrent Future)"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def add_shutdown_hook(self, hook: Callable[[], Awaitable[Any]]):
+        """تسجيل كوروتين يُنفذ على الحلقة قبل إيقافها (مثل إغلاق عملاء HTTP)"""
+        self._shutdown_hooks.append(hook)
+
+    def shutdown(self, timeout: float = 5.0):
+        """تنفيذ خطافات الإغلاق ثم إيقاف الحلقة وانتظار الخيط"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or self._pid != os.getpid() or not thread.is_alive():
+                return
+            self._loop = None
+
+        async def _run_hooks():
+            for hook in self._shutdown_hooks:
+                try:
+                    await hook()
+                except Exception as e:
+                    print(f"خطأ أثناء إغلاق الحلقة الخلفية: {str(e)}")
+
+        try:
+            asyncio.run_coroutine_threadsafe(_run_hooks(), loop).result(timeout)
+        except Exception as e:
+            print(f"خطأ أثناء إغلاق الحلقة الخلفية: {str(e)}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+
+
+# حلقة عامة مشتركة لكل العملية
+background_loop = BackgroundEventLoop()
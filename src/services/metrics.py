@@ -0,0 +1,204 @@
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+# حدود الدلاء الافتراضية بالثواني (من 0.5ms حتى 30s لتغطية المؤشرات واستدعاءات المزودين)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple[str, str] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """عداد تراكمي بتسميات"""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    مدرج تكراري بتسميات (دلاء تراكمية بصيغة Prometheus)
+
+    كل ملاحظة تكلف بحثًا ثنائيًا وزيادة عدادين تحت قفل قصير.
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # لكل مجموعة تسميات: [عدادات الدلاء (غير تراكمية) + دلو +Inf، المجموع]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        """قياس زمن كتلة بالثواني"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(series[0]), series[1]) for labels, series in self._series.items()]
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                label_text = _format_labels(self.label_names, labels, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    سجل المقاييس لكل عملية مع التصدير بصيغة Prometheus النصية
+
+    إضافة إلى العدادات والمدرجات، تُصدَّر إحصائيات المكونات الموجودة (stats())
+    كمقاييس gauge عبر دوال تُستدعى عند كل قراءة.
+    """
+
+    def __init__(self, namespace: str = "smartpocket"):
+        self.namespace = namespace
+        self._metrics: Dict[str, Any] = {}
+        self._stats_sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(f"{self.namespace}_{name}", documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(f"{self.namespace}_{name}", documentation, label_names, buckets))
+
+    def register_stats(self, component: str, source: Callable[[], Dict[str, Any]]):
+        """تصدير القيم الرقمية من stats() لمكون كمقاييس gauge"""
+        self._stats_sources[component] = source
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        """كل المقاييس بصيغة Prometheus النصية (0.0.4)"""
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+
+        for component, source in list(self._stats_sources.items()):
+            try:
+                stats = source()
+            except Exception as e:
+                print(f"خطأ في قراءة إحصائيات {component}: {str(e)}")
+                continue
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"{self.namespace}_{component}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+# سجل عام لكل عملية
+metrics = MetricsRegistry()
+
+# زمن كل مرحلة في خط المعالجة (timeframe و provider فارغان حيث لا ينطبقان)
+stage_seconds = metrics.histogram(
+    "stage_duration_seconds",
+    "Duration of each analysis pipeline stage in seconds",
+    ("stage", "timeframe", "provider")
+)
+provider_errors = metrics.counter(
+    "ai_provider_errors_total",
+    "AI provider calls that returned an error response",
+    ("provider",)
+)
+provider_timeouts = metrics.counter(
+    "ai_provider_timeouts_total",
+    "AI provider calls that timed out (fan-out deadline or the provider's HTTP timeout)",
+    ("provider",)
+)
+analyze_requests = metrics.counter(
+    "analyze_requests_total",
+    "Requests to /api/analyze by HTTP status",
+    ("status",)
+)
+provider_hedges = metrics.counter(
+    "ai_provider_hedges_total",
+    "Backup provider requests fired for a slow or failed primary",
+    ("provider",)
+)
+provider_skipped = metrics.counter(
+    "ai_provider_skipped_total",
+    "AI provider calls skipped because the circuit breaker was open",
+    ("provider",)
+)
+prompt_tokens = metrics.histogram(
+    "ai_prompt_tokens",
+    "Estimated prompt size in tokens per AI provider call",
+    ("provider", "mode"),
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096)
+)
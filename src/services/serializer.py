@@ -0,0 +1,125 @@
+import json
+from typing import Any, Dict, Iterable, Optional, Sequence
+from src.models.results import SignalResult
+
+# orjson اختياري: أسرع بعدة مرات ويُرجع bytes مباشرة؛ بدونه نعود إلى json القياسي
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# الحقول الافتراضية للإشارة (شكل الاستجابة الحالي)
+DEFAULT_FIELDS = (
+    "asset", "recommendation", "entry_time", "trade_duration", "target_price",
+    "technical_confidence", "ai_confidence", "final_confidence", "ai_responses", "created_at"
+)
+
+# حقول إضافية تُطلب صراحة عبر fields
+OPTIONAL_FIELDS = ("timeframe_analyses",)
+
+SIGNAL_FIELDS = DEFAULT_FIELDS + OPTIONAL_FIELDS
+
+
+class InvalidFieldsError(ValueError):
+    """حقول غير معروفة في معامل fields"""
+    pass
+
+
+def dumps(payload: Any) -> bytes:
+    """ترميز JSON مضغوط إلى bytes (UTF-8 بدون هروب للحروف العربية)"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def parse_fields(value: Optional[str]) -> Optional[Sequence[str]]:
+    """تحليل معامل fields (قائمة مفصولة بفواصل) مع رفض الحقول غير المعروفة"""
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in SIGNAL_FIELDS]
+    if unknown:
+        raise InvalidFieldsError(f"حقول غير معروفة: {', '.join(unknown)}")
+    return fields
+
+
+def parse_flag(value: Optional[str]) -> bool:
+    return (value or "").lower() in ("1", "true", "yes")
+
+
+def serialize_signal(trading_signal: SignalResult, fields: Iterable[str] = None,
+                     compact: bool = False) -> Dict[str, Any]:
+    """
+    تحويل الإشارة إلى قاموس JSON
+
+    Args:
+        fields: الحقول المطلوبة (الافتراضي DEFAULT_FIELDS)
+        compact: حذف نصوص reasoning وتفاصيل الأطر الزمنية
+    """
+    fields = DEFAULT_FIELDS if fields is None else fields
+    signal: Dict[str, Any] = {}
+
+    for field in fields:
+        if field == "entry_time":
+            entry_time = trading_signal.entry_time
+            signal[field] = entry_time.isoformat() if entry_time else None
+        elif field == "created_at":
+            signal[field] = trading_signal.created_at.isoformat()
+        elif field in ("technical_confidence", "ai_confidence", "final_confidence"):
+            signal[field] = round(getattr(trading_signal, field), 2)
+        elif field == "ai_responses":
+            if compact:
+                signal[field] = [
+                    {"provider": response.provider, "approval": response.approval, "confidence": response.confidence}
+                    for response in trading_signal.ai_responses
+                ]
+            else:
+                signal[field] = [
+                    {
+                        "provider": response.provider,
+                        "approval": response.approval,
+                        "confidence": response.confidence,
+                        "reasoning": response.reasoning
+                    }
+                    for response in trading_signal.ai_responses
+                ]
+        elif field == "timeframe_analyses":
+            if not compact:
+                signal[field] = [
+                    {
+                        "timeframe": analysis.timeframe,
+                        "signal": analysis.overall_signal,
+                        "score": round(analysis.score, 2),
+                        "patterns": [pattern.name for pattern in analysis.candle_patterns if pattern.detected],
+                        "indicators": {
+                            indicator.name: indicator.signal for indicator in analysis.technical_indicators
+                        }
+                    }
+                    for analysis in trading_signal.timeframe_analyses
+                ]
+        else:
+            signal[field] = getattr(trading_signal, field)
+
+    return signal
+
+
+def encode_signal_response(trading_signal: SignalResult, fields: Iterable[str] = None, compact: bool = False,
+                           message: str = "تم التحليل بنجاح") -> bytes:
+    """استجابة التحليل كاملة مرمزة مباشرة إلى bytes"""
+    payload: Dict[str, Any] = {"success": True}
+    if not compact:
+        payload["message"] = message
+    payload["signal"] = serialize_signal(trading_signal, fields, compact)
+    return dumps(payload)
+
+
+def encode_signals_response(signals: Dict[str, SignalResult], fields: Iterable[str] = None,
+                            compact: bool = False) -> bytes:
+    """استجابة قائمة إشارات {أصل: إشارة} مرمزة إلى bytes"""
+    return dumps({
+        "success": True,
+        "signals": {
+            asset: serialize_signal(trading_signal, fields, compact)
+            for asset, trading_signal in signals.items()
+        }
+    })
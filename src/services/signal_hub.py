@@ -0,0 +1,143 @@
+import queue
+import threading
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+from src.models.results import SignalResult
+from src.services.serializer import dumps, serialize_signal
+from config import config_manager
+
+
+class SignalSubscription:
+    """اشتراك عميل واحد في البث: طابور إرسال محدود السعة"""
+
+    def __init__(self, assets: Optional[Iterable[str]], queue_size: int):
+        self.assets: Optional[Set[str]] = set(assets) if assets else None
+        self.queue: "queue.Queue[str]" = queue.Queue(queue_size)
+        self.dropped = False
+
+    def wants(self, asset: str) -> bool:
+        return self.assets is None or asset in self.assets
+
+    def get(self, timeout: float) -> Optional[str]:
+        """الرسالة التالية، أو None عند انتهاء المهلة (وقت نبضة الحياة)"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class SignalHub:
+    """
+    موزع الإشارات على العملاء المشتركين (Server-Sent Events)
+
+    كل إشارة تُسلسل مرة واحدة إلى إطار SSE وتُوزع على طوابير العملاء،
+    وتُنشر فقط إذا تغيرت الإشارة فعليًا. العميل الذي يمتلئ طابوره يُفصل
+    بدل إبطاء البقية، ويعيد المتصفح الاتصال تلقائيًا.
+
+    كل بث مفتوح يشغل خيط طلب حتى يُلغى اشتراكه، لذلك يُرفض الاشتراك بعد
+    max_clients بثًا مفتوحًا كي تبقى خيوط حرة لطلبات التحليل.
+    """
+
+    def __init__(self, queue_size: int = 32, heartbeat_interval: float = 15.0, max_clients: int = 16):
+        self.queue_size = queue_size
+        self.heartbeat_interval = heartbeat_interval
+        self.max_clients = max(1, max_clients)
+        self._subscribers: Set[SignalSubscription] = set()
+        self._open: Set[SignalSubscription] = set()
+        self._latest: Dict[str, Tuple[Tuple, str]] = {}
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+        self.published = 0
+        self.unchanged = 0
+        self.delivered = 0
+        self.dropped_clients = 0
+        self.rejected_clients = 0
+
+    def subscribe(self, assets: Optional[Iterable[str]] = None) -> Optional[SignalSubscription]:
+        """اشتراك جديد يبدأ بآخر إشارة معروفة لكل أصل مطلوب (None عند بلوغ max_clients)"""
+        subscription = SignalSubscription(assets, self.queue_size)
+        with self._lock:
+            if len(self._open) >= self.max_clients:
+                self.rejected_clients += 1
+                return None
+            self._open.add(subscription)
+            for asset, (_, message) in self._latest.items():
+                if subscription.wants(asset) and not subscription.queue.full():
+                    subscription.queue.put_nowait(message)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: SignalSubscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+            self._open.discard(subscription)
+
+    def forget(self, asset: str):
+        """حذف آخر إشارة منشورة لأصل خرج من المراقبة كي لا تُعاد لمشترك جديد كأنها حالية"""
+        with self._lock:
+            self._latest.pop(asset, None)
+
+    def publish(self, asset: str, trading_signal: SignalResult) -> bool:
+        """نشر إشارة إذا تغيرت عن آخر إشارة منشورة للأصل نفسه"""
+        fingerprint = publish_key(trading_signal)
+        with self._lock:
+            previous = self._latest.get(asset)
+            if previous is not None and previous[0] == fingerprint:
+                self.unchanged += 1
+                return False
+
+            self._sequence += 1
+            message = format_event("signal", serialize_signal(trading_signal), self._sequence)
+            self._latest[asset] = (fingerprint, message)
+            self.published += 1
+
+            for subscription in list(self._subscribers):
+                if not subscription.wants(asset):
+                    continue
+                try:
+                    subscription.queue.put_nowait(message)
+                    self.delivered += 1
+                except queue.Full:
+                    # مستهلك بطيء: يُفصل ويعيد الاتصال لاحقًا بلقطة حديثة
+                    subscription.dropped = True
+                    self._subscribers.discard(subscription)
+                    self.dropped_clients += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """إحصائيات البث"""
+        return {
+            "clients": len(self._subscribers),
+            "open_streams": len(self._open),
+            "max_clients": self.max_clients,
+            "rejected_clients": self.rejected_clients,
+            "assets": len(self._latest),
+            "published": self.published,
+            "unchanged": self.unchanged,
+            "delivered": self.delivered,
+            "dropped_clients": self.dropped_clients
+        }
+
+
+def publish_key(trading_signal: SignalResult) -> Tuple:
+    """الحقول التي يعني تغيرها إشارة جديدة (بدون وقت الإنشاء)"""
+    return (
+        trading_signal.recommendation,
+        round(trading_signal.final_confidence, 2),
+        trading_signal.entry_time,
+        trading_signal.trade_duration,
+        trading_signal.target_price
+    )
+
+
+def format_event(event: str, payload: Dict[str, Any], event_id: int) -> str:
+    """إطار Server-Sent Events"""
+    return f"id: {event_id}\nevent: {event}\ndata: {dumps(payload).decode('utf-8')}\n\n"
+
+
+# موزع عام لكل عملية
+signal_hub = SignalHub(
+    queue_size=config_manager.get_signal_stream_config().get("client_queue_size", 32),
+    heartbeat_interval=config_manager.get_signal_stream_config().get("heartbeat_interval", 15.0),
+    max_clients=config_manager.get_signal_stream_config().get("max_clients", 16)
+)
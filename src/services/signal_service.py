@@ -0,0 +1,301 @@
+import asyncio
+import contextlib
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+from src.api.pocket_option import pocket_option_api, PocketOptionAPI, timeframe_to_seconds
+from src.analyzers.candle_patterns import CandlePatternAnalyzer
+from src.analyzers.indicator_calculator import TechnicalIndicatorCalculator
+from src.analyzers.trading_strategy import TradingStrategy
+from src.ai_layer.base import BaseAIHandler
+from src.ai_layer.chatgpt_handler import ChatGPTHandler
+from src.ai_layer.deepseek import DeepSeekHandler
+from src.ai_layer.groq_handler import GroqHandler
+from src.ai_layer.manus_handler import ManusHandler
+from src.ai_layer.grok_handler import GrokHandler
+from src.ai_layer.fanout import collect_ai_responses
+from src.services.single_flight import SingleFlightCache
+from src.services.metrics import stage_seconds
+from src.models.schemas import AIResponse
+from src.models.results import SignalResult, TimeframeResult
+from src.models.candle_frame import CandleFrame
+from config import config_manager
+
+
+class InsufficientDataError(Exception):
+    """لا توجد بيانات كافية لتحليل أي إطار زمني"""
+    pass
+
+
+class SignalService:
+    """
+    خط معالجة الإشارة غير المتزامن: جلب الشموع ← النماذج والمؤشرات ← الاستراتيجية ← الذكاء الاصطناعي
+
+    يعمل على حلقة الأحداث الخلفية، فتتداخل عمليات جلب الشموع واستدعاءات المزودين
+    بين الطلبات المتزامنة داخل العملية نفسها.
+    """
+
+    def __init__(self, api: PocketOptionAPI = None, handlers: Dict[str, BaseAIHandler] = None,
+                 candle_count: int = 50):
+        self.api = api or pocket_option_api
+        self.candle_analyzer = CandlePatternAnalyzer()
+        self.indicator_calculator = TechnicalIndicatorCalculator()
+        self.trading_strategy = TradingStrategy()
+        self.ai_handlers = handlers if handlers is not None else create_ai_handlers()
+        self.candle_count = candle_count
+        self.single_flight = SingleFlightCache()
+        self.backend_semaphore: Optional[asyncio.Semaphore] = None
+        self.ai_semaphore: Optional[asyncio.Semaphore] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+
+    def get_enabled_ai_handlers(self) -> Dict[str, BaseAIHandler]:
+        """المعالجات التي فُعّل مزودها في التكوين ولديها مفتاح API"""
+        return {
+            name: handler
+            for name, handler in self.ai_handlers.items()
+            if config_manager.is_provider_enabled(handler.config_key)
+        }
+
+    def _limit(self, name: str):
+        """سيمافور حد التزامن (يُنشأ عند أول استخدام على حلقة الأحداث الخلفية)"""
+        limits = config_manager.get_concurrency_config()
+        if name == 'backend':
+            if self.backend_semaphore is None and limits.get('max_backend_requests'):
+                self.backend_semaphore = asyncio.Semaphore(limits['max_backend_requests'])
+            return self.backend_semaphore or contextlib.nullcontext()
+        if self.ai_semaphore is None and limits.get('max_ai_requests'):
+            self.ai_semaphore = asyncio.Semaphore(limits['max_ai_requests'])
+        return self.ai_semaphore or contextlib.nullcontext()
+
+    async def ensure_connected(self):
+        """الاتصال بـ Pocket Option مرة واحدة لكل عملية"""
+        if self.api.connected:
+            return
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if not self.api.connected:
+                await self.api.connect()
+
+    async def fetch_candles(self, asset: str, timeframes: Sequence[str]) -> Dict[str, CandleFrame]:
+        """جلب أدق إطار زمني مرة واحدة واشتقاق بقية الأطر منه (إطار فارغ عند الفشل)"""
+        await self.ensure_connected()
+        try:
+            async with self._limit('backend'):
+                with stage_seconds.time('fetch_candles', '', ''):
+                    return await self.api.get_resampled_candles(asset, list(timeframes), self.candle_count)
+        except Exception as e:
+            print(f"خطأ في جلب شموع {asset}: {str(e)}")
+            return {}
+
+    def analyze_timeframes(self, frames: Dict[str, CandleFrame]) -> List[TimeframeResult]:
+        """تحليل النماذج والمؤشرات لكل إطار زمني"""
+        timeframe_analyses = []
+        for timeframe, candles in frames.items():
+            try:
+                # تحليل نماذج الشموع
+                with stage_seconds.time('patterns', timeframe, ''):
+                    candle_patterns = self.candle_analyzer.analyze_patterns(candles)
+
+                # حساب المؤشرات الفنية
+                with stage_seconds.time('indicators', timeframe, ''):
+                    technical_indicators = self.indicator_calculator.calculate_all_indicators(candles)
+
+                # تحليل الإطار الزمني
+                with stage_seconds.time('timeframe_score', timeframe, ''):
+                    timeframe_analyses.append(self.trading_strategy.analyze_timeframe(
+                        timeframe, candle_patterns, technical_indicators
+                    ))
+
+            except Exception as e:
+                print(f"خطأ في تحليل الإطار الزمني {timeframe}: {str(e)}")
+                continue
+        return timeframe_analyses
+
+    async def validate_with_ai(self, signal_data: Dict[str, Any]) -> List[AIResponse]:
+        """التحقق عبر الذكاء الاصطناعي: المزودون الأساسيون بالتوازي حتى اكتمال النصاب، والاحتياطيون عند البطء أو الفشل"""
+        enabled_handlers = self.get_enabled_ai_handlers()
+
+        if not enabled_handlers:
+            # لا يوجد مزود مفعل: استجابات محاكاة للتطوير
+            return simulate_ai_responses(
+                self.ai_handlers, signal_data['recommendation'], signal_data['technical_confidence']
+            )
+
+        async with self._limit('ai'):
+            return await collect_ai_responses(
+                enabled_handlers,
+                signal_data,
+                min_approvals=config_manager.get_confidence_config().get('min_ai_approvals', 2),
+                timeouts={
+                    name: config_manager.get_ai_config(handler.config_key).get('timeout', 15)
+                    for name, handler in enabled_handlers.items()
+                },
+                backups=config_manager.get_ai_resilience_config().get('backup_providers', ())
+            )
+
+    async def get_signal(self, asset: str, timeframes: Sequence[str] = None) -> SignalResult:
+        """
+        الإشارة الحالية مع دمج الطلبات المتزامنة
+
+        المفتاح (أصل، مجموعة الأطر، شمعة أدق إطار الحالية): الطلبات المتطابقة المتزامنة
+        تنتظر حسابًا واحدًا، والنتيجة تُخدم من الذاكرة حتى إغلاق الشمعة التالية.
+        """
+        timeframes = list(timeframes or self.trading_strategy.timeframe_weights)
+        base_seconds = min(timeframe_to_seconds(timeframe) for timeframe in timeframes)
+        bucket = int(time.time() // base_seconds)
+
+        return await self.single_flight.run(
+            (asset, tuple(sorted(set(timeframes))), bucket),
+            lambda: self.compute_signal(asset, timeframes),
+            expires_at=(bucket + 1) * base_seconds
+        )
+
+    async def compute_signal(self, asset: str, timeframes: Sequence[str] = None) -> SignalResult:
+        """تشغيل خط المعالجة كاملاً لأصل واحد"""
+        timeframes = list(timeframes or self.trading_strategy.timeframe_weights)
+
+        frames = await self.fetch_candles(asset, timeframes)
+        timeframe_analyses = self.analyze_timeframes(frames)
+
+        if not timeframe_analyses:
+            raise InsufficientDataError('لا توجد بيانات كافية للتحليل')
+
+        # توليد الإشارة الفنية
+        with stage_seconds.time('signal', '', ''):
+            recommendation, technical_confidence, trade_details = self.trading_strategy.generate_signal(
+                timeframe_analyses, asset
+            )
+
+        with stage_seconds.time('ai_validation', '', ''):
+            ai_responses = await self.validate_with_ai(
+                build_ai_signal_data(asset, recommendation, technical_confidence, timeframe_analyses)
+            )
+
+        # حساب نسبة الثقة النهائية
+        ai_confidence = calculate_ai_confidence(ai_responses)
+        final_confidence = calculate_final_confidence(technical_confidence, ai_confidence)
+
+        # إنشاء الإشارة النهائية
+        return SignalResult(
+            asset=asset,
+            recommendation=recommendation,
+            entry_time=trade_details.get('entry_time'),
+            trade_duration=trade_details.get('duration'),
+            target_price=trade_details.get('target_price'),
+            technical_confidence=technical_confidence,
+            ai_confidence=ai_confidence,
+            final_confidence=final_confidence,
+            timeframe_analyses=timeframe_analyses,
+            ai_responses=ai_responses,
+            created_at=datetime.now()
+        )
+
+
+def create_ai_handlers() -> Dict[str, BaseAIHandler]:
+    """إنشاء معالجات الذكاء الاصطناعي بمفاتيحها من التكوين"""
+    return {
+        'chatgpt': ChatGPTHandler(config_manager.get_ai_config('openai').get('api_key')),
+        'deepseek': DeepSeekHandler(config_manager.get_ai_config('deepseek').get('api_key')),
+        'groq': GroqHandler(config_manager.get_ai_config('groq').get('api_key')),
+        'manus': ManusHandler(config_manager.get_ai_config('manus').get('api_key')),
+        'grok': GrokHandler(config_manager.get_ai_config('grok').get('api_key'))
+    }
+
+
+def build_ai_signal_data(asset: str, recommendation: str, technical_confidence: float,
+                         timeframe_analyses: List[TimeframeResult]) -> Dict[str, Any]:
+    """إعداد بيانات الإشارة المرسلة للذكاء الاصطناعي"""
+    return {
+        'asset': asset,
+        'recommendation': recommendation,
+        'technical_confidence': technical_confidence,
+        'candle_patterns': [
+            {
+                'timeframe': analysis.timeframe,
+                'name': pattern.name,
+                'detected': pattern.detected,
+                'signal': pattern.signal,
+                'confidence': pattern.confidence
+            }
+            for analysis in timeframe_analyses
+            for pattern in analysis.candle_patterns
+            if pattern.detected
+        ],
+        'technical_indicators': [
+            {
+                'timeframe': analysis.timeframe,
+                'name': indicator.name,
+                'signal': indicator.signal,
+                'value': indicator.value
+            }
+            for analysis in timeframe_analyses
+            for indicator in analysis.technical_indicators
+        ],
+        'timeframe_analyses': [
+            {
+                'timeframe': analysis.timeframe,
+                'signal': analysis.overall_signal,
+                'score': analysis.score
+            }
+            for analysis in timeframe_analyses
+        ]
+    }
+
+
+def simulate_ai_responses(handlers: Dict[str, BaseAIHandler], recommendation: str,
+                          technical_confidence: float) -> List[AIResponse]:
+    """استجابات ذكاء اصطناعي محاكاة عند عدم تفعيل أي مزود"""
+    if recommendation == 'hold':
+        approval = False
+        confidence = 20.0
+    elif technical_confidence >= 85:
+        approval = True
+        confidence = min(90.0, technical_confidence)
+    else:
+        approval = False
+        confidence = 40.0
+
+    return [
+        AIResponse(
+            provider=handler_name,
+            approval=approval,
+            confidence=confidence,
+            reasoning=f"تحليل محاكي من {handler_name}"
+        )
+        for handler_name in handlers
+    ]
+
+
+def calculate_ai_confidence(ai_responses: List[AIResponse]) -> float:
+    """حساب متوسط ثقة الذكاء الاصطناعي"""
+    if not ai_responses:
+        return 0.0
+
+    # حساب متوسط الثقة للاستجابات المؤيدة فقط
+    approving_responses = [r for r in ai_responses if r.approval]
+
+    if not approving_responses:
+        return 0.0
+
+    total_confidence = sum(r.confidence for r in approving_responses)
+    return total_confidence / len(approving_responses)
+
+
+def calculate_final_confidence(technical_confidence: float, ai_confidence: float) -> float:
+    """حساب نسبة الثقة النهائية"""
+    # وزن التحليل الفني: 60%
+    # وزن الذكاء الاصطناعي: 40%
+    technical_weight = 0.6
+    ai_weight = 0.4
+
+    final_confidence = (
+        (technical_confidence * technical_weight) +
+        (ai_confidence * ai_weight)
+    )
+
+    return round(final_confidence, 2)
+
+
+# خدمة عامة مشتركة بين المسارات والمهام الخلفية
+signal_service = SignalService()
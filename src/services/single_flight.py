@@ -0,0 +1,82 @@
+import asyncio
+import time
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlightCache:
+    """
+    دمج الطلبات المتزامنة المتطابقة مع ذاكرة قصيرة للنتيجة
+
+    أول طلب لمفتاح ما يشغّل الحساب كمهمة مستقلة، وكل طلب مكرر أثناء التنفيذ
+    ينتظر المهمة نفسها. النتيجة تُخدم بعدها من الذاكرة حتى expires_at.
+    إلغاء أحد المنتظرين (انتهاء مهلته) لا يلغي الحساب المشترك للبقية.
+    الأخطاء لا تُخزن؛ الطلب التالي يعيد المحاولة.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+        self.computed = 0
+        self.coalesced = 0
+        self.cached_hits = 0
+        self.errors = 0
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]], expires_at: float) -> Any:
+        """
+        إرجاع النتيجة المخزنة أو انتظار الحساب الجاري أو بدء حساب جديد
+
+        Args:
+            key: مفتاح الدمج
+            factory: دالة تُرجع الكوروتين المطلوب حسابه
+            expires_at: وقت انتهاء صلاحية النتيجة (ثوانٍ منذ epoch)
+        """
+        entry = self._results.get(key)
+        if entry is not None:
+            if entry[0] > time.time():
+                self.cached_hits += 1
+                return entry[1]
+            del self._results[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            self.computed += 1
+            task.add_done_callback(partial(self._finish, key, expires_at))
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, expires_at: float, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            self.errors += 1
+            return
+        self._results[key] = (expires_at, task.result())
+        self._prune()
+
+    def _prune(self):
+        """إزالة النتائج المنتهية ثم الأقدم إدراجًا عند تجاوز الحد"""
+        now = time.time()
+        for key in [key for key, (expires_at, _) in self._results.items() if expires_at <= now]:
+            del self._results[key]
+        while len(self._results) > self.max_entries:
+            del self._results[next(iter(self._results))]
+
+    def clear(self):
+        self._results.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """إحصائيات الدمج"""
+        return {
+            "entries": len(self._results),
+            "inflight": len(self._inflight),
+            "computed": self.computed,
+            "coalesced": self.coalesced,
+            "cached_hits": self.cached_hits,
+            "errors": self.errors
+        }
@@ -0,0 +1,212 @@
+import asyncio
+import heapq
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from src.api.pocket_option import timeframe_to_seconds
+from src.models.results import SignalResult
+from src.services.async_runner import background_loop
+from src.services.signal_service import signal_service, SignalService
+from src.services.signal_hub import signal_hub, SignalHub
+from config import config_manager
+
+
+class WatchlistScheduler:
+    """
+    مجدول خلفي يحسب إشارات قائمة المراقبة مسبقًا عند إغلاق الشموع
+
+    كومة واحدة من (موعد الإغلاق التالي، أصل) بدل خيط لكل أصل: يستيقظ المجدول
+    عند أقرب حد شمعة ويعيد حساب الأصول المستحقة فقط، ويحفظ آخر إشارة لكل أصل
+    في الذاكرة. حدود التزامن مع خادم البيانات والمزودين تطبقها خدمة الإشارات.
+
+    أصول التكوين ثابتة، والأصول التي يطلبها عملاء البث تُعد مراجعها لكل اشتراك
+    وتُزال من المراقبة عند مغادرة آخر مشترك فيها.
+    """
+
+    def __init__(self, service: SignalService = None, assets: Sequence[str] = (),
+                 timeframes: Sequence[str] = None, settle_delay: float = 0.5,
+                 hub: SignalHub = None, max_assets: int = 100):
+        self.service = service or signal_service
+        self.hub = hub or signal_hub
+        self.max_assets = max_assets
+        self.timeframes = list(timeframes or self.service.trading_strategy.timeframe_weights)
+        self.assets = list(dict.fromkeys(assets))
+        self._configured = set(self.assets)
+        self._watchers: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.settle_delay = settle_delay
+        self.interval = min(timeframe_to_seconds(timeframe) for timeframe in self.timeframes)
+
+        self.latest: Dict[str, SignalResult] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._scheduled: Set[str] = set()
+        self._running: Dict[str, asyncio.Task] = {}
+        self._future = None
+        self._task: Optional[asyncio.Task] = None
+        self._start_lock = threading.Lock()
+
+        self.refreshes = 0
+        self.failures = 0
+        self.skipped = 0
+        self.unwatched = 0
+        self.last_wakeup: Optional[float] = None
+
+    @classmethod
+    def from_config(cls, service: SignalService = None) -> "WatchlistScheduler":
+        """إنشاء المجدول من إعدادات قائمة المراقبة"""
+        watchlist_config = config_manager.get_watchlist_config()
+        return cls(
+            service=service,
+            assets=watchlist_config.get("assets", []),
+            timeframes=watchlist_config.get("timeframes"),
+            settle_delay=watchlist_config.get("settle_delay", 0.5),
+            max_assets=watchlist_config.get("max_assets", 100)
+        )
+
+    @property
+    def started(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    def start(self):
+        """تشغيل المجدول على حلقة الأحداث الخلفية (مرة واحدة لكل عملية)"""
+        with self._start_lock:
+            if not self.started and self.assets:
+                self._future = background_loop.submit(self._run())
+                background_loop.add_shutdown_hook(self.aclose)
+
+    def watch(self, assets: Sequence[str]) -> bool:
+        """
+        مراقبة أصول لمشترك واحد وتشغيل المجدول عند الحاجة (آمن من خيوط الطلبات)
+
+        يُرجع False دون أي تغيير إذا تجاوزت الإضافة الحد الأقصى لعدد الأصول.
+        كل استدعاء ناجح يقابله unwatch بالأصول نفسها عند مغادرة المشترك.
+        """
+        assets = list(dict.fromkeys(assets))
+        with self._lock:
+            new_assets = [asset for asset in assets if asset not in self.assets]
+            if len(self.assets) + len(new_assets) > self.max_assets:
+                return False
+            for asset in assets:
+                if asset not in self._configured:
+                    self._watchers[asset] = self._watchers.get(asset, 0) + 1
+            self.assets.extend(new_assets)
+            started = self.started
+
+        if new_assets and started:
+            background_loop.loop.call_soon_threadsafe(self._add_assets, new_assets)
+        else:
+            self.start()
+        return True
+
+    def unwatch(self, assets: Sequence[str]):
+        """تحرير أصول مشترك غادر؛ الأصل بلا مشتركين يخرج من المراقبة عند موعده التالي"""
+        with self._lock:
+            for asset in dict.fromkeys(assets):
+                if asset not in self._watchers:
+                    continue
+                self._watchers[asset] -= 1
+                if self._watchers[asset] <= 0:
+                    del self._watchers[asset]
+                    self.assets.remove(asset)
+                    self.latest.pop(asset, None)
+                    self.hub.forget(asset)
+                    self.unwatched += 1
+
+    def _add_assets(self, assets: Sequence[str]):
+        boundary = self.next_boundary()
+        for asset in assets:
+            if asset in self._scheduled or asset not in self.assets:
+                continue
+            self._scheduled.add(asset)
+            self._refresh(asset)
+            heapq.heappush(self._heap, (boundary, asset))
+
+    def stop(self):
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+
+    async def aclose(self):
+        """إيقاف المجدول وعمليات التحديث الجارية من داخل الحلقة"""
+        tasks = [task for task in [self._task, *self._running.values()] if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_latest(self, asset: str) -> Optional[SignalResult]:
+        """آخر إشارة محسوبة للأصل (من الذاكرة)"""
+        return self.latest.get(asset)
+
+    def next_boundary(self, now: float = None) -> float:
+        """موعد إغلاق الشمعة التالية لأدق إطار زمني"""
+        now = time.time() if now is None else now
+        return (int(now // self.interval) + 1) * self.interval
+
+    async def _run(self):
+        self._task = asyncio.current_task()
+        # حساب أولي لكل الأصول ثم جدولتها على حدود الإغلاق
+        with self._lock:
+            self._scheduled = set(self.assets)
+        for asset in self._scheduled:
+            self._refresh(asset)
+        boundary = self.next_boundary()
+        self._heap = [(boundary, asset) for asset in self._scheduled]
+        heapq.heapify(self._heap)
+
+        # المجدول يبقى يعمل حتى مع قائمة فارغة ليلتقط أصول المشتركين الجدد
+        while True:
+            due_at = self._heap[0][0] if self._heap else self.next_boundary()
+            await asyncio.sleep(max(0.0, due_at + self.settle_delay - time.time()))
+            self.last_wakeup = time.time()
+
+            while self._heap and self._heap[0][0] <= due_at:
+                _, asset = heapq.heappop(self._heap)
+                if asset not in self.assets:
+                    # لم يعد له مشتركون
+                    self._scheduled.discard(asset)
+                    continue
+                self._refresh(asset)
+                heapq.heappush(self._heap, (self.next_boundary(due_at), asset))
+
+    def _refresh(self, asset: str):
+        """بدء إعادة حساب أصل ما لم يكن حسابه السابق جاريًا"""
+        if asset in self._running:
+            self.skipped += 1
+            return
+        task = asyncio.ensure_future(self._compute(asset))
+        self._running[asset] = task
+        task.add_done_callback(lambda _: self._running.pop(asset, None))
+
+    async def _compute(self, asset: str):
+        try:
+            trading_signal = await self.service.get_signal(asset, self.timeframes)
+            # تحت القفل كي لا تُنشر إشارة أصل أُزيل من المراقبة أثناء حسابها
+            with self._lock:
+                if asset not in self.assets:
+                    return
+                self.latest[asset] = trading_signal
+                self.refreshes += 1
+                self.hub.publish(asset, trading_signal)
+        except Exception as e:
+            self.failures += 1
+            print(f"خطأ في تحديث إشارة {asset}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """إحصائيات المجدول"""
+        return {
+            "running": self.started,
+            "assets": len(self.assets),
+            "max_assets": self.max_assets,
+            "subscribed_assets": len(self._watchers),
+            "unwatched": self.unwatched,
+            "signals": len(self.latest),
+            "in_progress": len(self._running),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "next_wakeup": self._heap[0][0] if self._heap else None
+        }
+
+
+# مجدول عام لكل عملية (يبدأ من main عند تفعيل قائمة المراقبة)
+watchlist_scheduler = WatchlistScheduler.from_config()
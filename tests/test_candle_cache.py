@@ -0,0 +1,100 @@
+import asyncio
+import threading
+from src.api.candle_cache import CandleStreamCache
+from src.api.market_simulator import MarketSimulator
+from src.api.pocket_option import PocketOptionAPI
+
+
+def _frame(bars: int = 100, seed: int = 1):
+    return MarketSimulator(seed=seed).generate(bars)
+
+
+def test_lru_eviction_keeps_most_recently_used_streams():
+    evicted = []
+    cache = CandleStreamCache(default_capacity=100, max_streams=2, on_evict=evicted.append)
+    cache.store("A", "1m", _frame(), 100)
+    cache.store("B", "1m", _frame(), 100)
+    assert cache.get("A", "1m") is not None
+    cache.store("C", "1m", _frame(), 100)
+
+    assert cache.get("B", "1m") is None
+    assert cache.get("A", "1m") is not None and cache.get("C", "1m") is not None
+    assert evicted == [("B", "1m")]
+    assert cache.stats()["lru_evictions"] == 1
+
+
+def test_byte_budget_evicts_and_tracks_size():
+    one_stream = CandleStreamCache(default_capacity=100).store("A", "1m", _frame(), 100).nbytes
+    cache = CandleStreamCache(default_capacity=100, max_bytes=2 * one_stream)
+    for asset in ("A", "B", "C"):
+        cache.store(asset, "1m", _frame(), 100)
+
+    stats = cache.stats()
+    assert stats["streams"] == 2
+    assert stats["bytes"] == 2 * one_stream
+    assert stats["cached_candles"] == 200
+
+    # التوسيع يُحتسب في الميزانية ويُخلي الأقدم
+    cache.grow(cache.get("C", "1m"), 200)
+    assert cache.stats()["streams"] == 1
+    assert cache.stats()["bytes"] == 2 * one_stream
+
+
+def test_idle_streams_are_evicted():
+    evicted = []
+    cache = CandleStreamCache(idle_ttl=10.0, on_evict=evicted.append)
+    buffer = cache.store("A", "1m", _frame(), 100)
+    cache.evict_idle(now=buffer.last_access + 60)
+
+    assert cache.stats()["streams"] == 0 and cache.stats()["bytes"] == 0
+    assert evicted == [("A", "1m")]
+
+
+def test_extend_appends_only_contiguous_candles():
+    frame = _frame(101)
+    cache = CandleStreamCache()
+    cache.store("A", "1m", frame[:100], 100)
+
+    assert not cache.extend("A", "1m", frame[100:], 120)
+    assert cache.extend("A", "1m", frame[100:], 60)
+    assert cache.get("A", "1m").last_timestamp == frame.timestamp[-1]
+    assert cache.stats()["pushed_candles"] == 1
+
+
+def test_stats_snapshot_while_streams_change():
+    cache = CandleStreamCache(default_capacity=10, max_streams=50)
+    frame = _frame(10)
+    errors = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                cache.stats()
+            except RuntimeError as e:
+                errors.append(e)
+                return
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for index in range(5000):
+            cache.store(f"ASSET{index}", "1m", frame, 10)
+    finally:
+        done.set()
+        reader.join()
+
+    assert errors == []
+    assert cache.stats()["streams"] == 50
+
+
+def test_evicted_streams_drop_their_locks():
+    api = PocketOptionAPI(simulator=MarketSimulator(seed=3), cache_max_streams=2)
+
+    async def scenario():
+        await api.connect()
+        for asset in ("A_OTC", "B_OTC", "C_OTC"):
+            await api.get_candles(asset, "1m", 50)
+        return set(api._stream_locks[asyncio.get_running_loop()])
+
+    assert asyncio.run(scenario()) == {("B_OTC", "1m"), ("C_OTC", "1m")}
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import time
+from contextlib import aclosing
+from src.analyzers.incremental_indicators import IncrementalIndicatorRegistry
+from src.analyzers.indicator_calculator import TechnicalIndicatorCalculator
+from src.api.candle_feed import CandleFeedClient
+from src.api.candle_store import CandleStore
+from src.api.feed_server import CandleFeedServer, _SimulatedStream
+from src.api.market_simulator import MarketSimulator
+from src.api.pocket_option import PocketOptionAPI
+
+
+async def _first_closed(api: PocketOptionAPI, asset: str, timeframe: str, timeout: float = 10.0):
+    async def wait():
+        async for update in api.subscribe(asset, timeframe):
+            if update.closed:
+                return update
+    return await asyncio.wait_for(wait(), timeout)
+
+
+def test_feed_server_closed_candles_reach_cache_and_store(tmp_path):
+    async def scenario():
+        server = await CandleFeedServer(tick_interval=0.02).start()
+        api = PocketOptionAPI(feed_url=server.url, store=CandleStore(str(tmp_path)), simulator=MarketSimulator(seed=4))
+        await api.connect()
+        try:
+            history = await api.get_candles("EURUSD_OTC", "1m", 50)
+            # ساعة مسرّعة تبدأ من الشمعة التالية للتاريخ: تُغلق خلال جزء من الثانية
+            started, first_open = time.monotonic(), int(history.timestamp[-1]) + 60
+            server.clock = lambda: first_open + (time.monotonic() - started) * 600
+            update = await _first_closed(api, "EURUSD_OTC", "1m")
+
+            buffer = api.candle_cache.get("EURUSD_OTC", "1m")
+            series = api.store.series("EURUSD_OTC", "1m")
+            return history, update, buffer.frame(1), series.tail(1), api.cache_stats(), api.feed_stats()
+        finally:
+            await api.feed.close()
+            await server.stop()
+
+    history, update, cached, stored, cache_stats, feed_stats = asyncio.run(scenario())
+
+    assert update.candle.timestamp == history.timestamp[-1] + 60
+    assert cached.timestamp[0] == stored.timestamp[0] == update.candle.timestamp
+    assert cached.close[0] == stored.close[0] == update.candle.close
+    assert cache_stats["pushed_candles"] == 1
+    assert feed_stats["messages_received"] >= 1
+
+
+def test_closed_candles_update_indicator_state_until_unsubscribe():
+    registry = IncrementalIndicatorRegistry()
+
+    async def scenario():
+        server = await CandleFeedServer(tick_interval=0.02).start()
+        api = PocketOptionAPI(feed_url=server.url, simulator=MarketSimulator(seed=6), indicators=registry)
+        await api.connect()
+        try:
+            history = await api.get_candles("EURUSD_OTC", "1m", 80)
+            started, first_open = time.monotonic(), int(history.timestamp[-1]) + 60
+            server.clock = lambda: first_open + (time.monotonic() - started) * 600
+            async with aclosing(api.subscribe("EURUSD_OTC", "1m")) as stream:
+                async for update in stream:
+                    if update.closed:
+                        break
+                state = registry.get("EURUSD_OTC", "1m")
+                subscribed = (state.count, state.last_timestamp, state.current_indicators())
+            buffer = api.candle_cache.get("EURUSD_OTC", "1m")
+            return update, buffer.frame(len(buffer)), subscribed, len(registry)
+        finally:
+            await api.feed.close()
+            await server.stop()
+
+    update, cached, (count, last_timestamp, indicators), remaining = asyncio.run(scenario())
+
+    # أول شمعة مدفوعة تبني الحالة من التاريخ المخزن بأكمله
+    assert count == len(cached) == 81
+    assert last_timestamp == update.candle.timestamp
+    batch = TechnicalIndicatorCalculator().calculate_all_indicators(cached)
+    assert [(i.name, i.signal) for i in indicators] == [(i.name, i.signal) for i in batch]
+    assert remaining == 0
+
+
+def test_client_skips_malformed_messages_and_subscribes_once():
+    received = []
+
+    async def handle(reader, writer):
+        received.append(json.loads(await reader.readline()))
+        writer.write(b'{"type": "candle", "asset": "EURUSD_OTC"\n')
+        writer.write(b'{"type": "candle", "asset": "EURUSD_OTC", "timeframe": "1m"}\n')
+        writer.write(b'[1, 2]\n')
+        writer.write((json.dumps({
+            "type": "candle", "asset": "EURUSD_OTC", "timeframe": "1m", "closed": True,
+            "t": 60, "o": 1.1, "h": 1.2, "l": 1.0, "c": 1.15, "v": 10
+        }) + "\n").encode())
+        await writer.drain()
+        try:
+            line = await asyncio.wait_for(reader.readline(), 0.3)
+            if line:
+                received.append(json.loads(line))
+        except asyncio.TimeoutError:
+            pass
+
+    async def scenario():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        client = CandleFeedClient(f"tcp://127.0.0.1:{port}")
+        try:
+            stream = client.subscribe("EURUSD_OTC", "1m")
+            update = await asyncio.wait_for(stream.__anext__(), 5)
+            await asyncio.sleep(0.4)
+            return update, client.stats()
+        finally:
+            await client.close()
+            server.close()
+
+    update, stats = asyncio.run(scenario())
+
+    assert update.closed and update.candle.timestamp == 60 and update.candle.close == 1.15
+    assert stats["malformed_messages"] == 3
+    assert stats["messages_received"] == 1
+    assert [message["op"] for message in received] == ["subscribe"]
+
+
+def test_simulated_stream_closes_simulator_candles():
+    now = [600.0]
+    stream = _SimulatedStream(60, 1.1, lambda: now[0], MarketSimulator(seed=12))
+    expected = MarketSimulator(seed=12).generate(_SimulatedStream.BLOCK, 600, 60, 1.1)
+
+    closed = []
+    for step in range(1, 181):
+        now[0] = 600 + step
+        live = stream.tick()
+        assert live["l"] <= min(live["o"], live["c"]) and live["h"] >= max(live["o"], live["c"])
+        candle, rolled = stream.roll()
+        if rolled:
+            closed.append(candle)
+
+    assert [candle["t"] for candle in closed] == [600, 660, 720]
+    for index, candle in enumerate(closed):
+        assert candle["closed"]
+        assert (candle["o"], candle["h"], candle["l"], candle["c"]) == (
+            expected.open[index], expected.high[index], expected.low[index], expected.close[index]
+        )
@@ -0,0 +1,55 @@
+import numpy as np
+from src.models.candle_frame import CandleFrame
+from src.api.market_simulator import MarketSimulator
+
+
+def test_concat_always_copies():
+    frame = MarketSimulator(seed=1).generate(10)
+
+    for parts in ((frame,), (CandleFrame.empty(), frame), (frame[:4], frame[4:])):
+        merged = CandleFrame.concat(parts)
+        assert merged is not frame
+        assert np.array_equal(merged.close, frame.close)
+        merged.close[0] = -1.0
+        assert frame.close[0] != -1.0
+
+    assert len(CandleFrame.concat((CandleFrame.empty(),))) == 0
+
+
+def _minutes(start: int, count: int) -> CandleFrame:
+    closes = np.arange(count, dtype=np.float64) + 1
+    return CandleFrame(start + np.arange(count) * 60, closes - 0.5, closes + 1, closes - 1, closes, np.ones(count))
+
+
+def test_resample_aligned_buckets():
+    frame = _minutes(3000, 15)
+    resampled = frame.resample(300, 60)
+
+    assert resampled.timestamp.tolist() == [3000, 3300, 3600]
+    assert resampled.open.tolist() == [0.5, 5.5, 10.5]
+    assert resampled.high.tolist() == [6, 11, 16]
+    assert resampled.low.tolist() == [0, 5, 10]
+    assert resampled.close.tolist() == [5, 10, 15]
+    assert resampled.volume.tolist() == [5, 5, 5]
+
+
+def test_resample_drops_leading_partial_bucket():
+    # يبدأ التاريخ بعد دقيقتين من حد الدلو 3000
+    resampled = _minutes(3120, 13).resample(300, 60)
+
+    assert resampled.timestamp.tolist() == [3300, 3600]
+    assert resampled.open.tolist() == [3.5, 8.5]
+
+
+def test_resample_trailing_partial_bucket_only_on_request():
+    frame = _minutes(3000, 13)
+
+    assert frame.resample(300, 60).timestamp.tolist() == [3000, 3300]
+    partial = frame.resample(300, 60, include_partial=True)
+    assert partial.timestamp.tolist() == [3000, 3300, 3600]
+    assert partial.close[-1] == 13 and partial.volume[-1] == 3
+
+
+def test_resample_shorter_than_one_bucket_is_empty():
+    assert len(_minutes(3060, 3).resample(300, 60)) == 0
+    assert len(CandleFrame.empty().resample(300, 60)) == 0
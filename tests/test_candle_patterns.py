@@ -0,0 +1,45 @@
+import pytest
+from src.analyzers.candle_patterns import CandlePatternAnalyzer
+from src.api.market_simulator import MarketSimulator
+
+analyzer = CandlePatternAnalyzer()
+
+# أسماء أقنعة scan مقابل (الاسم، الإشارة) في analyze_patterns
+SCAN_PATTERNS = {
+    "hammer": ("hammer", "bullish"),
+    "doji": ("doji", "neutral"),
+    "engulfing_bullish": ("engulfing", "bullish"),
+    "engulfing_bearish": ("engulfing", "bearish"),
+    "shooting_star": ("shooting_star", "bearish"),
+    "spinning_top": ("spinning_top", "neutral")
+}
+
+
+@pytest.mark.parametrize("seed", [2, 17, 2024])
+def test_scan_matches_analyze_patterns_bar_by_bar(seed):
+    frame = MarketSimulator(seed=seed).generate(1500)
+    masks = analyzer.scan(frame)
+
+    for index in range(1, len(frame)):
+        expected = {
+            (pattern.name, pattern.signal) for pattern in analyzer.analyze_patterns(frame[:index + 1])
+        }
+        scanned = {SCAN_PATTERNS[name] for name, mask in masks.items() if mask[index]}
+        assert scanned == expected, index
+
+
+def test_scan_finds_every_pattern_on_seeded_data():
+    masks = analyzer.scan(MarketSimulator(seed=5).generate(20000))
+
+    for name, mask in masks.items():
+        assert mask.any(), name
+    assert not masks["engulfing_bullish"][0] and not masks["engulfing_bearish"][0]
+
+
+def test_scan_indices_match_masks():
+    frame = MarketSimulator(seed=8).generate(500)
+    masks = analyzer.scan(frame)
+    indices = analyzer.scan(frame, as_indices=True)
+
+    for name, mask in masks.items():
+        assert indices[name].tolist() == mask.nonzero()[0].tolist()
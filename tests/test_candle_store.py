@@ -0,0 +1,53 @@
+import os
+import numpy as np
+import pytest
+from src.api.candle_store import CandleStore
+from src.api.market_simulator import MarketSimulator
+from src.models.candle_frame import CandleFrame
+
+
+def _assert_same(got, expected):
+    for name in ("timestamp", "open", "high", "low", "close", "volume"):
+        assert np.array_equal(getattr(got, name), getattr(expected, name)), name
+
+
+def test_append_and_read_back_across_reopen(tmp_path):
+    frame = MarketSimulator(seed=2).generate(300, 6000)
+    store = CandleStore(str(tmp_path))
+
+    assert store.append("EURUSD_OTC", "1m", frame[:200]) == 200
+    # التداخل مع آخر طابع مخزن يُتجاهل
+    assert store.append("EURUSD_OTC", "1m", frame[150:]) == 100
+
+    reopened = CandleStore(str(tmp_path))
+    series = reopened.series("EURUSD_OTC", "1m")
+    assert len(series) == 300
+    assert series.last_timestamp == frame.timestamp[-1] and series.last_close == frame.close[-1]
+    _assert_same(series.frame(), frame)
+    _assert_same(reopened.frame("EURUSD_OTC", "1m", 6000 + 60 * 10, 6000 + 60 * 19), frame[10:20])
+    _assert_same(reopened.tail("EURUSD_OTC", "1m", 5, end=6000 + 60 * 99), frame[95:100])
+
+
+def test_torn_write_is_truncated_on_next_append(tmp_path):
+    frame = MarketSimulator(seed=3).generate(20, 6000)
+    store = CandleStore(str(tmp_path))
+    store.append("EURUSD_OTC", "1m", frame[:10])
+
+    # بايتات زائدة من كتابة منقطعة لم يُحدَّث بعدها meta.json
+    with open(os.path.join(str(tmp_path), "EURUSD_OTC", "1m", "close.bin"), "ab") as handle:
+        handle.write(b"\x00" * 12)
+    store = CandleStore(str(tmp_path))
+    store.append("EURUSD_OTC", "1m", frame[10:])
+
+    _assert_same(store.frame("EURUSD_OTC", "1m"), frame)
+
+
+def test_rejects_unordered_candles_and_unsafe_names(tmp_path):
+    frame = MarketSimulator(seed=4).generate(5, 6000)
+    store = CandleStore(str(tmp_path))
+
+    with pytest.raises(ValueError):
+        store.append("EURUSD_OTC", "1m", CandleFrame.concat((frame[2:4], frame[:2])))
+    with pytest.raises(ValueError):
+        store.append("../escape", "1m", frame)
+    assert store.assets("1m") == []
@@ -0,0 +1,122 @@
+import asyncio
+import httpx
+from src.ai_layer.base import BaseAIHandler
+from src.ai_layer.fanout import collect_ai_responses
+from src.ai_layer.provider_health import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from src.models.schemas import AIResponse
+from src.services.metrics import provider_errors, provider_hedges, provider_skipped, provider_timeouts
+
+
+class StubHandler(BaseAIHandler):
+    """مزود وهمي بسلوك محدد لكل اختبار (بدون طلبات شبكة)"""
+
+    def __init__(self, name: str, behaviour: str = "approve", delay: float = 0.0):
+        super().__init__(name)
+        self.behaviour = behaviour
+        self.delay = delay
+        self.calls = 0
+
+    async def analyze_signal(self, signal_data):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        try:
+            if self.behaviour == "http_timeout":
+                raise httpx.ReadTimeout("read timed out")
+        except httpx.TimeoutException as e:
+            return self.timeout_response(e)
+        if self.behaviour == "error":
+            return AIResponse(provider=self.provider_name, approval=False, confidence=0.0,
+                              reasoning="status 500", error=True)
+        return AIResponse(provider=self.provider_name, approval=True, confidence=80.0, reasoning="ok")
+
+
+def _collect(handlers, timeouts=None, min_approvals=1, backups=()):
+    signal_data = {"asset": f"FANOUT_{id(handlers)}", "recommendation": "CALL"}
+    return asyncio.run(collect_ai_responses(
+        {handler.provider_name: handler for handler in handlers}, signal_data, min_approvals,
+        timeouts=timeouts, backups=backups
+    ))
+
+
+def test_http_timeout_counts_as_provider_timeout():
+    handler = StubHandler("fanout_http_timeout", "http_timeout")
+    [response] = _collect([handler])
+
+    assert response.error and response.timed_out
+    assert provider_timeouts.value("fanout_http_timeout") == 1
+    assert provider_errors.value("fanout_http_timeout") == 0
+    assert len(BaseAIHandler.provider_health.get("fanout_http_timeout").latency) == 1
+
+
+def test_deadline_timeout_and_error_are_counted_separately():
+    [timed_out] = _collect([StubHandler("fanout_deadline", delay=0.5)], timeouts={"fanout_deadline": 0.05})
+    [failed] = _collect([StubHandler("fanout_error", "error")])
+
+    assert timed_out.timed_out and not failed.timed_out
+    assert provider_timeouts.value("fanout_deadline") == 1
+    assert provider_errors.value("fanout_deadline") == 0
+    assert provider_errors.value("fanout_error") == 1
+    assert provider_timeouts.value("fanout_error") == 0
+
+
+def test_breaker_opens_half_opens_and_recloses():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=lambda: now[0])
+
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+    now[0] = 10.0
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()  # مكان اختبار واحد فقط
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.times_opened == 2
+
+    now[0] = 20.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.failures == 0
+
+
+def test_open_breaker_skips_provider_without_request():
+    handler = StubHandler("fanout_breaker", "error")
+    threshold = BaseAIHandler.provider_health.failure_threshold
+    for _ in range(threshold):
+        _collect([handler])
+    assert BaseAIHandler.provider_health.get("fanout_breaker").breaker.state == OPEN
+
+    [response] = _collect([handler])
+
+    assert response.error and "fanout_breaker" in response.reasoning
+    assert handler.calls == threshold
+    assert provider_skipped.value("fanout_breaker") == 1
+    assert provider_errors.value("fanout_breaker") == threshold
+
+
+def test_slow_primary_is_hedged_by_backup():
+    registry = BaseAIHandler.provider_health
+    for _ in range(registry.hedge_min_samples):
+        registry.get("fanout_hedge_primary").latency.observe(0.01)
+    primary = StubHandler("fanout_hedge_primary", delay=1.0)
+    backup = StubHandler("fanout_hedge_backup")
+
+    [response] = _collect([primary, backup], backups=["fanout_hedge_backup"])
+
+    # الاحتياطي يجيب عن المزود الأساسي بعد p95 الخاص به، والأساسي يُلغى
+    assert response.provider == "fanout_hedge_backup" and response.approval
+    assert primary.calls == backup.calls == 1
+    assert registry.get("fanout_hedge_primary").hedged == 1
+    assert provider_hedges.value("fanout_hedge_primary") == 1
+    assert provider_timeouts.value("fanout_hedge_primary") == 0
+
+
+def test_failed_primary_falls_back_to_backup():
+    primary = StubHandler("fanout_failover_primary", "error")
+    backup = StubHandler("fanout_failover_backup")
+
+    responses = _collect([primary, backup], backups=["fanout_failover_backup"])
+
+    assert [(response.provider, response.approval) for response in responses] == [("fanout_failover_backup", True)]
+    assert provider_hedges.value("fanout_failover_primary") == 1
@@ -0,0 +1,89 @@
+import math
+import numpy as np
+import pytest
+from src.analyzers.incremental_indicators import IncrementalIndicatorState
+from src.analyzers.indicator_calculator import TechnicalIndicatorCalculator
+from src.api.market_simulator import MarketSimulator
+
+# فرق مسموح بقدر خانة التقريب الأخيرة في كل مؤشر (القيم تُقرب بعد الحساب)
+TOLERANCES = {
+    "rsi": 0.011,
+    "macd": 1.1e-5,
+    "bollinger_bands": 1.1e-3,
+    "ema_cross": 1.1e-5,
+    "stochastic": 0.011
+}
+
+calculator = TechnicalIndicatorCalculator()
+
+
+def _frame(seed: int, bars: int = 240):
+    return MarketSimulator(seed=seed, regime_length=60).generate(bars)
+
+
+@pytest.mark.parametrize("seed", [1, 7, 42])
+def test_indicators_match_batch_calculator_bar_by_bar(seed):
+    frame = _frame(seed)
+    state = IncrementalIndicatorState("TEST_OTC", "1m")
+
+    for end, row in enumerate(frame.rows(), start=1):
+        incremental = state.update(row)
+        batch = calculator.calculate_all_indicators(frame[:end])
+
+        assert [indicator.name for indicator in incremental] == [indicator.name for indicator in batch]
+        for got, expected in zip(incremental, batch):
+            assert got.value == pytest.approx(expected.value, abs=TOLERANCES[got.name]), (end, got.name)
+            assert got.signal == expected.signal, (end, got.name)
+            assert got.weight == expected.weight
+
+
+@pytest.mark.parametrize("seed", [3, 11])
+def test_macd_and_ema_cross_state_match_series(seed):
+    frame = _frame(seed, bars=200)
+    state = IncrementalIndicatorState()
+
+    for end, row in enumerate(frame.rows(), start=1):
+        state.update(row)
+        series = calculator.calculate_series(frame[:end])
+
+        if end >= 26:
+            macd = state._emas[12] - state._emas[26]
+            assert macd == pytest.approx(series["macd"][-1], abs=1e-9)
+            assert state._macd_signal == pytest.approx(series["macd_signal"][-1], abs=1e-9)
+            assert macd - state._macd_signal == pytest.approx(series["macd_histogram"][-1], abs=1e-9)
+        if end >= 50:
+            ema_diff = state._emas[20] - state._emas[50]
+            assert ema_diff == pytest.approx(series["ema_diff"][-1], abs=1e-9)
+
+
+def test_no_indicators_before_warm_up():
+    frame = _frame(5, bars=19)
+    state = IncrementalIndicatorState()
+
+    for end, row in enumerate(frame.rows(), start=1):
+        assert state.update(row) == []
+        assert calculator.calculate_all_indicators(frame[:end]) == []
+
+
+def test_update_frame_matches_bar_by_bar_updates():
+    frame = _frame(9, bars=120)
+    stepped = IncrementalIndicatorState()
+    for row in frame.rows():
+        stepped.update(row)
+
+    batched = IncrementalIndicatorState()
+    indicators = batched.update_frame(frame)
+
+    assert indicators == stepped.current_indicators()
+    assert batched.count == stepped.count == len(frame)
+    assert all(math.isfinite(indicator.value) for indicator in indicators)
+
+
+def test_series_are_nan_before_warm_up():
+    series = calculator.calculate_series(_frame(13, bars=80))
+
+    for name in ("macd", "macd_signal", "macd_histogram"):
+        assert np.isnan(series[name][:25]).all()
+        assert np.isfinite(series[name][25:]).all()
+    assert np.isnan(series["ema_diff"][:49]).all()
+    assert np.isfinite(series["ema_diff"][49:]).all()
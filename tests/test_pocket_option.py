@@ -0,0 +1,41 @@
+import asyncio
+import numpy as np
+from src.api.candle_store import CandleStore
+from src.api.market_simulator import MarketSimulator
+from src.api.pocket_option import PocketOptionAPI
+
+
+def _api(root, seed: int = 1) -> PocketOptionAPI:
+    api = PocketOptionAPI(store=CandleStore(str(root)), simulator=MarketSimulator(seed=seed))
+    asyncio.run(api.connect())
+    return api
+
+
+def test_larger_request_backfills_before_stored_history(tmp_path):
+    api = _api(tmp_path)
+    first = asyncio.run(api.get_candles("EURUSD_OTC", "1m", 100))
+    assert len(first) == 100
+
+    frame = asyncio.run(api.get_candles("EURUSD_OTC", "1m", 500))
+    assert len(frame) == 500
+    assert np.all(np.diff(frame.timestamp) == 60)
+    # الجزء المجلوب يتصل بأول شمعة مخزنة دون قفزة في السعر
+    boundary = int(np.searchsorted(frame.timestamp, first.timestamp[0]))
+    assert boundary >= 399
+    assert frame.close[boundary - 1] == frame.open[boundary]
+
+    # الطلب التالي يُخدم من الذاكرة بدل جلب كامل جديد
+    full_fetches = api.cache_stats()["full_fetches"]
+    assert len(asyncio.run(api.get_candles("EURUSD_OTC", "1m", 500))) == 500
+    assert api.cache_stats()["full_fetches"] == full_fetches
+
+
+def test_fresh_api_on_short_store_returns_full_resampled_history(tmp_path):
+    asyncio.run(_api(tmp_path).get_candles("EURUSD_OTC", "1m", 100))
+
+    frames = asyncio.run(_api(tmp_path, seed=2).get_resampled_candles(
+        "EURUSD_OTC", ["1m", "5m", "15m", "30m", "1h"], 50
+    ))
+    assert {timeframe: len(frame) for timeframe, frame in frames.items()} == {
+        "1m": 50, "5m": 50, "15m": 50, "30m": 50, "1h": 50
+    }
@@ -0,0 +1,46 @@
+from datetime import datetime
+from src.models.results import SignalResult
+from src.services.signal_hub import SignalHub
+from src.services.watchlist_scheduler import WatchlistScheduler
+
+
+def _signal(asset: str, recommendation: str = "CALL") -> SignalResult:
+    return SignalResult(
+        asset=asset, recommendation=recommendation, entry_time=None, trade_duration="1m", target_price=None,
+        technical_confidence=70.0, ai_confidence=0.0, final_confidence=70.0,
+        timeframe_analyses=[], ai_responses=[], created_at=datetime(2026, 1, 1)
+    )
+
+
+def test_new_subscriber_gets_latest_snapshot_until_forgotten():
+    hub = SignalHub()
+    hub.publish("EURUSD_OTC", _signal("EURUSD_OTC"))
+    assert hub.subscribe(["EURUSD_OTC"]).get(timeout=0.01) is not None
+
+    hub.forget("EURUSD_OTC")
+    assert hub.subscribe(["EURUSD_OTC"]).get(timeout=0.01) is None
+    assert hub.stats()["assets"] == 0
+
+
+def test_unwatching_last_subscriber_drops_hub_snapshot():
+    hub = SignalHub()
+    scheduler = WatchlistScheduler(hub=hub, max_assets=5)
+    scheduler.start = lambda: None
+    assert scheduler.watch(["GBPUSD_OTC"]) and scheduler.watch(["GBPUSD_OTC"])
+    hub.publish("GBPUSD_OTC", _signal("GBPUSD_OTC"))
+
+    scheduler.unwatch(["GBPUSD_OTC"])
+    assert hub.stats()["assets"] == 1
+    scheduler.unwatch(["GBPUSD_OTC"])
+    assert hub.stats()["assets"] == 0
+    assert scheduler.assets == []
+
+
+def test_subscribe_rejects_beyond_max_clients():
+    hub = SignalHub(max_clients=1)
+    first = hub.subscribe()
+    assert first is not None and hub.subscribe() is None
+
+    hub.unsubscribe(first)
+    assert hub.subscribe() is not None
+    assert hub.stats()["rejected_clients"] == 1
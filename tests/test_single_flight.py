@@ -0,0 +1,69 @@
+import asyncio
+import time
+import pytest
+from src.services.single_flight import SingleFlightCache
+
+
+def test_concurrent_requests_share_one_computation():
+    cache = SingleFlightCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "signal"
+
+    async def scenario():
+        expires_at = time.time() + 60
+        results = await asyncio.gather(*(cache.run("EURUSD_OTC", compute, expires_at) for _ in range(10)))
+        cached = await cache.run("EURUSD_OTC", compute, expires_at)
+        return results, cached
+
+    results, cached = asyncio.run(scenario())
+
+    assert results == ["signal"] * 10 and cached == "signal"
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert (stats["computed"], stats["coalesced"], stats["cached_hits"], stats["inflight"]) == (1, 9, 1, 0)
+
+
+def test_cancelled_waiter_does_not_cancel_shared_computation():
+    cache = SingleFlightCache()
+
+    async def compute():
+        await asyncio.sleep(0.1)
+        return 42
+
+    async def scenario():
+        expires_at = time.time() + 60
+        impatient = asyncio.ensure_future(asyncio.wait_for(cache.run("key", compute, expires_at), 0.01))
+        patient = asyncio.ensure_future(cache.run("key", compute, expires_at))
+        with pytest.raises(asyncio.TimeoutError):
+            await impatient
+        return await patient
+
+    assert asyncio.run(scenario()) == 42
+    assert cache.stats()["computed"] == 1
+
+
+def test_errors_and_expired_results_are_recomputed():
+    cache = SingleFlightCache()
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("provider down")
+        return len(attempts)
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await cache.run("key", flaky, time.time() + 60)
+        # نتيجة منتهية الصلاحية لحظة تخزينها لا تُخدم من الذاكرة
+        first = await cache.run("key", flaky, time.time() - 1)
+        second = await cache.run("key", flaky, time.time() + 60)
+        return first, second
+
+    assert asyncio.run(scenario()) == (2, 3)
+    assert cache.stats()["errors"] == 1
+    assert cache.stats()["cached_hits"] == 0
@@ -0,0 +1,32 @@
+import pytest
+from src.backtest.engine import BacktestEngine, synthetic_frames
+from src.backtest.sweep import ParameterSpace, run_sweep
+
+engine = BacktestEngine(workers=1)
+
+
+def test_default_parameters_are_rounded():
+    defaults = ParameterSpace.default_parameters(engine)
+
+    assert defaults["shooting_star"] == 6.0
+    assert all(value == round(value, 6) for value in defaults.values())
+
+
+def test_history_shorter_than_warm_up_is_rejected():
+    space = ParameterSpace(engine, {"threshold": [0.1, 5]})
+    parameter_sets = space.grid()
+
+    # يومان من شموع الدقيقة لا يكملان 50 شمعة ساعة
+    with pytest.raises(ValueError):
+        run_sweep(synthetic_frames(2, 2 * 1440), space, parameter_sets)
+
+
+def test_short_assets_are_skipped_with_a_warning(capsys):
+    space = ParameterSpace(engine, {"threshold": [0.1, 5]})
+    frames = synthetic_frames(2, engine.warm_up_bars + 500)
+    frames["SHORT_OTC"] = synthetic_frames(1, 1440, seed=3)["ASSET000_OTC"]
+
+    table = run_sweep(frames, space, space.grid())
+
+    assert "SHORT_OTC" in capsys.readouterr().out
+    assert table[0]["trades"] > 0